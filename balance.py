@@ -0,0 +1,33 @@
+"""Tunable numbers behind the rules, gathered in one hashable parameter set.
+
+Every die the rules roll is an inclusive (low, high) range for randint.
+Armor halves incoming hits, but never below the floor for that kind of hit.
+A Params value travels with each game on its Context, so games with
+different balance can run side by side; being a tuple, it also keys caches.
+"""
+from typing import NamedTuple, Optional, Tuple
+
+Range = Tuple[int, int]
+
+
+class Params(NamedTuple):
+    attack: Range = (5, 15)
+    health: int = 100
+    # combat(): enemy toughness, the player's per-swing bonus and enemy blows
+    enemy_health: Range = (25, 45)
+    player_bonus: Range = (3, 12)
+    enemy_damage: Range = (8, 16)
+    combat_armor_floor: int = 3
+    # Strikes from an enemy when walking past it or grabbing an item near it
+    move_strike: Range = (8, 18)
+    move_armor_floor: int = 3
+    take_strike: Range = (5, 12)
+    take_armor_floor: int = 2
+    # Dart trap damage for entering the treasure room unarmored; None is lethal
+    trap_damage: Optional[int] = None
+    # Real-time fights: ticks between the player's swings and between each enemy's
+    player_interval: int = 4
+    enemy_interval: Range = (4, 6)
+
+
+DEFAULT_PARAMS = Params()
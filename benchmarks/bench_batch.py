@@ -0,0 +1,67 @@
+"""Batch play benchmark: scripted playthroughs per second.
+
+Compares the old way of running acceptance scripts, one interpreter per
+script piping commands into the interactive prompt, with `project.py
+--batch` streaming every script through one process, and with
+run_scripts() called in-process.
+
+Run from the repository root: python -m benchmarks.bench_batch
+"""
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.regression import ROUTES, VOCABULARY
+from project import read_scripts, run_scripts
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT = os.path.join(ROOT, "project.py")
+
+
+def scripts(count: int):
+    picker = random.Random(0)
+    routes = list(ROUTES.values())
+    for index in range(count):
+        commands = routes[index % len(routes)] if index % 2 else \
+            [picker.choice(VOCABULARY) for _ in range(40)]
+        # The interactive prompt needs a way out when the game outlives the script
+        yield commands + ["quit"]
+
+
+def main():
+    count = 5000
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "scripts.txt")
+        with open(path, "w") as file:
+            for script in scripts(count):
+                file.write("\n".join(script) + "\n\n")
+
+        sample = list(scripts(20))
+        start = time.perf_counter()
+        for script in sample:
+            subprocess.run([sys.executable, PROJECT], input="\n".join(script) + "\n",
+                           capture_output=True, text=True, check=True)
+        per_process = len(sample) / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, PROJECT, "--batch", path],
+                                capture_output=True, text=True, check=True)
+        batch = count / (time.perf_counter() - start)
+        assert len(result.stdout.splitlines()) == count
+
+        with open(path) as file:
+            start = time.perf_counter()
+            turns = sum(record["turns"] for record in run_scripts(read_scripts(file)))
+            elapsed = time.perf_counter() - start
+
+    print(f"{'interpreter per script':>24}{per_process:>10,.0f} scripts/s")
+    print(f"{'project.py --batch':>24}{batch:>10,.0f} scripts/s")
+    print(f"{'run_scripts in-process':>24}{count / elapsed:>10,.0f} scripts/s"
+          f"{turns / elapsed:>10,.0f} turns/s")
+
+
+if __name__ == "__main__":
+    main()
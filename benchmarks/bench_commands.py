@@ -0,0 +1,88 @@
+"""Command dispatch microbenchmark.
+
+Compares the original if/elif chain in process_command with the dispatch
+table, over every verb, alias and argument form plus unknown input, then
+measures end-to-end process_command throughput on a live headless game.
+
+Run from the repository root: python -m benchmarks.bench_commands
+"""
+import time
+
+from project import COMMANDS, Game, discard, process_command
+
+VOCABULARY = (
+    "north", "south", "east", "west", "up", "down",
+    "go north", "go up", "go nowhere",
+    "take torch", "take dagger", "take nothing",
+    "inventory", "inv", "i", "health", "h", "status",
+    "attack", "attack rat", "run", "hint",
+    "help", "help?", "/h", "quit", "/q",
+    "dance", "go", "take", "inventory please", ""
+)
+
+
+def legacy_dispatch(command: str) -> str:
+    """The if/elif chain process_command used before the dispatch table"""
+    if command in ["north", "south", "east", "west", "up", "down"]:
+        return "move"
+    elif command.startswith("go "):
+        return "move"
+    elif command.startswith("take "):
+        return "take"
+    elif command in ["inventory", "inv", "i"]:
+        return "inventory"
+    elif command in ["health", "h", "status"]:
+        return "health"
+    elif command == "attack" or command.startswith("attack "):
+        return "attack"
+    elif command == "run":
+        return "run"
+    elif command == "hint":
+        return "hint"
+    elif command in ["help", "help?", "/h"]:
+        return "help"
+    elif command in ["quit", "/q"]:
+        return "quit"
+    return "tip"
+
+
+def table_dispatch(command: str):
+    """Parse and look up a command the way process_command does now"""
+    verb, space, _ = command.partition(" ")
+    return COMMANDS.get(verb + space)
+
+
+def rate(function, commands, rounds: int) -> float:
+    """Calls per second of function over the commands"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for command in commands:
+            function(command)
+    return rounds * len(commands) / (time.perf_counter() - start)
+
+
+def end_to_end(rounds: int) -> float:
+    """Commands per second through process_command on a headless game"""
+    # hint builds the solver table on first use and quit ends the game
+    commands = [c for c in VOCABULARY if c not in ("hint", "quit", "/q")]
+    game = Game(discard)
+    elapsed = 0.0
+    for _ in range(rounds):
+        game.reset()
+        start = time.perf_counter()
+        for command in commands:
+            process_command(command, game.player, game.world, game.movement_history, game.ctx)
+        elapsed += time.perf_counter() - start
+    return rounds * len(commands) / elapsed
+
+
+def main(rounds: int = 20000):
+    legacy = rate(legacy_dispatch, VOCABULARY, rounds)
+    table = rate(table_dispatch, VOCABULARY, rounds)
+    print(f"{'if/elif chain dispatch':<28}{legacy:>14,.0f} commands/s")
+    print(f"{'dispatch table':<28}{table:>14,.0f} commands/s  ({table / legacy:.1f}x)")
+    print(f"{'process_command end to end':<28}{end_to_end(rounds // 10):>14,.0f} commands/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Event log benchmark: logging overhead per turn and analyzer throughput.
+
+Plays seeded games into a log, then grows the log to millions of events by
+appending copies of its records, and times the analyzer over it with and
+without NumPy.
+
+Run from the repository root: python -m benchmarks.bench_events
+"""
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from benchmarks.regression import VOCABULARY
+from eventlog import EventLog, analyze, np
+from project import Game, discard
+
+
+def play(games: int, log=None) -> int:
+    picker = random.Random(0)
+    turns = 0
+    for seed in range(games):
+        game = Game(discard, seed=seed, log=log)
+        while not game.done and game.turns < 100:
+            game.step(picker.choice(VOCABULARY))
+        turns += game.turns
+    return turns
+
+
+def main(games: int = 2000, target_events: int = 10_000_000):
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "bench.events")
+    try:
+        start = time.perf_counter()
+        turns = play(games)
+        plain = time.perf_counter() - start
+        with EventLog(path) as log:
+            start = time.perf_counter()
+            play(games, log)
+            logged = time.perf_counter() - start
+        print(f"{turns:,} turns: {plain / turns * 1e6:.2f} us/turn without a log, "
+              f"{logged / turns * 1e6:.2f} us/turn with one")
+
+        with open(path, "rb") as file:
+            sample = file.read()
+        with open(path, "ab") as file:
+            while os.path.getsize(path) < target_events * 20:
+                file.write(sample)
+        size = os.path.getsize(path)
+
+        for use_numpy in ([True, False] if np is not None else [False]):
+            start = time.perf_counter()
+            report = analyze(path, use_numpy=use_numpy)
+            elapsed = time.perf_counter() - start
+            print(f"{'numpy' if use_numpy else 'python':>6}: {report['events']:,} events "
+                  f"({size / 2 ** 20:.0f} MiB) in {elapsed:.2f} s, "
+                  f"{report['events'] / elapsed / 1e6:.1f}M events/s")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
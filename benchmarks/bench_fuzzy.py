@@ -0,0 +1,90 @@
+"""Fuzzy matching benchmark: lookup latency against vocabulary size.
+
+Generated item names ("vorsk iron lantern of the deep") fill
+vocabularies of growing size. Every query is a real name, or one of its
+words, with a random typo, and a share are strings matching nothing. A
+FuzzyIndex answers them and, for comparison, so does a linear scan with
+closest(). Also reports the index's build time and the cost of moving one
+item in and out, as a room's index pays when items are taken.
+
+Run from the repository root: python -m benchmarks.bench_fuzzy
+"""
+import random
+import statistics
+import time
+
+from fuzzy import FuzzyIndex, closest
+
+MATERIALS = ("iron", "bone", "silver", "oak", "crystal", "obsidian", "copper", "jade", "ivory",
+             "amber", "glass", "onyx")
+THINGS = ("lantern", "dagger", "amulet", "key", "shield", "scroll", "potion", "charm", "helm",
+          "chalice", "ring", "idol", "gauntlet", "compass", "mirror")
+ORIGINS = ("deep", "north", "drowned king", "ash", "moon", "forgotten", "serpent", "hollow")
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+def vocabulary(size: int, rng: random.Random):
+    names = set()
+    while len(names) < size:
+        maker = "".join(rng.choice(LETTERS) for _ in range(rng.randint(4, 7)))
+        names.add(f"{maker} {rng.choice(MATERIALS)} {rng.choice(THINGS)} "
+                  f"of the {rng.choice(ORIGINS)}")
+    return sorted(names)
+
+
+def typo(word: str, rng: random.Random) -> str:
+    position = rng.randrange(len(word))
+    edit = rng.randrange(4)
+    if edit == 0:
+        return word[:position] + word[position + 1:]
+    if edit == 1:
+        return word[:position] + rng.choice(LETTERS) + word[position:]
+    if edit == 2:
+        return word[:position] + rng.choice(LETTERS) + word[position + 1:]
+    position = min(position, len(word) - 2)
+    return word[:position] + word[position + 1] + word[position] + word[position + 2:]
+
+
+def queries(names, count: int, rng: random.Random):
+    for index in range(count):
+        if index % 5 == 4:
+            yield "".join(rng.choice(LETTERS) for _ in range(rng.randint(4, 9)))
+        else:
+            name = rng.choice(names)
+            yield typo(rng.choice([name] + name.split()), rng)
+
+
+def latencies(lookup, batch) -> list:
+    samples = []
+    for query in batch:
+        start = time.perf_counter()
+        lookup(query)
+        samples.append(time.perf_counter() - start)
+    return sorted(samples)
+
+
+def main():
+    rng = random.Random(0)
+    print(f"{'names':>8}{'build':>10}{'p50':>9}{'p99':>9}{'move':>9}{'scan p50':>11}")
+    for size in (100, 1_000, 10_000, 50_000):
+        names = vocabulary(size, rng)
+        start = time.perf_counter()
+        index = FuzzyIndex(names)
+        build = time.perf_counter() - start
+
+        batch = list(queries(names, 2000, rng))
+        timed = latencies(index.match, batch)
+        start = time.perf_counter()
+        for name in names[:500]:
+            index.remove(name)
+            index.add(name)
+        move = (time.perf_counter() - start) / min(500, size)
+        # The scan is far too slow to run the whole batch on large vocabularies
+        scanned = latencies(lambda query: closest(query, names), batch[:max(20, 20000 // size)])
+        print(f"{size:>8,}{build * 1000:>8.0f}ms{timed[len(timed) // 2] * 1e6:>7.0f}us"
+              f"{timed[int(len(timed) * 0.99)] * 1e6:>7.0f}us{move * 1e6:>7.0f}us"
+              f"{statistics.median(scanned) * 1e3:>9.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Journal benchmark: snapshot size and time, and replay throughput.
+
+Plays many seeded random games into journals, then rebuilds every one of
+them the way a restarting server would.
+
+Run from the repository root: python -m benchmarks.bench_journal
+"""
+import os
+import random
+import tempfile
+import time
+
+from journal import Journal, restore, snapshot
+from project import Game, discard
+
+COMMANDS = ("north", "south", "east", "west", "go north", "take torch", "take armor",
+            "take key", "attack", "inventory", "health", "run", "dance")
+
+
+def record_sessions(directory: str, sessions: int, turns: int, snapshot_every: int) -> int:
+    """Write one journal per session and return the total turns played"""
+    played = 0
+    for session in range(sessions):
+        picker = random.Random(session)
+        game = Game(discard, seed=session)
+        with Journal(os.path.join(directory, f"{session}.journal"), game, snapshot_every) as journal:
+            for _ in range(turns):
+                if game.done:
+                    break
+                journal.step(picker.choice(COMMANDS))
+        played += game.turns
+    return played
+
+
+def main(sessions: int = 1000, turns: int = 200, snapshot_every: int = 50):
+    game = Game(discard, seed=1)
+    for command in ("north", "attack", "east", "north", "take armor"):
+        game.step(command)
+    start = time.perf_counter()
+    for _ in range(10000):
+        data = snapshot(game)
+    elapsed = (time.perf_counter() - start) / 10000
+    print(f"snapshot size      {len(data):>10,} bytes")
+    print(f"snapshot time      {elapsed * 1e6:>10.1f} us")
+
+    with tempfile.TemporaryDirectory() as directory:
+        record_sessions(directory, sessions, turns, snapshot_every)
+        paths = [os.path.join(directory, name) for name in os.listdir(directory)]
+        size = sum(os.path.getsize(path) for path in paths)
+        print(f"journal size       {size / len(paths):>10,.0f} bytes/session")
+
+        start = time.perf_counter()
+        replayed = 0
+        for path in paths:
+            replayed += restore(path).turns % snapshot_every
+        elapsed = time.perf_counter() - start
+        print(f"restore            {len(paths) / elapsed:>10,.0f} sessions/s")
+        print(f"replay             {replayed / elapsed:>10,.0f} turns/s (tail after snapshot)")
+
+        start = time.perf_counter()
+        replayed = 0
+        for path in paths:
+            replayed += restore(path, turn=snapshot_every - 1).turns
+        elapsed = time.perf_counter() - start
+        print(f"full replay        {replayed / elapsed:>10,.0f} turns/s (from first snapshot)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Leaderboard benchmark: recording cost, query cost and memory per game count.
+
+Synthetic results are recorded into a Leaderboard and, for comparison, into
+a plain list that is sorted on every query. Reports results recorded per
+second, the time of a top-K query both right after a new entry placed and
+when nothing changed, and the memory each approach holds.
+
+Run from the repository root: python -m benchmarks.bench_leaderboard
+"""
+import random
+import time
+import tracemalloc
+
+from leaderboard import Leaderboard
+
+OUTCOMES = ("victory", "defeat", "defeat", "quit")
+
+
+def results(count: int):
+    rng = random.Random(0)
+    for index in range(count):
+        yield (OUTCOMES[index % 4], rng.randint(5, 200), rng.randint(1, 100),
+               rng.randint(0, 40), f"player {index % 50_000}")
+
+
+def held(build) -> int:
+    tracemalloc.start()
+    try:
+        kept = build()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del kept
+    return size
+
+
+def main():
+    print(f"{'games':>10}{'records/s':>12}{'top, fresh':>12}{'top, cached':>13}"
+          f"{'memory':>10}{'list + sort':>13}{'list memory':>13}")
+    for count in (10_000, 100_000, 1_000_000):
+        board = Leaderboard(k=10)
+        start = time.perf_counter()
+        for outcome, turns, health, hits, name in results(count):
+            board.add(outcome, turns, health, hits, name)
+        rate = count / (time.perf_counter() - start)
+
+        board.add("victory", 1, 100, 0, "record breaker")
+        start = time.perf_counter()
+        board.top("fastest")
+        fresh = time.perf_counter() - start
+        start = time.perf_counter()
+        board.top("fastest")
+        cached = time.perf_counter() - start
+
+        def fill() -> Leaderboard:
+            kept = Leaderboard(k=10)
+            for result in results(count):
+                kept.add(*result)
+            return kept
+
+        everything = [result for result in results(count) if result[0] == "victory"]
+        start = time.perf_counter()
+        sorted(everything, key=lambda result: result[1])[:10]
+        rescan = time.perf_counter() - start
+        print(f"{count:>10,}{rate:>12,.0f}{fresh * 1e6:>10.1f}us{cached * 1e6:>11.2f}us"
+              f"{held(fill) / 1024:>8.0f}KB{rescan * 1e3:>11.1f}ms"
+              f"{held(lambda: list(results(count))) / 1024 ** 2:>11.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
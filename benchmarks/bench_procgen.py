@@ -0,0 +1,65 @@
+"""Procedural dungeon benchmark: room lookup latency and memory versus dungeon size.
+
+Run from the repository root: python -m benchmarks.bench_procgen
+"""
+import marshal
+import math
+import random
+import time
+import tracemalloc
+
+from procgen import ProceduralDungeon, ProceduralGame, room_name
+from project import discard
+
+
+def lookup_latency(rooms: int, samples: int = 5000):
+    """Cold (generate + store) and warm lookups spread over `rooms` rooms"""
+    picker = random.Random(rooms)
+    side = max(1, int(math.sqrt(rooms)))
+    world = ProceduralDungeon(1, active_rooms=1024).new_session()
+    # Pretend a player already changed one room in a hundred across the whole area
+    changed = min(rooms // 100, 100_000)
+    world.store.executemany("INSERT OR REPLACE INTO rooms VALUES (?, ?)", (
+        (room_name(picker.randrange(side), picker.randrange(side)),
+         marshal.dumps(((), None, None))) for _ in range(changed)))
+
+    names = [room_name(picker.randrange(side), picker.randrange(side)) for _ in range(samples)]
+    start = time.perf_counter()
+    for name in names:
+        world[name]
+    cold = (time.perf_counter() - start) / samples
+
+    live = list(world.rooms)[-512:]
+    start = time.perf_counter()
+    for _ in range(10):
+        for name in live:
+            world[name]
+    warm = (time.perf_counter() - start) / (10 * len(live))
+    return cold, warm
+
+
+def walk_memory(steps: int, active_rooms: int = 256) -> int:
+    """Traced bytes held by a game after a long random walk"""
+    tracemalloc.start()
+    game = ProceduralGame(3, discard, seed=1, active_rooms=active_rooms)
+    game.player["health"] = 10 ** 9
+    picker = random.Random(0)
+    for _ in range(steps):
+        game.step(picker.choice(("north", "east", "east", "south", "north", "west")))
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size
+
+
+def main():
+    print(f"{'rooms':>12} {'cold lookup':>12} {'warm lookup':>12}")
+    for rooms in (10, 1_000, 100_000, 10_000_000):
+        cold, warm = lookup_latency(rooms)
+        print(f"{rooms:>12,} {cold * 1e6:>10.1f}us {warm * 1e6:>10.2f}us")
+    print()
+    for steps in (1_000, 10_000, 50_000):
+        print(f"memory after {steps:>6,} steps: {walk_memory(steps) / 1024:>8.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Route index benchmark on square grid dungeons of growing size.
+
+Run from the repository root: python -m benchmarks.bench_routes
+"""
+import random
+import time
+
+from routes import RouteIndex
+from world import CompiledWorld
+
+
+def grid(side: int) -> dict:
+    """A side x side dungeon where every room links to its compass neighbours"""
+    rooms = {}
+    for x in range(side):
+        for y in range(side):
+            exits = {}
+            if y + 1 < side:
+                exits["north"] = f"{x},{y + 1}"
+            if y > 0:
+                exits["south"] = f"{x},{y - 1}"
+            if x + 1 < side:
+                exits["east"] = f"{x + 1},{y}"
+            if x > 0:
+                exits["west"] = f"{x - 1},{y}"
+            rooms[f"{x},{y}"] = {"description": "A bare cell.", "exits": exits,
+                                 "items": [], "enemy": None}
+    return rooms
+
+
+def main(sides=(10, 100, 300, 500)):
+    print(f"{'rooms':>9} {'index build':>12} {'cold route':>11} {'warm route':>11} "
+          f"{'hops/route':>11} {'table bytes':>12}")
+    picker = random.Random(0)
+    for side in sides:
+        compiled = CompiledWorld(grid(side))
+        start = time.perf_counter()
+        index = RouteIndex(compiled, cached_destinations=16)
+        build = time.perf_counter() - start
+
+        destinations = [f"{picker.randrange(side)},{picker.randrange(side)}" for _ in range(8)]
+        start = time.perf_counter()
+        for destination in destinations:
+            index.next_hops(compiled.ids[destination])
+        cold = (time.perf_counter() - start) / len(destinations)
+
+        queries = [(f"{picker.randrange(side)},{picker.randrange(side)}",
+                    picker.choice(destinations)) for _ in range(2000)]
+        hops = 0
+        start = time.perf_counter()
+        for source, destination in queries:
+            hops += len(index.route(source, destination))
+        warm = (time.perf_counter() - start) / len(queries)
+
+        table = index.tables[compiled.ids[destinations[0]]]
+        print(f"{len(compiled):>9,} {build * 1000:>10.1f}ms {cold * 1000:>9.2f}ms "
+              f"{warm * 1e6:>9.1f}us {hops / len(queries):>11.1f} "
+              f"{table.itemsize * len(table):>12,}")
+
+
+if __name__ == "__main__":
+    main()
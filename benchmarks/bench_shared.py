@@ -0,0 +1,64 @@
+"""Shared-world benchmark: atomic pickups per second against worker processes.
+
+Every room of a synthetic dungeon starts with a pile of coins, and each
+worker takes coins from random rooms until its share is gone. Striped
+per-room locks are compared with a single lock for the whole world. More
+workers only add throughput up to the number of cores.
+
+Run from the repository root: python -m benchmarks.bench_shared
+"""
+import multiprocessing
+import os
+import random
+import time
+
+from shared import SharedWorld
+from world import CompiledWorld
+
+ROOMS = 64
+COINS = 20_000
+
+
+def coin_world() -> CompiledWorld:
+    return CompiledWorld({f"vault {index}": {"description": "", "exits": {},
+                                             "items": ["coin"] * COINS, "enemy": None}
+                          for index in range(ROOMS)})
+
+
+def grab(world: SharedWorld, takes: int, seed: int, start):
+    session = world.new_session()
+    rooms = [session[name] for name in world.compiled.names]
+    rng = random.Random(seed)
+    start.wait()
+    taken = 0
+    while taken < takes:
+        taken += rooms[rng.randrange(ROOMS)].take("coin")
+
+
+def measure(workers: int, stripes: int, takes: int = 200_000) -> float:
+    """Takes per second across all workers"""
+    world = SharedWorld(coin_world(), stripes=stripes)
+    start = multiprocessing.Event()
+    processes = [multiprocessing.Process(target=grab, args=(world, takes // workers, seed, start))
+                 for seed in range(workers)]
+    try:
+        for process in processes:
+            process.start()
+        began = time.perf_counter()
+        start.set()
+        for process in processes:
+            process.join()
+        return takes / (time.perf_counter() - began)
+    finally:
+        world.close()
+
+
+def main():
+    print(f"{os.cpu_count()} cores")
+    print(f"{'workers':>8}{'per-room locks':>16}{'one lock':>12}")
+    for workers in (1, 2, 4, 8):
+        print(f"{workers:>8}{measure(workers, ROOMS):>14,.0f}/s{measure(workers, 1):>10,.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
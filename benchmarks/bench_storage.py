@@ -0,0 +1,75 @@
+"""SQLite persistence benchmark: turns per second with storage on and off.
+
+Sessions take turns round-robin, as on a busy server, with games restarted
+as they end. Each storage setting reports throughput, commits, and the data-
+loss window it actually ran with: the age of the oldest turn still waiting
+at each commit. The bulk load times rehydrating every saved session.
+
+Run from the repository root: python -m benchmarks.bench_storage
+"""
+import os
+import random
+import tempfile
+import time
+
+from metrics import clock
+from project import Game, discard
+from storage import Store
+
+COMMANDS = ("north", "south", "east", "west", "attack", "take key", "take armor", "inventory")
+
+
+def run(sessions: int, turns: int, store_options=None) -> dict:
+    rng = random.Random(0)
+    games = [Game(discard, seed=index) for index in range(sessions)]
+    names = [f"player {index}" for index in range(sessions)]
+    with tempfile.TemporaryDirectory() as directory:
+        store = Store(os.path.join(directory, "games.db"), **store_options) \
+            if store_options is not None else None
+        window = 0
+        start = time.perf_counter()
+        for turn in range(turns):
+            index = turn % sessions
+            game = games[index]
+            if game.done:
+                game.reset()
+            game.step(rng.choice(COMMANDS))
+            if store is not None:
+                oldest, commits = store.oldest, store.commits
+                store.record(names[index], game)
+                if store.commits != commits and oldest is not None:
+                    window = max(window, clock() - oldest)
+        elapsed = time.perf_counter() - start
+        result = {"turns_per_s": turns / elapsed, "window_ms": window / 1e6,
+                  "commits": store.commits if store is not None else 0}
+        if store is not None:
+            store.close()
+            with Store(os.path.join(directory, "games.db")) as reopened:
+                start = time.perf_counter()
+                restored = len(reopened.load_all())
+                result["restored"] = restored
+                result["load_per_s"] = restored / (time.perf_counter() - start)
+    return result
+
+
+def main():
+    sessions, turns = 1000, 50_000
+    settings = [("off", None),
+                ("every turn", {"batch_turns": 1}),
+                ("64 turns / 50 ms", {"batch_turns": 64, "batch_ms": 50}),
+                ("256 turns / 200 ms", {"batch_turns": 256, "batch_ms": 200}),
+                ("1024 turns / 1 s", {"batch_turns": 1024, "batch_ms": 1000}),
+                ("every turn, FULL", {"batch_turns": 1, "synchronous": "FULL"}),
+                ("256 / 200 ms, FULL", {"batch_turns": 256, "batch_ms": 200,
+                                         "synchronous": "FULL"})]
+    print(f"{sessions:,} sessions, {turns:,} turns")
+    print(f"{'storage':>20}{'turns/s':>10}{'commits':>9}{'loss window':>13}{'bulk load':>16}")
+    for label, options in settings:
+        result = run(sessions, turns, options)
+        load = f"{result['load_per_s']:>10,.0f} games/s" if "load_per_s" in result else ""
+        print(f"{label:>20}{result['turns_per_s']:>10,.0f}{result['commits']:>9,}"
+              f"{result['window_ms']:>11.1f}ms{load:>16}")
+
+
+if __name__ == "__main__":
+    main()
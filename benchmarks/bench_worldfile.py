@@ -0,0 +1,94 @@
+"""World loading benchmark: definition files of growing size, cold and cached.
+
+For each size a grid dungeon is written as JSON, then timed four ways:
+- compile: parse, validate and write the binary cache (first run only)
+- mapped: load_world() with a current cache, i.e. every later start
+- eager: parsing the JSON into an in-memory CompiledWorld, for comparison
+- cold start: a fresh interpreter importing the game, loading the world and
+  playing a first turn, minus a bare interpreter start
+
+Run from the repository root: python -m benchmarks.bench_worldfile
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from world import CompiledWorld
+from worldfile import cache_path, load_world, read_definition
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def grid_dungeon(rooms: int) -> dict:
+    width = max(1, int(rooms ** 0.5))
+
+    def name(index: int) -> str:
+        return "entrance" if index == 0 else f"cell_{index}"
+
+    definition = {}
+    for index in range(rooms):
+        exits = {}
+        if index % width and index - 1 >= 0:
+            exits["west"] = name(index - 1)
+        if (index + 1) % width and index + 1 < rooms:
+            exits["east"] = name(index + 1)
+        if index >= width:
+            exits["south"] = name(index - width)
+        if index + width < rooms:
+            exits["north"] = name(index + width)
+        definition[name(index)] = {
+            "description": f"Cell {index} of a sprawling maze. Something scratches nearby.",
+            "exits": exits, "items": ["torch"] if index % 7 == 0 else [],
+            "enemy": "giant rat" if index % 5 == 3 else None,
+            "treasure": index == rooms - 1}
+    return {"rooms": definition, "rules": {"guardians": ["cursed guardian"],
+                                           "trap_protection": "armor plates"}}
+
+
+def timed(action, repeat: int = 1) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        action()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def launch(code: str, samples: int = 7) -> float:
+    def once() -> float:
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+        return time.perf_counter() - start
+    return statistics.median(once() for _ in range(samples)) * 1000
+
+
+def main():
+    bare = launch("pass")
+    print(f"{'rooms':>8}{'compile':>11}{'mapped':>10}{'eager':>11}{'cold start':>13}")
+    with tempfile.TemporaryDirectory() as directory:
+        for rooms in (14, 1_000, 10_000, 50_000):
+            path = os.path.join(directory, f"maze_{rooms}.json")
+            with open(path, "w") as file:
+                json.dump(grid_dungeon(rooms), file)
+
+            compile_ms = timed(lambda: load_world(path))
+            assert os.path.exists(cache_path(path))
+            mapped_ms = timed(lambda: load_world(path), repeat=50)
+
+            def eager():
+                definition = read_definition(path)
+                CompiledWorld(definition["rooms"], definition["rules"])
+            eager_ms = timed(eager, repeat=3)
+
+            cold_ms = launch("from project import Game, discard; from worldfile import load_world; "
+                             f"Game(discard, world=load_world({path!r})).step('north')") - bare
+            print(f"{rooms:>8,}{compile_ms:>9.1f}ms{mapped_ms:>8.3f}ms{eager_ms:>9.1f}ms"
+                  f"{cold_ms:>11.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Deterministic replay regression suite.
+
+Replays recorded seeded playthroughs from playthroughs.json and checks that
+each produces exactly the recorded transcript and final state. It also
+reports how long the replays took, so timings are comparable from one
+commit to the next.
+
+Run from the repository root:
+    python -m benchmarks.regression            verify and time
+    python -m benchmarks.regression --record   re-record after an intended change
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+from output import ListSink
+from project import Game
+
+RECORDINGS = os.path.join(os.path.dirname(__file__), "playthroughs.json")
+
+ROUTES = {
+    "victory": ["north", "attack", "attack", "attack", "east", "north", "take armor",
+                "south", "west", "north", "attack", "attack", "attack", "attack",
+                "attack", "attack", "attack", "take lost artifact"],
+    "dart trap": ["east", "west", "north", "attack", "attack", "attack", "north"],
+    "explorer": ["east", "north", "take", "east", "go west", "west", "south", "west",
+                 "inventory", "health", "north", "run", "west", "attack", "down",
+                 "take scroll", "i", "status", "help", "/q"],
+}
+VOCABULARY = ("north", "south", "east", "west", "up", "down", "go north", "attack",
+              "take torch", "take dagger", "take armor", "take key", "take potion",
+              "inventory", "health", "run", "help", "dance")
+
+
+def play(seed: int, commands: List[str]) -> Dict:
+    """Play one seeded game and summarize everything it printed and ended with"""
+    sink = ListSink()
+    game = Game(sink, seed=seed)
+    for command in commands:
+        if game.done:
+            break
+        game.step(command)
+    final = game.observe([])
+    return {
+        "transcript_sha256": hashlib.sha256("\n".join(sink.messages).encode()).hexdigest(),
+        "final": {key: final[key] for key in ("room", "health", "inventory", "turns", "outcome")}
+    }
+
+
+def scripted_cases() -> List[Dict]:
+    cases = [{"name": name, "seed": seed, "commands": commands}
+             for name, commands in ROUTES.items() for seed in range(5)]
+    for seed in range(25):
+        picker = random.Random(seed)
+        commands = [picker.choice(VOCABULARY) for _ in range(60)]
+        cases.append({"name": f"random {seed}", "seed": seed, "commands": commands})
+    return cases
+
+
+def record(path: str = RECORDINGS):
+    cases = scripted_cases()
+    for case in cases:
+        case.update(play(case["seed"], case["commands"]))
+    with open(path, "w") as file:
+        json.dump(cases, file, indent=1)
+        file.write("\n")
+
+
+def verify(path: str = RECORDINGS) -> List[str]:
+    """Replay every recording and describe each one that no longer matches"""
+    with open(path) as file:
+        cases = json.load(file)
+    failures = []
+    for case in cases:
+        result = play(case["seed"], case["commands"])
+        if result["final"] != case["final"]:
+            failures.append(f"{case['name']} (seed {case['seed']}): final state "
+                            f"{result['final']} != {case['final']}")
+        elif result["transcript_sha256"] != case["transcript_sha256"]:
+            failures.append(f"{case['name']} (seed {case['seed']}): transcript differs")
+    return failures
+
+
+def timings(path: str = RECORDINGS, repeats: int = 20) -> Dict:
+    with open(path) as file:
+        cases = json.load(file)
+    turns = sum(min(len(case["commands"]), case["final"]["turns"]) for case in cases)
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for case in cases:
+            play(case["seed"], case["commands"])
+        samples.append(time.perf_counter() - start)
+    median = statistics.median(samples)
+    return {"playthroughs": len(cases), "turns": turns, "median_s": median,
+            "turns_per_s": turns / median}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--record", action="store_true", help="overwrite the recordings")
+    args = parser.parse_args()
+
+    if args.record:
+        record()
+        print(f"Recorded {len(scripted_cases())} playthroughs to {RECORDINGS}")
+        return
+
+    failures = verify()
+    for failure in failures:
+        print("MISMATCH", failure)
+    stats = timings()
+    print(f"{stats['playthroughs']} playthroughs, {stats['turns']} turns: "
+          f"median {stats['median_s'] * 1000:.2f} ms, {stats['turns_per_s']:,.0f} turns/s")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""Benchmark suite for the engine's hot paths, with a saved baseline to compare to.
+
+Each case times one operation: world and player setup, a game reset,
+process_command dispatch, handle_movement, a combat, take_item, a complete
+scripted playthrough, and interpreter cold start for `import project`.
+Operations run in batches on fresh, untimed state; the per-operation time of
+every batch is one sample. A case reports the median and percentiles of its
+samples, plus the bytes each operation allocates at its peak and still holds
+afterwards, traced with tracemalloc in a separate untimed pass.
+
+Run from the repository root:
+    python -m benchmarks.suite                  report
+    python -m benchmarks.suite --save           also write the baseline
+    python -m benchmarks.suite --compare        flag regressions against it
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.regression import ROUTES
+from output import ListSink
+from project import (Context, Game, combat, compiled_world, discard, handle_movement,
+                     initialize_player, initialize_world, process_command, take_item)
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Everything process_command knows except quit and the solver-backed hint
+DISPATCH = ("north", "south", "east", "west", "up", "down", "go north", "go nowhere",
+            "take torch", "take nothing", "inventory", "i", "health", "status",
+            "attack", "run", "help", "dance", "")
+
+# A case builds fresh state for one operation; the operation runs on it
+Case = Tuple[Callable[[random.Random], object], Callable[[object], None]]
+
+
+def fresh_session(rng: random.Random) -> Tuple:
+    world = compiled_world().new_session()
+    player = initialize_player(rng)
+    return player, world, {}, Context(discard, rng)
+
+
+def game_for_dispatch(rng: random.Random) -> Tuple:
+    game = Game(discard, seed=rng.randrange(1 << 30))
+    return game, DISPATCH[rng.randrange(len(DISPATCH))]
+
+
+def dispatch(state: Tuple):
+    game, command = state
+    process_command(command, game.player, game.world, game.movement_history, game.ctx)
+
+
+def movement(state: Tuple):
+    player, world, history, ctx = state
+    handle_movement("north", player, world, history, ctx)
+
+
+def fight(state: Tuple):
+    player, world, history, ctx = state
+    player["location"] = "hallway"
+    combat(player, world["hallway"], ctx)
+
+
+def take(state: Tuple):
+    player, world, history, ctx = state
+    take_item("tor", player, world["entrance"], ctx)
+
+
+def playthrough(seed: int):
+    game = Game(ListSink(), seed=seed)
+    for command in ROUTES["victory"]:
+        if game.done:
+            break
+        game.step(command)
+
+
+CASES: Dict[str, Case] = {
+    "setup": (lambda rng: rng, lambda rng: (initialize_world(), initialize_player(rng))),
+    "reset": (lambda rng: Game(discard, seed=rng.randrange(1 << 30)), lambda game: game.reset()),
+    "dispatch": (game_for_dispatch, dispatch),
+    "handle_movement": (fresh_session, movement),
+    "combat": (fresh_session, fight),
+    "take_item": (fresh_session, take),
+    "playthrough": (lambda rng: rng.randrange(1 << 30), playthrough),
+}
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(samples: List[float]) -> Dict:
+    ordered = sorted(samples)
+    median = statistics.median(ordered)
+    return {"median_us": median * 1e6, "p10_us": percentile(ordered, 0.10) * 1e6,
+            "p90_us": percentile(ordered, 0.90) * 1e6, "p99_us": percentile(ordered, 0.99) * 1e6,
+            "ops_per_s": 1 / median, "samples": len(ordered)}
+
+
+def allocations(case: Case, operations: int = 200) -> Dict:
+    """Mean bytes allocated at peak, and still held afterwards, per operation"""
+    prepare, operate = case
+    rng = random.Random(1)
+    states = [prepare(rng) for _ in range(operations)]
+    peak = held = 0
+    tracemalloc.start()
+    try:
+        for state in states:
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            operate(state)
+            current, top = tracemalloc.get_traced_memory()
+            peak += top - before
+            held += current - before
+    finally:
+        tracemalloc.stop()
+    return {"alloc_peak_bytes": peak / operations, "alloc_held_bytes": held / operations}
+
+
+def measure(case: Case, samples: int = 30, batch: int = 200) -> Dict:
+    prepare, operate = case
+    rng = random.Random(0)
+    timings = []
+    for _ in range(samples):
+        states = [prepare(rng) for _ in range(batch)]
+        start = time.perf_counter()
+        for state in states:
+            operate(state)
+        timings.append((time.perf_counter() - start) / batch)
+    result = summarize(timings)
+    result.update(allocations(case))
+    return result
+
+
+def cold_start(samples: int = 15) -> Dict:
+    """Interpreter start plus `import project`, minus a bare interpreter start"""
+    def launch(code: str) -> float:
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+        return time.perf_counter() - start
+
+    bare = statistics.median(launch("pass") for _ in range(samples))
+    result = summarize([launch("import project") for _ in range(samples)])
+    result["import_us"] = result["median_us"] - bare * 1e6
+    return result
+
+
+def run(names: List[str], samples: int = 30, batch: int = 200) -> Dict:
+    results = {}
+    for name in names:
+        if name == "cold_start":
+            results[name] = cold_start(max(5, samples // 2))
+        else:
+            results[name] = measure(CASES[name], samples, batch)
+    return {"python": platform.python_version(), "machine": platform.machine(),
+            "cases": results}
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float = 0.10) -> List[str]:
+    """Describe every case whose median time or peak allocation grew past tolerance"""
+    regressions = []
+    for name, now in current["cases"].items():
+        before = baseline["cases"].get(name)
+        if before is None:
+            continue
+        for key, unit in (("median_us", "us"), ("alloc_peak_bytes", "B")):
+            if key in now and key in before and now[key] > before[key] * (1 + tolerance):
+                regressions.append(f"{name}: {key} {before[key]:,.1f} -> {now[key]:,.1f} {unit} "
+                                   f"(+{(now[key] / before[key] - 1) * 100:.0f}%)")
+    return regressions
+
+
+def report(results: Dict):
+    print(f"{'case':<16}{'median':>11}{'p10':>11}{'p90':>11}{'p99':>11}"
+          f"{'ops/s':>13}{'alloc B':>10}{'held B':>9}")
+    for name, stats in results["cases"].items():
+        allocated = (f"{stats['alloc_peak_bytes']:>10,.0f}{stats['alloc_held_bytes']:>9,.0f}"
+                     if "alloc_peak_bytes" in stats else f"{'-':>10}{'-':>9}")
+        print(f"{name:<16}{stats['median_us']:>9.2f}us{stats['p10_us']:>9.2f}us"
+              f"{stats['p90_us']:>9.2f}us{stats['p99_us']:>9.2f}us{stats['ops_per_s']:>13,.0f}"
+              + allocated)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("cases", nargs="*", default=list(CASES) + ["cold_start"],
+                        help="cases to run (default: all)")
+    parser.add_argument("--samples", type=int, default=30)
+    parser.add_argument("--batch", type=int, default=200, help="operations per sample")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save", action="store_true", help="write results as the baseline")
+    parser.add_argument("--compare", action="store_true", help="flag regressions vs the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="allowed slowdown before flagging, as a fraction")
+    args = parser.parse_args()
+
+    results = run(args.cases, args.samples, args.batch)
+    report(results)
+    if args.save:
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=1)
+            file.write("\n")
+        print(f"Saved baseline to {args.baseline}")
+    if args.compare:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print("REGRESSION", regression)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
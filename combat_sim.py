@@ -0,0 +1,129 @@
+"""Batched Monte Carlo fights that follow the same rules as project.combat()"""
+import random
+from typing import Dict, Optional, Sequence, Union
+
+from balance import DEFAULT_PARAMS, Params
+from project import TREASURE_GUARDIANS
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; fall back to a plain Python loop
+    np = None
+
+ArrayLike = Union[int, bool, Sequence]
+
+
+def resolve_fights(attack: ArrayLike, armor: ArrayLike = False, enemies: ArrayLike = 1,
+                   health: ArrayLike = 100, seed: Optional[int] = None,
+                   params: Params = DEFAULT_PARAMS) -> Dict:
+    """Resolve many fights at once.
+
+    Each fight is a chain of `enemies` opponents fought back to back with the
+    player's health carried over, exactly like repeated `attack` commands
+    against the treasure-room guardians. Scalars broadcast against arrays.
+    Dice follow `params`; the starting health is given per fight.
+
+    Returns a dict of equal-length arrays (lists without NumPy):
+    won, rounds, damage, health and defeated (enemies killed).
+    """
+    if np is not None:
+        return _resolve_numpy(attack, armor, enemies, health, seed, params)
+    return _resolve_python(attack, armor, enemies, health, seed, params)
+
+
+def resolve_treasure_room(attack: ArrayLike, armor: ArrayLike = True,
+                          health: ArrayLike = 100, seed: Optional[int] = None,
+                          params: Params = DEFAULT_PARAMS) -> Dict:
+    """Resolve the guardian chain main() spawns in the treasure room"""
+    return resolve_fights(attack, armor, len(TREASURE_GUARDIANS), health, seed, params)
+
+
+def _resolve_numpy(attack, armor, enemies, health, seed, params) -> Dict:
+    rng = np.random.default_rng(seed)
+    attack, armor, enemies, health = np.broadcast_arrays(
+        np.asarray(attack, dtype=np.int64), np.asarray(armor, dtype=bool),
+        np.asarray(enemies, dtype=np.int64), np.asarray(health, dtype=np.int64))
+    attack = attack.ravel()
+    armor = armor.ravel()
+    enemies = enemies.ravel()
+    health = health.ravel().copy()
+
+    size = health.size
+    rounds = np.zeros(size, dtype=np.int64)
+    damage = np.zeros(size, dtype=np.int64)
+    defeated = np.zeros(size, dtype=np.int64)
+    alive = health > 0
+
+    for index in range(int(enemies.max(initial=0))):
+        fighting = np.flatnonzero(alive & (enemies > index))
+        enemy_health = rng.integers(params.enemy_health[0], params.enemy_health[1] + 1,
+                                    size=fighting.size)
+
+        while fighting.size:
+            # Player attacks
+            enemy_health -= attack[fighting] + rng.integers(
+                params.player_bonus[0], params.player_bonus[1] + 1, size=fighting.size)
+            rounds[fighting] += 1
+
+            killed = enemy_health <= 0
+            defeated[fighting[killed]] += 1
+            fighting = fighting[~killed]
+            enemy_health = enemy_health[~killed]
+
+            # Enemy attacks
+            hits = rng.integers(params.enemy_damage[0], params.enemy_damage[1] + 1,
+                                size=fighting.size)
+            hits = np.where(armor[fighting], np.maximum(params.combat_armor_floor, hits // 2),
+                            hits)
+            health[fighting] -= hits
+            damage[fighting] += hits
+
+            survived = health[fighting] > 0
+            alive[fighting[~survived]] = False
+            fighting = fighting[survived]
+            enemy_health = enemy_health[survived]
+
+    return {
+        "won": alive,
+        "rounds": rounds,
+        "damage": damage,
+        "health": health,
+        "defeated": defeated
+    }
+
+
+def _resolve_python(attack, armor, enemies, health, seed, params) -> Dict:
+    rng = random.Random(seed)
+    columns = [attack, armor, enemies, health]
+    size = max((len(c) for c in columns if not isinstance(c, (int, bool))), default=1)
+    attack, armor, enemies, health = (
+        [c] * size if isinstance(c, (int, bool)) else list(c) for c in columns)
+    if any(len(c) != size for c in (attack, armor, enemies, health)):
+        raise ValueError("fight arrays must all have the same length")
+
+    result = {"won": [], "rounds": [], "damage": [], "health": [], "defeated": []}
+    for power, armored, count, hp in zip(attack, armor, enemies, health):
+        rounds = damage = defeated = 0
+        while hp > 0 and defeated < count:
+            enemy_health = rng.randint(*params.enemy_health)
+            while True:
+                enemy_health -= power + rng.randint(*params.player_bonus)
+                rounds += 1
+                if enemy_health <= 0:
+                    defeated += 1
+                    break
+
+                hit = rng.randint(*params.enemy_damage)
+                if armored:
+                    hit = max(params.combat_armor_floor, hit // 2)
+                hp -= hit
+                damage += hit
+                if hp <= 0:
+                    break
+
+        result["won"].append(hp > 0)
+        result["rounds"].append(rounds)
+        result["damage"].append(damage)
+        result["health"].append(hp)
+        result["defeated"].append(defeated)
+    return result
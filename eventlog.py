@@ -0,0 +1,387 @@
+"""Structured per-turn event log and a streaming analyzer for it.
+
+A log is a flat file of fixed 20-byte little-endian records:
+
+    session u32, turn u32, kind u16, value i16, room u32, arg u32
+
+`room` and (for most kinds) `arg` are symbol IDs. Symbol names are appended
+to a sidecar file, `<log>.names`, one per line, the first time they are
+seen, and that file is always written ahead of the records that use them.
+Because every record has the same size, the analyzer can walk a log of any
+length through a memory map, one fixed-size chunk at a time, in constant
+memory. It parses each chunk with NumPy when that is available and
+otherwise slices its 32-bit words into columns with the array module.
+
+Run from the repository root: python eventlog.py sessions.events
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; fall back to array slicing
+    np = None
+
+RECORD = struct.Struct("<IIHhII")
+
+# Kinds: what value, room and arg hold for each
+START = 0    # value: health, room: starting room, arg: attack (a number, not a symbol)
+MOVE = 1     # room: from, arg: to
+TAKE = 2     # room, arg: item
+DAMAGE = 3   # value: health lost over the turn, room: where the turn began
+ROUND = 4    # value: damage taken in one combat round, room, arg: enemy
+DEFEAT = 5   # room, arg: enemy defeated
+SPAWN = 6    # room, arg: enemy that appeared
+TRAP = 7     # room: where the dart trap killed the player
+DEATH = 8    # room: where the fatal blow came from, arg: cause (enemy or "dart trap")
+VICTORY = 9  # room
+QUIT = 10    # room
+KINDS = ("start", "move", "take", "damage", "round", "defeat", "spawn", "trap", "death",
+         "victory", "quit")
+
+DART_TRAP = "dart trap"
+# Once-per-session milestones of the standard dungeon, in play order
+FUNNEL = (("started", START, ""), ("rat defeated", DEFEAT, "giant rat"),
+          ("armor found", TAKE, "armor plates"),
+          ("guardians faced", SPAWN, "poisonous serpent"), ("victory", VICTORY, ""))
+
+if np is not None:
+    RECORD_DTYPE = np.dtype([("session", "<u4"), ("turn", "<u4"), ("kind", "<u2"),
+                             ("value", "<i2"), ("room", "<u4"), ("arg", "<u4")])
+
+
+class EventLog:
+    """Appends the events of any number of games to one log"""
+
+    def __init__(self, path: str, buffer_size: int = 1 << 20):
+        self.path = path
+        self.names: List[str] = read_names(path)
+        self.symbols: Dict[str, int] = {name: index for index, name in enumerate(self.names)}
+        # A crash can leave a record or a name half written; cut it off so that
+        # what is appended now lines up with what came before
+        cut_torn_tail(path + ".names", sum(len(name.encode("utf-8")) + 1 for name in self.names))
+        if os.path.exists(path):
+            size = os.path.getsize(path)
+            cut_torn_tail(path, size - size % RECORD.size)
+        self.names_file = open(path + ".names", "a", encoding="utf-8")
+        if not self.names:
+            self.symbol("")
+
+        self.file = open(path, "ab", buffering=buffer_size)
+        # Continue numbering after the sessions already in the log
+        self.sessions = 0
+        size = self.file.tell()
+        if size:
+            with open(path, "rb") as existing:
+                existing.seek(size - RECORD.size)
+                self.sessions = RECORD.unpack(existing.read(RECORD.size))[0] + 1
+        self.session = self.turn = self.room = 0
+
+    def symbol(self, name: str) -> int:
+        index = self.symbols.get(name)
+        if index is None:
+            index = self.symbols[name] = len(self.names)
+            self.names.append(name)
+            self.names_file.write(name + "\n")
+            self.names_file.flush()
+        return index
+
+    def write(self, kind: int, value: int, room: int, arg: int):
+        self.file.write(RECORD.pack(self.session, self.turn, kind, value, room, arg))
+
+    def start(self, location: str, health: int, attack: int) -> int:
+        """Open a new session and return its ID"""
+        session = self.sessions
+        self.sessions += 1
+        self.begin(session, 0, location)
+        self.write(START, health, self.room, attack)
+        return session
+
+    def begin(self, session: int, turn: int, location: str):
+        """Set the session, turn and room that the rules' own records belong to"""
+        self.session = session
+        self.turn = turn
+        self.room = self.symbol(location)
+
+    def round(self, enemy: str, taken: int):
+        """One combat round, reported by combat() itself"""
+        self.write(ROUND, taken, self.room, self.symbol(enemy))
+
+    def record_turn(self, events: List, location: str, enemy: Optional[str],
+                    outcome: Optional[str], here: str):
+        """A finished turn's events; `location` and `enemy` are as the turn began"""
+        room = self.room
+        for event in events:
+            kind = event[0]
+            if kind == "move":
+                self.write(MOVE, 0, self.symbol(event[1]), self.symbol(event[2]))
+            elif kind == "take":
+                self.write(TAKE, 0, room, self.symbol(event[1]))
+            elif kind == "damage":
+                self.write(DAMAGE, event[1], room, 0)
+            elif kind == "defeat":
+                self.write(DEFEAT, 0, room, self.symbol(event[1]))
+            elif kind == "spawn":
+                self.write(SPAWN, 0, self.symbol(here), self.symbol(event[1]))
+            elif kind == "trap":
+                self.write(TRAP, 0, self.symbol(here), 0)
+            elif kind == "victory":
+                self.write(VICTORY, 0, self.symbol(here), 0)
+        if outcome == "defeat":
+            if events and events[-1][0] == "trap":
+                self.write(DEATH, 0, self.symbol(here), self.symbol(DART_TRAP))
+            else:
+                self.write(DEATH, 0, room, self.symbol(enemy or ""))
+        elif outcome == "quit":
+            self.write(QUIT, 0, self.symbol(here), 0)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+        self.names_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_names(path: str) -> List[str]:
+    try:
+        with open(path + ".names", encoding="utf-8") as file:
+            return file.read().split("\n")[:-1]
+    except FileNotFoundError:
+        return []
+
+
+def cut_torn_tail(path: str, size: int):
+    """Truncate a file to `size` bytes if a crash left more than that"""
+    if os.path.exists(path) and os.path.getsize(path) > size:
+        os.truncate(path, size)
+
+
+def chunks(path: str, records: int = 1 << 18) -> Iterator[bytes]:
+    """Whole-record slices of a memory-mapped log; a torn last record is skipped.
+
+    Each slice is copied out of the map, so callers may keep it after the map
+    is closed; at the default size that is 5 MiB at a time.
+    """
+    size = os.path.getsize(path)
+    size -= size % RECORD.size
+    if not size:
+        return
+    step = records * RECORD.size
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        for offset in range(0, size, step):
+            yield mapped[offset:min(offset + step, size)]
+
+
+def read_events(path: str) -> Iterator[Tuple[int, int, int, int, int, int]]:
+    """Every record as a (session, turn, kind, value, room, arg) tuple"""
+    for chunk in chunks(path):
+        yield from RECORD.iter_unpack(chunk)
+
+
+class Analysis:
+    """Running totals over a log, updated one chunk at a time"""
+
+    def __init__(self, funnel: Sequence[Tuple[str, int, str]] = FUNNEL):
+        self.funnel = funnel
+        self.events = 0
+        self.kinds = Counter()
+        self.visits = Counter()
+        self.exits = Counter()
+        self.deaths = Counter()
+        self.causes = Counter()
+        self.stages = Counter()
+        self.armor_turns = Counter()
+        self.rounds = Counter()
+        self.round_damage = Counter()
+
+    def add_python(self, chunk: bytes, symbols: Dict[str, int]):
+        # A record is five 32-bit words; the third packs kind (low) and value (high)
+        words = array("I", chunk)
+        if sys.byteorder == "big":
+            words.byteswap()
+        kinds, rooms, args = words[2::5], words[3::5], words[4::5]
+        self.events += len(kinds)
+
+        # Counting whole (kind/value, room, arg) triples runs in C; the few
+        # distinct triples are then unpacked in Python
+        triples = Counter()
+        triples.update(zip(kinds, rooms, args))
+        for (packed, room, arg), count in triples.items():
+            kind = packed & 0xFFFF
+            self.kinds[kind] += count
+            if kind == MOVE:
+                self.visits[arg] += count
+                self.exits[room, arg] += count
+            elif kind == START:
+                self.visits[room] += count
+            elif kind == ROUND:
+                value = packed >> 16
+                self.rounds[arg] += count
+                self.round_damage[arg] += (value - 0x10000 if value & 0x8000 else value) * count
+            elif kind == DEATH:
+                self.deaths[room] += count
+                self.causes[arg] += count
+            for stage, (_, stage_kind, name) in enumerate(self.funnel):
+                if kind == stage_kind and (not name or arg == symbols.get(name, -1)):
+                    self.stages[stage] += count
+
+        armor = symbols.get("armor plates")
+        if armor is not None:
+            turns = words[1::5]
+            index = -1
+            while True:
+                try:
+                    index = args.index(armor, index + 1)
+                except ValueError:
+                    break
+                if kinds[index] & 0xFFFF == TAKE:
+                    self.armor_turns[turns[index]] += 1
+
+    def add_numpy(self, chunk: bytes, symbols: Dict[str, int]):
+        records = np.frombuffer(chunk, dtype=RECORD_DTYPE)
+        kind, room, arg = records["kind"], records["room"], records["arg"]
+        self.events += len(records)
+        tally(self.kinds, kind)
+
+        moves = kind == MOVE
+        tally(self.visits, arg[moves])
+        tally(self.visits, room[kind == START])
+        sources, targets = room[moves].astype(np.int64), arg[moves].astype(np.int64)
+        width = int(max(sources.max(initial=0), targets.max(initial=0))) + 1
+        if width * width <= 1 << 22:
+            # Small worlds: count (from, to) pairs in one dense bincount
+            for key, count in sparse(np.bincount(sources * width + targets)):
+                self.exits[key // width, key % width] += count
+        else:
+            pairs = sources << 32 | targets
+            for key, count in zip(*np.unique(pairs, return_counts=True)):
+                self.exits[int(key) >> 32, int(key) & 0xFFFFFFFF] += int(count)
+
+        rounds = kind == ROUND
+        enemies = arg[rounds]
+        tally(self.rounds, enemies)
+        if enemies.size:
+            damage = np.bincount(enemies, weights=records["value"][rounds])
+            for enemy in np.flatnonzero(damage):
+                self.round_damage[int(enemy)] += int(damage[enemy])
+        deaths = kind == DEATH
+        tally(self.deaths, room[deaths])
+        tally(self.causes, arg[deaths])
+        tally(self.armor_turns,
+              records["turn"][(kind == TAKE) & (arg == symbols.get("armor plates", -1))])
+        for stage, (_, stage_kind, name) in enumerate(self.funnel):
+            hits = kind == stage_kind
+            if name:
+                hits &= arg == symbols.get(name, -1)
+            self.stages[stage] += int(np.count_nonzero(hits))
+
+    def report(self, names: List[str]) -> Dict:
+        def named(counter: Counter) -> Dict[str, int]:
+            return {names[key]: count for key, count in counter.most_common()}
+
+        armor_total = sum(self.armor_turns.values())
+        sessions = self.stages[0] or self.kinds[START]
+        return {
+            "events": self.events,
+            "sessions": self.kinds[START],
+            "kinds": {KINDS[kind]: count for kind, count in sorted(self.kinds.items())},
+            "heatmap": named(self.visits),
+            "exits": {f"{names[a]} -> {names[b]}": count
+                      for (a, b), count in self.exits.most_common()},
+            "deaths_by_room": named(self.deaths),
+            "death_causes": named(self.causes),
+            "funnel": [{"stage": stage, "sessions": self.stages[index],
+                        "share": self.stages[index] / sessions if sessions else 0.0}
+                       for index, (stage, _, _) in enumerate(self.funnel)],
+            "turns_to_armor": {"found": armor_total,
+                               "mean": sum(turn * count for turn, count in self.armor_turns.items())
+                               / armor_total if armor_total else None,
+                               "median": median(self.armor_turns)},
+            "combat": {names[enemy]: {"rounds": rounds,
+                                      "damage_per_round": self.round_damage[enemy] / rounds}
+                       for enemy, rounds in self.rounds.most_common()},
+        }
+
+
+def sparse(counts) -> Iterator[Tuple[int, int]]:
+    """(index, count) for the non-zero entries of a bincount"""
+    for index in np.flatnonzero(counts):
+        yield int(index), int(counts[index])
+
+
+def tally(counter: Counter, values):
+    """Add a NumPy array of small non-negative integers to a Counter"""
+    if values.size:
+        for value, count in sparse(np.bincount(values)):
+            counter[value] += count
+
+
+def median(counts: Counter) -> Optional[int]:
+    total = sum(counts.values())
+    seen = 0
+    for value in sorted(counts):
+        seen += counts[value]
+        if seen * 2 >= total:
+            return value
+    return None
+
+
+def analyze(path: str, funnel: Sequence[Tuple[str, int, str]] = FUNNEL,
+            use_numpy: bool = True) -> Dict:
+    """Heatmap, exit use, funnel, death causes and time to armor for a whole log"""
+    names = read_names(path)
+    symbols = {name: index for index, name in enumerate(names)}
+    analysis = Analysis(funnel)
+    vectorized = use_numpy and np is not None
+    for chunk in chunks(path):
+        if vectorized:
+            analysis.add_numpy(chunk, symbols)
+        else:
+            analysis.add_python(chunk, symbols)
+    return analysis.report(names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("log")
+    parser.add_argument("--no-numpy", action="store_true", help="parse without NumPy")
+    args = parser.parse_args()
+
+    report = analyze(args.log, use_numpy=not args.no_numpy)
+    print(f"{report['events']:,} events over {report['sessions']:,} sessions")
+    print("\nFunnel:")
+    for stage in report["funnel"]:
+        print(f"  {stage['stage']:<16}{stage['sessions']:>10,}{stage['share']:>8.1%}")
+    print("\nMost visited rooms:")
+    for room, visits in list(report["heatmap"].items())[:10]:
+        print(f"  {room:<16}{visits:>10,}")
+    print("\nBusiest exits:")
+    for exit, uses in list(report["exits"].items())[:10]:
+        print(f"  {exit:<30}{uses:>10,}")
+    print("\nDeaths by room:")
+    for room, deaths in report["deaths_by_room"].items():
+        print(f"  {room:<16}{deaths:>10,}")
+    print("\nDeath causes:")
+    for cause, deaths in report["death_causes"].items():
+        print(f"  {cause or 'unknown':<20}{deaths:>10,}")
+    armor = report["turns_to_armor"]
+    if armor["found"]:
+        print(f"\nArmor found in {armor['found']:,} sessions after {armor['mean']:.1f} turns "
+              f"on average (median {armor['median']})")
+
+
+if __name__ == "__main__":
+    main()
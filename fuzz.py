@@ -0,0 +1,266 @@
+"""Coverage-guided command fuzzer for the game engine.
+
+Sequences of commands are played through Game.step, and so through
+process_command, in seeded headless games. After every turn the fuzzer
+checks the engine's invariants:
+- counted item lists agree with their contents, so no count goes negative
+- items only move between rooms and the inventory, so none is duplicated
+  or lost, the artifact included
+- health never rises, and once it reaches zero the game is over
+- the player stands in a room of the dungeon
+- nothing changes once the game has ended
+
+Coverage is the set of (room, enemy, inventory, outcome) states reached.
+Sequences that reach a new state join the corpus, and later sequences are
+mutated from it, so the search keeps pushing into states it has not seen.
+Rounds of sequences fan out over a process pool. Every crash, unexpected
+SystemExit or broken invariant is shrunk to a shortest reproducer that
+fails the same way.
+
+Run from the repository root:
+    python fuzz.py --seconds 60 --workers 4
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import traceback
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from journal import snapshot
+from project import COMMANDS, Game, derive_seed, discard
+from world import DIRECTIONS, CompiledWorld
+from worldfile import load_world
+
+MAX_LENGTH = 40
+# Arguments no rule expects, alongside every real direction, item, enemy and room
+JUNK = ("", "nothing", "xyzzy", "north north", "arm", "the", "lost", "-1")
+
+
+class Failure(NamedTuple):
+    """A broken run: `signature` identifies the bug, the rest reproduces it"""
+    signature: Tuple[str, ...]
+    message: str
+    seed: int
+    commands: Tuple[str, ...]
+
+
+def vocabulary(compiled: CompiledWorld) -> Tuple[str, ...]:
+    """Every command form the dispatch table accepts, with real and junk arguments"""
+    rules = compiled.rules
+    arguments = set(DIRECTIONS) | set(JUNK) | set(compiled.names)
+    arguments.update(item for items in compiled.items for item in items)
+    arguments.update(enemy for enemy in compiled.enemies if enemy)
+    arguments.update(rules.guardians if rules is not None else ())
+    commands = set()
+    for key in COMMANDS:
+        if key.endswith(" "):
+            commands.update(key + argument for argument in sorted(arguments))
+        else:
+            commands.update((key, key + " xyzzy"))
+    commands.update(("", "dance", "go", "take"))
+    return tuple(sorted(commands))
+
+
+def check(game: Game, room_items: Counter, health: int) -> Optional[Tuple[str, str]]:
+    """The first invariant the game breaks after a turn, as (name, detail).
+
+    `room_items` counts the starting items of the rooms the session has
+    reached; items are only taken, so those rooms and the inventory hold
+    exactly these between them.
+    """
+    player = game.player
+    inventory = player["inventory"]
+    if player["location"] not in game.compiled.ids:
+        return "unknown room", repr(player["location"])
+
+    held = Counter()
+    for name, items in [("inventory", inventory)] + [(name, room["items"])
+                                                      for name, room in game.world.items()]:
+        counts = getattr(items, "counts", None)
+        if counts is not None and counts != Counter(items):
+            return "item counts drifted", f"{name}: {counts} for {list(items)}"
+        held.update(items)
+    if held != room_items:
+        item = next(item for item in held.keys() | room_items.keys()
+                    if held[item] != room_items[item])
+        return "items not conserved", f"{item}: {held[item]} held, {room_items[item]} placed"
+
+    if player["health"] > health:
+        return "health rose", f"{health} -> {player['health']}"
+    if player["health"] <= 0 and not game.done:
+        return "dead player still playing", f"health {player['health']}"
+    return None
+
+
+def run_case(game: Game, seed: int, commands: Sequence[str],
+             features: Optional[Set] = None) -> Optional[Failure]:
+    """Play one sequence, adding the states it reaches to `features`, and return its failure"""
+    game.reset(seed)
+    compiled = game.compiled
+    reached: Set[str] = set()
+    room_items: Counter = Counter()
+    health = game.player["health"]
+    for step, command in enumerate(commands):
+        ended = snapshot(game) if game.done else None
+        try:
+            game.step(command)
+        except SystemExit as error:
+            return Failure(("SystemExit",), f"SystemExit({error.code!r})", seed,
+                           tuple(commands[:step + 1]))
+        except Exception as error:
+            frame = traceback.extract_tb(error.__traceback__)[-1]
+            return Failure(("crash", type(error).__name__, frame.name),
+                           f"{type(error).__name__}: {error} in {frame.name} line {frame.lineno}",
+                           seed, tuple(commands[:step + 1]))
+
+        if ended is not None:
+            if snapshot(game) != ended:
+                return Failure(("invariant", "changed after the end"),
+                               f"{command!r} changed a finished game", seed,
+                               tuple(commands[:step + 1]))
+            break
+        # Rooms enter the session as the player reaches them, each with its starting items
+        for name in game.world.keys() - reached:
+            reached.add(name)
+            room_items.update(compiled.items[compiled.ids[name]])
+        broken = check(game, room_items, health)
+        if broken is not None:
+            return Failure(("invariant", broken[0]), broken[1], seed, tuple(commands[:step + 1]))
+        health = game.player["health"]
+        if features is not None:
+            player = game.player
+            features.add((player["location"], game.world[player["location"]]["enemy"],
+                          tuple(sorted(set(player["inventory"]))), game.outcome))
+    return None
+
+
+def shrink(game: Game, failure: Failure) -> Failure:
+    """Drop commands, in halving chunks, while the run still fails the same way"""
+    commands = list(failure.commands)
+    chunk = max(1, len(commands) // 2)
+    while True:
+        index = 0
+        while index < len(commands):
+            candidate = commands[:index] + commands[index + chunk:]
+            result = run_case(game, failure.seed, candidate)
+            if result is not None and result.signature == failure.signature:
+                failure, commands = result, list(result.commands)
+            else:
+                index += chunk
+        if chunk == 1:
+            return failure
+        chunk //= 2
+
+
+def mutate(rng: random.Random, corpus: Sequence[Tuple[int, Tuple[str, ...]]],
+           words: Sequence[str], max_length: int) -> Tuple[int, Tuple[str, ...]]:
+    """A new (seed, commands) case derived from a random corpus entry"""
+    seed, commands = rng.choice(corpus)
+    commands = list(commands)
+    choice = rng.random()
+    if choice < 0.35 or not commands:
+        commands.extend(rng.choice(words) for _ in range(rng.randint(1, 5)))
+    elif choice < 0.55:
+        commands.insert(rng.randrange(len(commands) + 1), rng.choice(words))
+    elif choice < 0.7:
+        commands[rng.randrange(len(commands))] = rng.choice(words)
+    elif choice < 0.8:
+        start = rng.randrange(len(commands))
+        del commands[start:start + rng.randint(1, 4)]
+    elif choice < 0.9:
+        _, other = rng.choice(corpus)
+        commands = commands[:rng.randint(0, len(commands))] + list(other[rng.randint(0, len(other)):])
+    else:
+        seed = rng.getrandbits(32)
+    return seed, tuple(commands[:max_length])
+
+
+def explore(corpus: List[Tuple[int, Tuple[str, ...]]], known: Set, seed: int, count: int,
+            world: Optional[CompiledWorld] = None, max_length: int = MAX_LENGTH) -> Dict:
+    """Worker task: run `count` mutated cases, keeping those that reach new states"""
+    rng = random.Random(seed)
+    game = Game(discard, world)
+    words = vocabulary(game.compiled)
+    known = set(known)
+    found, failures = [], {}
+    start = time.perf_counter()
+    for _ in range(count):
+        case = mutate(rng, corpus, words, max_length)
+        features = set()
+        failure = run_case(game, case[0], case[1], features)
+        if failure is not None and failure.signature not in failures:
+            failures[failure.signature] = shrink(game, failure)
+        new = features - known
+        if new:
+            known |= new
+            found.append((case, new))
+    return {"sequences": count, "elapsed": time.perf_counter() - start, "found": found,
+            "failures": list(failures.values())}
+
+
+def fuzz(seconds: Optional[float] = None, rounds: Optional[int] = None,
+         workers: Optional[int] = None, batch: int = 500, seed: int = 0,
+         world: Optional[CompiledWorld] = None, max_length: int = MAX_LENGTH) -> Dict:
+    """Fuzz until `seconds` pass or `rounds` finish, whichever comes first"""
+    if seconds is None and rounds is None:
+        raise ValueError("Give seconds, rounds or both")
+    workers = workers or os.cpu_count() or 1
+    corpus: List[Tuple[int, Tuple[str, ...]]] = [(seed, ())]
+    known: Set = set()
+    failures: Dict[Tuple[str, ...], Failure] = {}
+    sequences, busy, finished = 0, 0.0, 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers) as pool:
+        while (rounds is None or finished < rounds) and \
+                (seconds is None or time.perf_counter() - start < seconds):
+            futures = [pool.submit(explore, corpus, known,
+                                   derive_seed(seed, finished * workers + task), batch, world,
+                                   max_length)
+                       for task in range(workers)]
+            for future in futures:
+                result = future.result()
+                sequences += result["sequences"]
+                busy += result["elapsed"]
+                for case, new in result["found"]:
+                    if new - known:
+                        known |= new
+                        corpus.append(case)
+                for failure in result["failures"]:
+                    best = failures.get(failure.signature)
+                    if best is None or len(failure.commands) < len(best.commands):
+                        failures[failure.signature] = failure
+            finished += 1
+    elapsed = time.perf_counter() - start
+    return {"sequences": sequences, "rounds": finished, "elapsed_s": elapsed,
+            "workers": workers, "per_core": sequences / busy if busy else 0.0,
+            "states": len(known), "corpus": len(corpus),
+            "failures": sorted(failures.values(), key=lambda failure: failure.signature)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--rounds", type=int, default=None, help="stop after this many rounds")
+    parser.add_argument("--workers", type=int, default=None, help="default: every core")
+    parser.add_argument("--batch", type=int, default=500, help="sequences per task")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--world", metavar="PATH", help="fuzz a dungeon definition file")
+    args = parser.parse_args()
+
+    world = load_world(args.world) if args.world else None
+    report = fuzz(args.seconds, args.rounds, args.workers, args.batch, args.seed, world)
+    print(f"{report['sequences']:,} sequences in {report['elapsed_s']:.1f}s on "
+          f"{report['workers']} workers: {report['per_core']:,.0f} sequences/s/core, "
+          f"{report['states']:,} states, corpus of {report['corpus']:,}")
+    for failure in report["failures"]:
+        print(f"\n{' '.join(failure.signature)}: {failure.message}")
+        print(f"  seed {failure.seed}: {'; '.join(failure.commands)}")
+    sys.exit(1 if report["failures"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""Typo-tolerant lookup of verbs, directions, items, enemies and rooms.
+
+A FuzzyIndex maps each name, and each word in it, to the padded trigrams
+it contains, the way ItemContainer indexes item names for substring
+lookups. A query may differ from a key by at most one edit, or two for
+long words, where an edit is an insertion, deletion, substitution or
+swap of neighbouring letters. An edit touches at most four of the query's
+trigrams, so any key within reach shares all but 4 * edits of them. The
+rarest trigrams therefore yield every candidate. Postings are kept per key
+length, so only keys of a length within reach are read at all. Each
+candidate's letters, kept as a bit set, must differ from the query's by
+no more letters than edits, and only the survivors get the exact,
+early-exiting distance check. Lookup cost follows the few postings read,
+not the size of the vocabulary.
+
+Names come and go one at a time, as items move between rooms and the
+inventory, and the index follows them without being rebuilt.
+"""
+import functools
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from world import CompiledWorld
+
+# Shorter queries are too ambiguous to correct at all
+MIN_LENGTH = 3
+# Words at least this long may be two edits away
+LONG_WORD = 8
+# The most trigrams one edit can change: a swap of neighbours touches four
+GRAMS_PER_EDIT = 4
+
+
+def normalize(name: str) -> str:
+    """Room IDs join their words with underscores; players type spaces"""
+    return name.replace("_", " ")
+
+
+def padded_trigrams(text: str) -> Set[str]:
+    text = f"  {text}  "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def letter_mask(text: str) -> int:
+    """The distinct characters of `text` as bits; rare clashes only let more through"""
+    mask = 0
+    for char in text:
+        mask |= 1 << (ord(char) & 63)
+    return mask
+
+
+def tolerance(length: int) -> int:
+    if length < MIN_LENGTH:
+        return 0
+    return 1 if length < LONG_WORD else 2
+
+
+def edit_distance(first: str, second: str, limit: int) -> int:
+    """Optimal string alignment distance, or limit + 1 once it must exceed `limit`.
+
+    Only cells within `limit` of the diagonal can stay within reach, so each
+    row fills just that band; the rest count as out of reach. Pairs whose
+    letters differ too much are turned away before any row is filled.
+    """
+    if first == second:
+        return 0
+    far = limit + 1
+    if abs(len(first) - len(second)) > limit:
+        return far
+    # Each edit brings in or drops at most one distinct letter
+    letters, others = set(first), set(second)
+    if len(letters - others) > limit or len(others - letters) > limit:
+        return far
+    # Shared ends cost nothing, so the table covers only what lies between them
+    shortest = min(len(first), len(second))
+    start = 0
+    while start < shortest and first[start] == second[start]:
+        start += 1
+    tail = 0
+    while tail < shortest - start and first[-1 - tail] == second[-1 - tail]:
+        tail += 1
+    if start or tail:
+        first, second = first[start:len(first) - tail], second[start:len(second) - tail]
+    width = len(second)
+    before: Optional[List[int]] = None
+    row = [j if j <= limit else far for j in range(width + 1)]
+    for i, char in enumerate(first, 1):
+        current = [far] * (width + 1)
+        current[0] = smallest = i if i <= limit else far
+        for j in range(max(1, i - limit), min(width, i + limit) + 1):
+            other = second[j - 1]
+            value = min(row[j] + 1, current[j - 1] + 1, row[j - 1] + (char != other))
+            if before is not None and j > 1 and char == second[j - 2] and first[i - 2] == other:
+                value = min(value, before[j - 2] + 1)
+            current[j] = value
+            if value < smallest:
+                smallest = value
+        if smallest > limit:
+            return far
+        before, row = row, current
+    return min(row[width], far)
+
+
+class FuzzyIndex:
+    """Names findable by their whole text or any of their words, typos included"""
+
+    def __init__(self, names: Iterable[str] = ()):
+        # Key (a normalized name or one of its words) -> names containing it, with copies.
+        # Names join in arrival order, so the first owner is the longest known
+        self.owners: Dict[str, Dict[str, int]] = {}
+        # Key length -> trigram -> keys of that length containing it
+        self.postings: Dict[int, Dict[str, Set[str]]] = {}
+        # Key -> the letters in it, as a bit set
+        self.letters: Dict[str, int] = {}
+        # The name spelled exactly as a key, which beats names merely containing it
+        self.spelled: Dict[str, str] = {}
+        # When each name present arrived, for breaking ties between keys
+        self.order: Dict[str, int] = {}
+        self.sequence = 0
+        for name in names:
+            self.add(name)
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    @staticmethod
+    def keys(name: str) -> Set[str]:
+        text = normalize(name)
+        return {text, *text.split()}
+
+    def add(self, name: str):
+        if name not in self.order:
+            self.order[name] = self.sequence
+            self.sequence += 1
+            self.spelled.setdefault(normalize(name), name)
+        for key in self.keys(name):
+            owners = self.owners.get(key)
+            if owners is None:
+                owners = self.owners[key] = {}
+                self.letters[key] = letter_mask(key)
+                postings = self.postings.setdefault(len(key), {})
+                for gram in padded_trigrams(key):
+                    postings.setdefault(gram, set()).add(key)
+            owners[name] = owners.get(name, 0) + 1
+
+    def remove(self, name: str):
+        """Forget one copy of a name"""
+        for key in self.keys(name):
+            owners = self.owners[key]
+            if owners[name] > 1:
+                owners[name] -= 1
+                continue
+            del owners[name]
+            if not owners:
+                del self.owners[key]
+                del self.letters[key]
+                postings = self.postings[len(key)]
+                for gram in padded_trigrams(key):
+                    keys = postings[gram]
+                    keys.discard(key)
+                    if not keys:
+                        del postings[gram]
+        text = normalize(name)
+        if name not in self.owners.get(text, ()):
+            del self.order[name]
+            if self.spelled[text] == name:
+                del self.spelled[text]
+                # Another name may share the spelling, such as a room ID and an item
+                for other in self.owners.get(text, ()):
+                    if normalize(other) == text:
+                        self.spelled[text] = other
+                        break
+
+    def match(self, query: str) -> Optional[str]:
+        """The name closest to `query` within its typo tolerance, or None"""
+        query = normalize(query.strip())
+        limit = tolerance(len(query))
+        key = query if query in self.owners else None
+        if key is None and limit:
+            grams = padded_trigrams(query)
+            need = len(grams) - GRAMS_PER_EDIT * limit
+            candidates = set()
+            for length in range(len(query) - limit, len(query) + limit + 1):
+                postings = self.postings.get(length)
+                if postings:
+                    # A key sharing `need` of the grams has one among the len - need + 1 rarest
+                    lists = sorted((postings.get(gram, ()) for gram in grams), key=len)
+                    candidates.update(*lists[:len(grams) - need + 1])
+            mask, letters = letter_mask(query), self.letters
+            best = limit + 1
+            for candidate in candidates:
+                # Each edit brings in or drops at most one distinct letter
+                other = letters[candidate]
+                if (mask & ~other).bit_count() > limit or (other & ~mask).bit_count() > limit:
+                    continue
+                distance = edit_distance(query, candidate, min(best, limit))
+                if distance < best or (distance == best <= limit and
+                                       self.first(candidate) < self.first(key)):
+                    best, key = distance, candidate
+        if key is None:
+            return None
+        return self.spelled.get(key) or next(iter(self.owners[key]))
+
+    def first(self, key: str) -> int:
+        """When the earliest name holding `key` arrived"""
+        return self.order[next(iter(self.owners[key]))]
+
+
+def closest(query: str, names: Sequence[str]) -> Optional[str]:
+    """FuzzyIndex(names).match(query) by a plain scan, cheaper for a handful of names"""
+    query = normalize(query.strip())
+    limit = tolerance(len(query))
+    best = None
+    for order, name in enumerate(names):
+        for key in FuzzyIndex.keys(name):
+            distance = 0 if key == query else edit_distance(query, key, limit) if limit \
+                else limit + 1
+            if distance <= limit and (best is None or (distance, order) < best[:2]):
+                best = (distance, order, key)
+    if best is None:
+        return None
+    key = best[2]
+    owners = [name for name in names if key in FuzzyIndex.keys(name)]
+    return next((name for name in owners if normalize(name) == key), owners[0])
+
+
+def resembles(query: str, name: str) -> bool:
+    """Whether `query` could mean `name`: part of it, or it or a word of it mistyped"""
+    return query in name or closest(query, (name,)) is not None
+
+
+@functools.lru_cache(maxsize=8)
+def room_index(compiled: CompiledWorld) -> FuzzyIndex:
+    """Shared index of a compiled world's room names for `travel`"""
+    return FuzzyIndex(compiled.names)
@@ -0,0 +1,198 @@
+"""Indexed item collections for inventories and rooms.
+
+Both classes are drop-in lists: the rules keep using `in`, append(),
+remove(), iteration and slicing. Alongside the list each one keeps a count
+per item, so membership is a dict lookup however many items it holds.
+Inventories also fold the capabilities of their items into a bitmask as
+items come and go. Room containers index item names by trigram, so partial
+names like "take armor" resolve without scanning every item, and keep a
+FuzzyIndex in step for mistyped ones; small rooms, where a scan is cheaper,
+keep plain lists.
+"""
+from collections import defaultdict, deque
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from fuzzy import FuzzyIndex
+
+DAMAGE_REDUCTION = 1
+CAPABILITIES = {"armor plates": DAMAGE_REDUCTION}
+# Below this many items, scanning a plain list beats building and querying an index
+INDEX_THRESHOLD = 128
+
+
+class CountedList(list):
+    """List that keeps a per-item count in step with its contents"""
+
+    def __init__(self, items: Iterable[str] = ()):
+        super().__init__()
+        self.counts: Dict[str, int] = {}
+        self.extend(items)
+
+    def __contains__(self, item) -> bool:
+        return item in self.counts
+
+    def added(self, item: str):
+        self.counts[item] = self.counts.get(item, 0) + 1
+
+    def removed(self, item: str):
+        left = self.counts[item] - 1
+        if left:
+            self.counts[item] = left
+        else:
+            del self.counts[item]
+
+    def append(self, item: str):
+        super().append(item)
+        self.added(item)
+
+    def extend(self, items: Iterable[str]):
+        for item in items:
+            self.append(item)
+
+    def insert(self, index: int, item: str):
+        super().insert(index, item)
+        self.added(item)
+
+    def remove(self, item: str):
+        super().remove(item)
+        self.removed(item)
+
+    def pop(self, index: int = -1) -> str:
+        item = super().pop(index)
+        self.removed(item)
+        return item
+
+    def clear(self):
+        for item in self:
+            self.removed(item)
+        super().clear()
+
+    def __iadd__(self, items: Iterable[str]):
+        self.extend(items)
+        return self
+
+    def __imul__(self, times: int):
+        super().__imul__(times)
+        self.rebuild()
+        return self
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self.rebuild()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self.rebuild()
+
+    def rebuild(self):
+        """Recount after a bulk slice edit"""
+        items = list(self)
+        super().clear()
+        self.counts = {}
+        self.extend(items)
+
+
+class Inventory(CountedList):
+    """A player's possessions with their combined capabilities"""
+
+    def __init__(self, items: Iterable[str] = ()):
+        self.capabilities = 0
+        super().__init__(items)
+
+    def added(self, item: str):
+        super().added(item)
+        self.capabilities |= CAPABILITIES.get(item, 0)
+
+    def removed(self, item: str):
+        super().removed(item)
+        if item in CAPABILITIES and item not in self.counts:
+            self.capabilities = 0
+            for held in self.counts:
+                self.capabilities |= CAPABILITIES.get(held, 0)
+
+    def rebuild(self):
+        self.capabilities = 0
+        super().rebuild()
+
+    def has(self, capability: int) -> bool:
+        return bool(self.capabilities & capability)
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class ItemContainer(CountedList):
+    """Room items with trigram indexes for partial and mistyped names"""
+
+    def __init__(self, items: Iterable[str] = ()):
+        self.postings: Dict[str, Set[str]] = defaultdict(set)
+        self.fuzzy = FuzzyIndex()
+        # Insertion sequence of each copy, so lookups prefer the item listed first
+        self.order: Dict[str, deque] = {}
+        self.sequence = 0
+        super().__init__(items)
+
+    def added(self, item: str):
+        if item not in self.counts:
+            for gram in trigrams(item):
+                self.postings[gram].add(item)
+        super().added(item)
+        self.fuzzy.add(item)
+        self.order.setdefault(item, deque()).append(self.sequence)
+        self.sequence += 1
+
+    def removed(self, item: str):
+        super().removed(item)
+        self.fuzzy.remove(item)
+        self.order[item].popleft()
+        if item not in self.counts:
+            del self.order[item]
+            for gram in trigrams(item):
+                self.postings[gram].discard(item)
+                if not self.postings[gram]:
+                    del self.postings[gram]
+
+    def insert(self, index: int, item: str):
+        super().insert(index, item)
+        self.rebuild()
+
+    def pop(self, index: int = -1) -> str:
+        item = super().pop(index)
+        if item in self.counts:
+            # Copies are assumed to leave earliest first, which need not be the one popped
+            self.rebuild()
+        return item
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self.rebuild()
+
+    def reverse(self):
+        super().reverse()
+        self.rebuild()
+
+    def rebuild(self):
+        self.postings = defaultdict(set)
+        self.fuzzy = FuzzyIndex()
+        self.order = {}
+        self.sequence = 0
+        super().rebuild()
+
+    def find(self, query: str) -> Optional[str]:
+        """First item whose name contains `query`, as take_item's scan would pick"""
+        grams = trigrams(query)
+        if grams:
+            postings = sorted((self.postings.get(gram, ()) for gram in grams), key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+        else:
+            candidates = self.counts
+        matches = [item for item in candidates if query in item]
+        if not matches:
+            return None
+        return min(matches, key=lambda item: self.order[item][0])
+
+
+def room_items(items: Sequence[str]) -> List[str]:
+    """A room's own mutable copy of its items, indexed once it is large"""
+    return ItemContainer(items) if len(items) > INDEX_THRESHOLD else list(items)
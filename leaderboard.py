@@ -0,0 +1,168 @@
+"""Live leaderboards and running totals over every game finished on a node.
+
+Games report to a Leaderboard as they end. Each board ranks victories by
+one score and keeps only its K best in a min-heap whose root is the entry
+to beat, so recording a game is O(log K) and costs nothing once it cannot
+place. The rest is running totals, so memory stays the same after a
+thousand games or a hundred million. A sorted copy of each board is kept
+for the `leaderboard` command until the next entry that places.
+
+compact() writes the whole state to a JSON file, replacing it atomically,
+and load() picks it up again; servers compact on a timer and at shutdown.
+Each worker of a multi-process server keeps its own board and file, and
+load_peers() merges the other workers' files into what summary() shows,
+so the rankings cover the whole node as of each worker's last compaction.
+"""
+import heapq
+import json
+import os
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+FORMAT_VERSION = 1
+NAMELESS = "a nameless adventurer"
+
+
+class Board(NamedTuple):
+    title: str
+    field: str
+    # True when a lower value ranks higher
+    lowest_first: bool
+
+
+BOARDS = {"fastest": Board("Fastest victories", "turns", True),
+          "healthiest": Board("Most health left", "health", False),
+          "unscathed": Board("Fewest hits taken", "hits", True)}
+FIELDS = ("name", "turns", "health", "hits")
+
+
+class Leaderboard:
+    """Top-K victories per board plus totals over every recorded game"""
+
+    def __init__(self, k: int = 10, path: Optional[str] = None, peers: Sequence[str] = ()):
+        """`path` is where compact() writes; see load() to resume from it.
+        `peers` are the files the node's other workers compact to"""
+        self.k = k
+        self.path = path
+        self.peer_paths = tuple(peers)
+        # The other workers' games, merged; shown by summary() but never compacted here
+        self.peers: Optional[Leaderboard] = None
+        self.games = 0
+        self.totals = {"victory": 0, "defeat": 0, "quit": 0, "turns": 0, "hits": 0,
+                       "victory_turns": 0, "victory_health": 0}
+        # Per board, a min-heap of (rank, -game number, entry)
+        self.heaps: Dict[str, List[Tuple]] = {name: [] for name in BOARDS}
+        self._sorted: Dict[str, Optional[List[Tuple]]] = {name: None for name in BOARDS}
+
+    def record(self, game):
+        """Results hook: called by a Game once its outcome is known"""
+        self.add(game.outcome, game.turns, game.player["health"], game.ctx.hits, game.name)
+
+    def add(self, outcome: str, turns: int, health: int, hits: int, name: Optional[str] = None):
+        self.games += 1
+        totals = self.totals
+        totals[outcome] = totals.get(outcome, 0) + 1
+        totals["turns"] += turns
+        totals["hits"] += hits
+        if outcome != "victory":
+            return
+        totals["victory_turns"] += turns
+        totals["victory_health"] += health
+
+        entry = (name or NAMELESS, turns, health, hits)
+        for board_name, board in BOARDS.items():
+            value = entry[FIELDS.index(board.field)]
+            # Larger ranks higher; ties go to whoever finished first
+            self.place(board_name, (-value if board.lowest_first else value, -self.games, entry))
+
+    def place(self, board_name: str, item: Tuple):
+        heap = self.heaps[board_name]
+        if len(heap) < self.k:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+        else:
+            return
+        self._sorted[board_name] = None
+
+    def absorb(self, other: "Leaderboard"):
+        """Fold another board's games into this one"""
+        self.games += other.games
+        for field, value in other.totals.items():
+            self.totals[field] = self.totals.get(field, 0) + value
+        for board_name, heap in other.heaps.items():
+            for item in heap:
+                self.place(board_name, item)
+
+    def load_peers(self):
+        """Merge what the other workers last compacted, replacing the previous merge"""
+        peers = Leaderboard(self.k)
+        for path in self.peer_paths:
+            peers.absorb(Leaderboard.load(path, self.k))
+        self.peers = peers
+
+    def top(self, board: str) -> List[Tuple[str, int, int, int]]:
+        """Best first (name, turns, health, hits) entries of a board"""
+        if self._sorted[board] is None:
+            self._sorted[board] = [item[2] for item in sorted(self.heaps[board], reverse=True)]
+        return self._sorted[board]
+
+    def summary(self) -> List[str]:
+        """Human-readable lines for the in-game leaderboard command"""
+        view = self
+        if self.peers is not None:
+            view = Leaderboard(self.k)
+            view.absorb(self)
+            view.absorb(self.peers)
+        totals = view.totals
+        victories = totals["victory"]
+        lines = [f"{view.games:,} adventures ended: {victories:,} victories, "
+                 f"{totals['defeat']:,} deaths, {totals['quit']:,} retreats"]
+        if view.games:
+            lines.append(f"Average of {totals['turns'] / view.games:.1f} turns and "
+                         f"{totals['hits'] / view.games:.1f} hits taken")
+        if victories:
+            lines.append(f"Victors needed {totals['victory_turns'] / victories:.1f} turns "
+                         f"and kept {totals['victory_health'] / victories:.1f} health")
+        for name, board in BOARDS.items():
+            entries = view.top(name)
+            if not entries:
+                continue
+            lines.append(f"\n{board.title}:")
+            field = FIELDS.index(board.field)
+            lines.extend(f"{rank:>3}. {entry[0]:<32}{entry[field]:>6} {board.field}"
+                         for rank, entry in enumerate(entries, 1))
+        return lines
+
+    def to_dict(self) -> Dict:
+        return {"version": FORMAT_VERSION, "k": self.k, "games": self.games,
+                "totals": self.totals,
+                "boards": {name: [[rank, order, list(entry)] for rank, order, entry in heap]
+                           for name, heap in self.heaps.items()}}
+
+    def compact(self, path: Optional[str] = None):
+        """Write the state to disk, replacing the previous file in one step"""
+        path = path or self.path
+        with open(path + ".tmp", "w") as file:
+            json.dump(self.to_dict(), file)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path: str, k: int = 10, peers: Sequence[str] = ()) -> "Leaderboard":
+        """The board last compacted to `path`, or an empty one writing there"""
+        board = cls(k, path, peers)
+        try:
+            with open(path) as file:
+                state = json.load(file)
+        except FileNotFoundError:
+            return board
+        if state["version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported leaderboard version {state['version']}")
+        board.games = state["games"]
+        board.totals.update(state["totals"])
+        for name, items in state["boards"].items():
+            if name in board.heaps:
+                best = sorted(((rank, order, tuple(entry)) for rank, order, entry in items),
+                              reverse=True)[:k]
+                heapq.heapify(best)
+                board.heaps[name] = best
+        return board
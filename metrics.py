@@ -0,0 +1,127 @@
+"""Optional instrumentation of the command loop.
+
+A Metrics object, given to a Game (or shared by every game on a server),
+records latency histograms per command, for whole turns and for
+describe_room, together with counters: combats, moves, pickups, enemies
+defeated, and deaths by room. Each command also records the net change in
+allocated memory blocks, read from sys.getallocatedblocks(); that costs
+next to nothing, unlike tracing every allocation.
+
+The rules check `ctx.metrics is None` before measuring anything, so a game
+without Metrics pays one attribute test per command.
+"""
+import json
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+# Bucket b holds latencies in [2 ** (b - 1), 2 ** b) nanoseconds
+BUCKETS = 40
+
+clock = time.perf_counter_ns
+allocated_blocks = sys.getallocatedblocks
+
+
+class Histogram:
+    """Log2-bucketed latency histogram in nanoseconds"""
+
+    __slots__ = ("buckets", "count", "total", "max", "blocks")
+
+    def __init__(self):
+        self.buckets = [0] * BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.blocks = 0
+
+    def add(self, nanoseconds: int, blocks: int = 0):
+        self.buckets[min(nanoseconds.bit_length(), BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += nanoseconds
+        self.blocks += blocks
+        if nanoseconds > self.max:
+            self.max = nanoseconds
+
+    def percentile(self, fraction: float) -> int:
+        """Upper bound of the bucket holding the given fraction of samples"""
+        target = fraction * self.count
+        seen = 0
+        for bucket, hits in enumerate(self.buckets):
+            seen += hits
+            if hits and seen >= target:
+                return min(1 << bucket, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict:
+        return {"count": self.count, "mean_ns": self.total // self.count if self.count else 0,
+                "p50_ns": self.percentile(0.5), "p90_ns": self.percentile(0.9),
+                "p99_ns": self.percentile(0.99), "max_ns": self.max,
+                "blocks_per_call": self.blocks / self.count if self.count else 0,
+                "buckets": {str(1 << bucket): hits
+                            for bucket, hits in enumerate(self.buckets) if hits}}
+
+
+class Metrics:
+    """Latency histograms and gameplay counters for one game or a whole server"""
+
+    def __init__(self):
+        self.latency: Dict[str, Histogram] = {}
+        self.counters: Counter = Counter()
+        self.deaths: Counter = Counter()
+        self.started = time.time()
+
+    def timing(self, name: str) -> Histogram:
+        histogram = self.latency.get(name)
+        if histogram is None:
+            histogram = self.latency[name] = Histogram()
+        return histogram
+
+    def record(self, verb: Optional[str], nanoseconds: int, blocks: int):
+        """One dispatched command, named after the verb that dispatched it"""
+        self.timing(verb if verb is not None else "unknown").add(nanoseconds, blocks)
+
+    def count(self, counter: str, amount: int = 1):
+        self.counters[counter] += amount
+
+    def record_turn(self, events: List, room: str, outcome: Optional[str]):
+        """Gameplay counters from the events of one turn"""
+        for event in events:
+            if event[0] == "move":
+                self.counters["moves"] += 1
+            elif event[0] == "take":
+                self.counters["pickups"] += 1
+            elif event[0] == "defeat":
+                self.counters["enemies_defeated"] += 1
+            elif event[0] == "trap":
+                self.counters["trap_deaths"] += 1
+        if outcome is not None:
+            self.counters[outcome] += 1
+            if outcome == "defeat":
+                self.deaths[room] += 1
+
+    def to_dict(self) -> Dict:
+        return {"uptime_s": time.time() - self.started,
+                "latency": {name: histogram.to_dict()
+                            for name, histogram in sorted(self.latency.items())},
+                "counters": dict(self.counters), "deaths_by_room": dict(self.deaths)}
+
+    def dump(self, path: str):
+        """Write the machine-readable snapshot to a JSON file"""
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file, indent=1)
+            file.write("\n")
+
+    def summary(self) -> List[str]:
+        """Human-readable lines for the in-game stats command"""
+        lines = [f"{'command':<14}{'calls':>8}{'p50':>10}{'p99':>10}{'blocks':>8}"]
+        for name, histogram in sorted(self.latency.items()):
+            lines.append(f"{name:<14}{histogram.count:>8}{histogram.percentile(0.5) / 1000:>8.1f}us"
+                         f"{histogram.percentile(0.99) / 1000:>8.1f}us"
+                         f"{histogram.blocks / histogram.count:>8.1f}")
+        lines.append(", ".join(f"{name}: {count}" for name, count in sorted(self.counters.items()))
+                     or "No combats, moves or pickups yet.")
+        if self.deaths:
+            lines.append("Deaths: " + ", ".join(f"{room} {count}"
+                                                for room, count in self.deaths.most_common()))
+        return lines
@@ -0,0 +1,89 @@
+"""Pluggable output sinks for game messages.
+
+Rules call a sink as sink(template, *args). The template is a constant
+string and the arguments are only formatted into it when a sink actually
+keeps the text, so headless games that use NullSink never build messages.
+Buffered sinks collect a whole turn and write it in one piece on flush().
+"""
+import sys
+from typing import List
+
+
+class Sink:
+    """Collects formatted messages and hands them to write() once per flush"""
+
+    __slots__ = ("pending",)
+
+    def __init__(self):
+        self.pending: List[str] = []
+
+    def __call__(self, template: str, *args):
+        self.pending.append(template.format(*args) if args else template)
+
+    def flush(self):
+        if self.pending:
+            text = "\n".join(self.pending) + "\n"
+            self.pending.clear()
+            self.write(text)
+
+    def write(self, text: str):
+        raise NotImplementedError
+
+
+class NullSink(Sink):
+    """Drops every message without formatting it"""
+
+    __slots__ = ()
+
+    def __call__(self, template: str, *args):
+        pass
+
+    def flush(self):
+        pass
+
+
+class TerminalSink(Sink):
+    """Writes to the current sys.stdout, one write per turn unless unbuffered"""
+
+    __slots__ = ("buffered",)
+
+    def __init__(self, buffered: bool = True):
+        super().__init__()
+        self.buffered = buffered
+
+    def __call__(self, template: str, *args):
+        self.pending.append(template.format(*args) if args else template)
+        if not self.buffered:
+            self.flush()
+
+    def write(self, text: str):
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+
+class ListSink(Sink):
+    """Keeps every message in memory, one list entry per message"""
+
+    __slots__ = ()
+
+    @property
+    def messages(self) -> List[str]:
+        return self.pending
+
+    def flush(self):
+        pass
+
+
+class StreamSink(Sink):
+    """Writes each turn to a socket or file-like object in a single call"""
+
+    __slots__ = ("send", "encoding")
+
+    def __init__(self, target, encoding: str = None):
+        super().__init__()
+        self.send = target.sendall if hasattr(target, "sendall") else target.write
+        # Sockets always take bytes
+        self.encoding = encoding or ("utf-8" if hasattr(target, "sendall") else None)
+
+    def write(self, text: str):
+        self.send(text.encode(self.encoding) if self.encoding else text)
@@ -0,0 +1,227 @@
+"""Seeded, endless procedural dungeons that are only built where players go.
+
+Rooms sit on an unbounded grid. A room's exits, description, items and enemy
+are a pure function of the dungeon seed and its coordinates, so a room is
+generated the first time it is reached and can be thrown away and rebuilt
+later. Each session keeps a bounded LRU set of live rooms; when one is
+evicted after the player changed it, only that change (items, enemies) is
+written to an on-disk SQLite store and reapplied when the room is rebuilt.
+
+The room at (0, 0) is called "entrance"; every other room is named "x,y".
+"""
+import marshal
+import sqlite3
+from collections import OrderedDict
+from typing import Dict, Iterator, Optional, Tuple
+
+from items import room_items
+from project import Game
+
+MASK = (1 << 64) - 1
+ORIGIN = "entrance"
+STEPS = {"north": (0, 1), "south": (0, -1), "east": (1, 0), "west": (-1, 0)}
+# Every 8th column is an open north-south corridor and every room has a
+# westward door unless it sits on one, so all rooms are connected
+CORRIDOR = 8
+
+DESCRIPTIONS = (
+    "A low vaulted cell. Water drips somewhere in the dark.",
+    "A collapsed storeroom choked with splintered crates.",
+    "A narrow gallery lined with faded murals.",
+    "A round chamber whose floor is etched with a worn sigil.",
+    "A damp passage where roots push through the ceiling.",
+    "A shrine with a cracked altar and guttered candles.",
+)
+TREASURE_DESCRIPTION = "An artifact glows with an eerie light atop a stone pedestal!"
+ITEMS = ("torch", "dagger", "health potion", "gold coins", "scroll", "bone charm",
+         "rusty key", "glowing mushroom", "ancient skull", "mysterious vial")
+ENEMIES = ("giant rat", "skeletal warrior", "mad alchemist", "venomous vine",
+           "cursed librarian", "ghostly apparition")
+
+
+def mix(*values: int) -> int:
+    """Deterministic 64-bit hash of integers (splitmix64 finalizer)"""
+    state = 0x9E3779B97F4A7C15
+    for value in values:
+        state = (state ^ (value & MASK)) * 0xBF58476D1CE4E5B9 & MASK
+        state = (state ^ (state >> 27)) * 0x94D049BB133111EB & MASK
+        state ^= state >> 31
+    return state
+
+
+def parse_name(name: str) -> Tuple[int, int]:
+    if name == ORIGIN:
+        return 0, 0
+    try:
+        x, y = name.split(",")
+        return int(x), int(y)
+    except ValueError:
+        raise KeyError(name) from None
+
+
+def room_name(x: int, y: int) -> str:
+    return ORIGIN if x == y == 0 else f"{x},{y}"
+
+
+class ProceduralDungeon:
+    """The seeded recipe shared by every session exploring one dungeon"""
+
+    def __init__(self, seed: int, treasure_distance: int = 24, active_rooms: int = 256):
+        self.seed = seed
+        self.active_rooms = active_rooms
+        angle = mix(seed, 1) % (4 * treasure_distance)
+        side, offset = divmod(angle, treasure_distance)
+        corners = ((offset, treasure_distance - offset), (-offset, treasure_distance - offset),
+                   (offset, offset - treasure_distance), (-offset, offset - treasure_distance))
+        self.treasure = corners[side]
+        self.armory = (mix(seed, 2) % 9 - 4, mix(seed, 3) % 9 - 4)
+        if self.armory == (0, 0) or self.armory == self.treasure:
+            self.armory = (1, 0)
+
+    def chance(self, percent: int, *key: int) -> bool:
+        return mix(self.seed, *key) % 100 < percent
+
+    def door(self, x: int, y: int, direction: str) -> bool:
+        """Whether the exit from (x, y) in a direction is open, the same from both sides"""
+        dx, dy = STEPS[direction]
+        if dx < 0 or dy < 0:
+            x, y, dx, dy = x + dx, y + dy, -dx, -dy
+        if dx:
+            # Door between (x, y) and (x + 1, y)
+            return (x + 1) % CORRIDOR != 0 or self.chance(50, 0, x, y)
+        return x % CORRIDOR == 0 or self.chance(35, 1, x, y)
+
+    def generate(self, name: str) -> Dict:
+        """Build a room exactly as it was before any player touched it"""
+        x, y = parse_name(name)
+        exits = {direction: room_name(x + dx, y + dy)
+                 for direction, (dx, dy) in STEPS.items() if self.door(x, y, direction)}
+        if (x, y) == self.treasure:
+            return {"description": TREASURE_DESCRIPTION, "exits": exits,
+                    "items": ["lost artifact"], "enemy": None}
+
+        roll = mix(self.seed, 2, x, y)
+        items = [ITEMS[roll % len(ITEMS)]] if roll % 100 < 30 else []
+        if (x, y) == self.armory:
+            items.append("armor plates")
+        enemy = None
+        if (x, y) != (0, 0) and (roll >> 16) % 100 < 20:
+            enemy = ENEMIES[(roll >> 24) % len(ENEMIES)]
+        return {"description": DESCRIPTIONS[(roll >> 8) % len(DESCRIPTIONS)],
+                "exits": exits, "items": items, "enemy": enemy}
+
+    def new_session(self, store: str = "") -> "ProceduralWorld":
+        """Per-game room map; an empty store path means a private temporary file"""
+        return ProceduralWorld(self, store, self.active_rooms)
+
+
+class ProceduralWorld:
+    """Bounded cache of live rooms, backed by a store of changed rooms"""
+
+    def __init__(self, dungeon: ProceduralDungeon, store: str = "", active_rooms: int = 256):
+        if active_rooms < 2:
+            raise ValueError("at least the current and next room must stay live")
+        self.dungeon = dungeon
+        self.active_rooms = active_rooms
+        self.rooms: "OrderedDict[str, Dict]" = OrderedDict()
+        # State of each live room when it was loaded, to spot changes on eviction
+        self.loaded: Dict[str, Tuple] = {}
+        self.store = sqlite3.connect(store)
+        self.store.execute("CREATE TABLE IF NOT EXISTS rooms (name TEXT PRIMARY KEY, state BLOB)")
+
+    def __getitem__(self, name: str) -> Dict:
+        room = self.rooms.get(name)
+        if room is not None:
+            self.rooms.move_to_end(name)
+            return room
+
+        room = self.dungeon.generate(name)
+        row = self.store.execute("SELECT state FROM rooms WHERE name = ?", (name,)).fetchone()
+        if row is not None:
+            items, enemy, enemies = marshal.loads(row[0])
+            room["items"] = room_items(items)
+            room["enemy"] = enemy
+            if enemies is not None:
+                room["enemies"] = list(enemies)
+
+        self.rooms[name] = room
+        self.loaded[name] = self.state(room)
+        if len(self.rooms) > self.active_rooms:
+            self.evict()
+        return room
+
+    def __contains__(self, name: str) -> bool:
+        try:
+            parse_name(name)
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self) -> Iterator[str]:
+        """Live rooms only; the dungeon itself never ends"""
+        return iter(self.rooms)
+
+    def __len__(self) -> int:
+        return len(self.rooms)
+
+    @staticmethod
+    def state(room: Dict) -> Tuple:
+        enemies = room.get("enemies")
+        return tuple(room["items"]), room["enemy"], None if enemies is None else tuple(enemies)
+
+    def evict(self):
+        """Drop the least recently used room, saving it first if it changed"""
+        name, room = self.rooms.popitem(last=False)
+        state = self.state(room)
+        if state != self.loaded.pop(name):
+            self.store.execute("INSERT OR REPLACE INTO rooms VALUES (?, ?)",
+                               (name, marshal.dumps(state)))
+
+    def flush(self):
+        """Save every changed live room and commit the store"""
+        for name, room in self.rooms.items():
+            state = self.state(room)
+            if state != self.loaded[name]:
+                self.store.execute("INSERT OR REPLACE INTO rooms VALUES (?, ?)",
+                                   (name, marshal.dumps(state)))
+                self.loaded[name] = state
+        self.store.commit()
+
+    def close(self):
+        self.flush()
+        self.store.close()
+
+
+class RecentHistory(OrderedDict):
+    """movement_history that remembers only the most recently entered rooms.
+
+    The rules only ever read the entry for the room the player stands in,
+    so old entries can go once the player is far away.
+    """
+
+    def __init__(self, limit: int = 256):
+        super().__init__()
+        self.limit = limit
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.limit:
+            self.popitem(last=False)
+
+
+class ProceduralGame(Game):
+    """A game in an endless procedural dungeon with bounded memory"""
+
+    def __init__(self, dungeon_seed: int, echo=None, seed: Optional[int] = None,
+                 active_rooms: int = 256):
+        super().__init__(echo, ProceduralDungeon(dungeon_seed, active_rooms=active_rooms), seed)
+
+    def reset(self, seed: Optional[int] = None) -> Dict:
+        # The finished game's room store would otherwise stay open for good
+        previous = getattr(self, "world", None)
+        if previous is not None:
+            previous.close()
+        observation = super().reset(seed)
+        self.movement_history = RecentHistory(self.compiled.active_rooms)
+        return observation
@@ -1,181 +1,438 @@
+import argparse
+import functools
+import hashlib
+import json
+import os
 import random
 import sys
-from typing import Dict
-
-shown_full_help_once = False
-treasure_guardian_spawned = False
-
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from balance import DEFAULT_PARAMS, Params
+from eventlog import EventLog
+from fuzzy import FuzzyIndex, closest, normalize, resembles, room_index
+from items import DAMAGE_REDUCTION, Inventory, ItemContainer, room_items
+from leaderboard import Leaderboard
+from metrics import Metrics, allocated_blocks, clock
+from output import NullSink, Sink, TerminalSink
+from routes import route_index
+from shared import SharedRoom
+from world import DIRECTIONS, CompiledWorld, Player, Rules
+from worldfile import load_world, read_definition
+
+# The standard dungeon ships as data; see worldfile.py for the format
+STANDARD_DUNGEON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dungeons",
+                                "standard.json")
+TREASURE_GUARDIANS = ("poisonous serpent", "cursed guardian", "magical dart trap")
+DIRECTION_SYNONYMS = {"up": "north", "down": "south"}
+# Mistyped directions after `go` resolve against these
+DIRECTION_INDEX = FuzzyIndex(DIRECTIONS)
+# The giant rat must be defeated before this exit opens
+RAT_GATE = ("hallway", "north")
+# The standard dungeon's rules, also followed by layouts that bring none of their own
+STANDARD_RULES = Rules({RAT_GATE: ("The giant rat stands firm before the northern passage!",
+                                   "Its beady eyes gleam with malice - you must defeat it to pass!")},
+                       TREASURE_GUARDIANS, "armor plates")
+
+
+class Context:
+    """Per-game output channel, dice, balance, dungeon rules, optional metrics,
+    event log, leaderboard and real-time fight scheduling, one-shot event
+    flags, the count of blows taken and a guessed command awaiting a yes"""
+
+    __slots__ = ("echo", "rng", "params", "rules", "metrics", "log", "results", "engage",
+                 "guardians_spawned", "shown_full_help", "treasure_shown", "quit", "hits",
+                 "suggestion")
+
+    def __init__(self, echo: Optional[Callable[..., None]] = None, rng=random,
+                 metrics: Optional[Metrics] = None, params: Params = DEFAULT_PARAMS,
+                 log: Optional[EventLog] = None, rules: Rules = STANDARD_RULES):
+        # Calls outside a Game have nobody to flush for them, so print straight away
+        self.echo = echo if echo is not None else TerminalSink(buffered=False)
+        self.rng = rng
+        self.params = params
+        self.rules = rules
+        self.metrics = metrics
+        self.log = log
+        self.results: Optional[Leaderboard] = None
+        # Starts a scheduled fight instead of settling it at once; see scheduler.py
+        self.engage: Optional[Callable] = None
+        self.guardians_spawned = False
+        self.shown_full_help = False
+        self.treasure_shown = False
+        self.quit = False
+        self.hits = 0
+        # What a mistyped move or take was taken to mean, run if the player says yes
+        self.suggestion: Optional[str] = None
+
+
+DEFAULT_CONTEXT = Context()
+
+
+# Output sink for headless play that drops every message unformatted
+discard = NullSink()
+
+
+class Game:
+    """A single playthrough driven one command at a time"""
+
+    def __init__(self, echo: Optional[Sink] = None, world: Optional[CompiledWorld] = None,
+                 seed: Optional[int] = None, metrics: Optional[Metrics] = None,
+                 params: Params = DEFAULT_PARAMS, log: Optional[EventLog] = None,
+                 scheduler=None, results: Optional[Leaderboard] = None):
+        """`world` is any layout with a new_session() method, by default the standard dungeon.
+
+        With a CombatScheduler, `attack` starts a real-time fight that the
+        scheduler's ticks play out instead of settling it within the command.
+        A Leaderboard in `results` is told about the game once it ends.
+        """
+        self.echo = echo if echo is not None else TerminalSink()
+        self.compiled = world or compiled_world()
+        self.metrics = metrics
+        self.params = params
+        self.log = log
+        self.scheduler = scheduler
+        self.results = results
+        # The player's name on the leaderboard, when the server knows it
+        self.name: Optional[str] = None
+        # Private dice so games never disturb each other's rolls
+        self.rng = random.Random(seed)
+        self.reset()
+
+    @property
+    def done(self) -> bool:
+        return self.outcome is not None
+
+    def new_context(self) -> Context:
+        """Fresh event flags wired to this game's sink, dice, balance and hooks"""
+        ctx = Context(self.echo, self.rng, self.metrics, self.params, self.log,
+                      getattr(self.compiled, "rules", None) or STANDARD_RULES)
+        if self.scheduler is not None:
+            ctx.engage = functools.partial(self.scheduler.engage, on_end=self.settle)
+        ctx.results = self.results
+        return ctx
+
+    def reset(self, seed: Optional[int] = None) -> Dict:
+        """Start a fresh game, optionally reseeding, and return the first observation"""
+        if seed is not None:
+            self.rng.seed(seed)
+        self.ctx = self.new_context()
+        self.player = Player(**initialize_player(self.rng, self.params))
+        self.world = self.compiled.new_session()
+        # Track movement history {room: direction_came_from}
+        self.movement_history = {}
+        self.turns = 0
+        self.outcome = None
+        if self.log is not None:
+            self.session = self.log.start(self.player["location"], self.player["health"],
+                                          self.player["attack"])
+
+        events = []
+        self._enter_room(events)
+        if self.outcome is not None and self.results is not None:
+            self.results.record(self)
+        self.echo.flush()
+        return self.observe(events)
+
+    def step(self, command: str) -> Dict:
+        """Apply one command and return the resulting observation"""
+        if self.done:
+            return self.observe([])
+        if self.metrics is not None:
+            start = clock()
+
+        player = self.player
+        location = player["location"]
+        health = player["health"]
+        held = len(player["inventory"])
+        enemy = self.world[location]["enemy"]
+        if self.log is not None:
+            self.log.begin(self.session, self.turns + 1, location)
+
+        process_command(command, player, self.world, self.movement_history, self.ctx)
+        self.turns += 1
+
+        events = []
+        if player["health"] < health:
+            events.append(("damage", health - player["health"]))
+        for item in player["inventory"][held:]:
+            events.append(("take", item))
+        if enemy and self.world[location]["enemy"] != enemy:
+            events.append(("defeat", enemy))
+            if self.world[location]["enemy"]:
+                events.append(("spawn", self.world[location]["enemy"]))
+        if player["location"] != location:
+            events.append(("move", location, player["location"]))
+
+        if self.ctx.quit:
+            self.outcome = "quit"
+        elif check_defeat(player, self.ctx):
+            self.outcome = "defeat"
+        else:
+            self._enter_room(events)
+        if self.outcome is not None and self.results is not None:
+            self.results.record(self)
+        self.echo.flush()
+        if self.metrics is not None:
+            self.metrics.timing("turn").add(clock() - start)
+            self.metrics.record_turn(events, player["location"], self.outcome)
+        if self.log is not None:
+            self.log.record_turn(events, location, enemy, self.outcome, player["location"])
+        return self.observe(events)
+
+    def settle(self, fight):
+        """End the game if a scheduled fight killed the player"""
+        if self.outcome is None and self.player["health"] <= 0 and check_defeat(self.player,
+                                                                                self.ctx):
+            self.outcome = "defeat"
+            if self.results is not None:
+                self.results.record(self)
+
+    def _enter_room(self, events: List):
+        """Run the room events that fire before the player's next command"""
+        room = self.world[self.player["location"]]
+        if self.metrics is None:
+            describe_room(room, self.ctx)
+        else:
+            start = clock()
+            describe_room(room, self.ctx)
+            self.metrics.timing("describe_room").add(clock() - start)
+
+        enemy = room["enemy"]
+        enter_treasure_room(self.player, room, self.ctx)
+        if self.player["health"] <= 0:
+            events.append(("trap",))
+            self.outcome = "defeat"
+        elif room["enemy"] != enemy:
+            events.append(("spawn", room["enemy"]))
+        elif check_victory(self.player, room, self.ctx):
+            events.append(("victory",))
+            self.outcome = "victory"
+
+    def observe(self, events: List) -> Dict:
+        """Structured snapshot of what the player can see"""
+        room = self.world[self.player["location"]]
+        return {
+            "room": self.player["location"],
+            "items": list(room["items"]),
+            "enemy": room["enemy"],
+            "health": self.player["health"],
+            "inventory": list(self.player["inventory"]),
+            "events": events,
+            "turns": self.turns,
+            "done": self.done,
+            "outcome": self.outcome
+        }
 
-def main():
-    """Main game function"""
-    global treasure_guardian_spawned
 
-    print_intro()
-    player = initialize_player()
-    game_world = initialize_world()
+def derive_seed(seed: int, index: int) -> int:
+    """Independent, reproducible seed for the index-th game of a seeded run"""
+    digest = hashlib.blake2b(f"{seed}:{index}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class GameBatch:
+    """N independent headless games advanced together"""
+
+    def __init__(self, size: int, echo: Sink = discard,
+                 world: Optional[CompiledWorld] = None, seed: Optional[int] = None):
+        self.games = [Game(echo, world, None if seed is None else derive_seed(seed, index))
+                      for index in range(size)]
+
+    def __len__(self) -> int:
+        return len(self.games)
+
+    def reset(self, seed: Optional[int] = None) -> List[Dict]:
+        """Restart every game in the batch, optionally reseeding each from `seed`"""
+        if seed is None:
+            return [game.reset() for game in self.games]
+        return [game.reset(derive_seed(seed, index)) for index, game in enumerate(self.games)]
+
+    def step(self, commands: List[Optional[str]]) -> List[Dict]:
+        """Advance each game by its command; None leaves a game untouched"""
+        if len(commands) != len(self.games):
+            raise ValueError(f"Expected {len(self.games)} commands, got {len(commands)}")
+        return [game.observe([]) if command is None else game.step(command)
+                for game, command in zip(self.games, commands)]
+
+
+def read_scripts(lines: Iterable[str]) -> Iterator[List[str]]:
+    """Split a command stream into scripts at blank lines, skipping # comments"""
+    script = []
+    for line in lines:
+        command = line.strip().lower()
+        if command:
+            if not command.startswith("#"):
+                script.append(command)
+        elif script:
+            yield script
+            script = []
+    if script:
+        yield script
+
+
+def run_scripts(scripts: Iterable[List[str]], world: Optional[CompiledWorld] = None,
+                seed: int = 0, echo: Sink = discard) -> Iterator[Dict]:
+    """Play each script in one reused game, reseeded per script, and yield its result.
+
+    A script stops at the end of its game; commands left over are ignored.
+    """
+    game = Game(echo, world)
+    for index, script in enumerate(scripts):
+        game.reset(derive_seed(seed, index))
+        for command in script:
+            if game.done:
+                break
+            game.step(command)
+        yield {"script": index, "outcome": game.outcome or "unfinished", "turns": game.turns,
+               "health": game.player["health"], "inventory": list(game.player["inventory"])}
 
-    # Track movement history {room: direction_came_from}
-    movement_history = {}
 
-    while True:
-        current_room = game_world[player["location"]]
-        describe_room(current_room)
-
-        # Handle treasure room events
-        if current_room["description"].startswith("An artifact glows"):
-            if "armor plates" not in player["inventory"]:
-                print("\nAs you step toward the artifact, deadly darts shoot from the walls!")
-                print("You're pierced by dozens of poisoned projectiles!")
-                player["health"] = 0
-                print("\nYour vision fades as you collapse to the ground...")
-                print("GAME OVER")
-                print("\nTIP: Try finding armor plates before entering the treasure room!")
-                break
-            elif not treasure_guardian_spawned and current_room["enemy"] is None:
-                # Spawn all guardians when first entering with armor
-                current_room["enemies"] = ["poisonous serpent",
-                                           "cursed guardian", "magical dart trap"]
-                current_room["enemy"] = current_room["enemies"].pop(0)
-                treasure_guardian_spawned = True
-                print(
-                    f"\nA {current_room['enemy']} emerges from the shadows to protect the artifact!")
-
-        if check_victory(player, current_room):
-            break
+def play_batch(paths: List[str], world: Optional[CompiledWorld] = None, seed: int = 0,
+               out=None):
+    """Run the scripts in every file ("-" for stdin), one JSON line per script"""
+    out = out or sys.stdout
 
-        command = get_player_input()
-        process_command(command, player, game_world, movement_history)
+    def scripts():
+        for path in paths:
+            if path == "-":
+                yield from read_scripts(sys.stdin)
+            else:
+                with open(path) as file:
+                    yield from read_scripts(file)
 
-        if check_defeat(player):
-            break
+    for result in run_scripts(scripts(), world, seed):
+        out.write(json.dumps(result, separators=(",", ":")) + "\n")
 
 
-def print_intro():
-    """Print game introduction"""
-    print("""
+def main():
+    """Main game function"""
+    parser = argparse.ArgumentParser(description="Dungeon of the Lost Artifact")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="instrument the game and write the metrics as JSON on exit")
+    parser.add_argument("--events", metavar="PATH", help="append every turn to an event log")
+    parser.add_argument("--world", metavar="PATH", help="play a dungeon definition file")
+    parser.add_argument("--batch", nargs="*", metavar="PATH",
+                        help="play blank-line separated command scripts from files or stdin "
+                             "and print one result line per script")
+    parser.add_argument("--seed", type=int, default=0, help="base seed of a --batch run")
+    parser.add_argument("--leaderboard", metavar="PATH",
+                        help="rank finished games in a leaderboard kept in this file")
+    args = parser.parse_args()
+
+    world = load_world(args.world) if args.world else None
+    if args.batch is not None:
+        play_batch(args.batch or ["-"], world, args.seed)
+        return
+    print_intro()
+    metrics = Metrics() if args.metrics else None
+    log = EventLog(args.events) if args.events else None
+    results = Leaderboard.load(args.leaderboard) if args.leaderboard else None
+    game = Game(world=world, metrics=metrics, log=log, results=results)
+
+    try:
+        while not game.done:
+            game.step(get_player_input())
+    finally:
+        if metrics is not None:
+            metrics.dump(args.metrics)
+        if log is not None:
+            log.close()
+        if results is not None:
+            results.compact()
+
+
+INTRO = """
     DUNGEON OF THE LOST ARTIFACT
     ----------------------------
     Legend speaks of a powerful artifact hidden deep within these ruins.
     Many have entered seeking its power - none have returned.
 
     Can you survive the dungeon's dangers and claim the artifact?
-    """)
+    """
 
 
-def initialize_player() -> Dict:
+def print_intro():
+    """Print game introduction"""
+    print(INTRO)
+
+
+def initialize_player(rng=random, params: Params = DEFAULT_PARAMS) -> Dict:
     """Create player dictionary with initial stats"""
     return {
         "location": "entrance",
-        "inventory": [],
-        "health": 100,
-        "attack": random.randint(5, 15)
+        "inventory": Inventory(),
+        "health": params.health,
+        "attack": rng.randint(*params.attack)
     }
 
 
 def initialize_world() -> Dict:
-    """Create game world with rooms and connections"""
-    return {
-        "entrance": {
-            "description": "You stand in the crumbling entrance hall. Dusty tapestries line the walls.",
-            "exits": {"north": "hallway", "east": "armory"},
-            "items": ["torch"],
-            "enemy": None
-        },
-        "hallway": {
-            "description": "A long hallway stretches before you. Strange markings cover the walls.",
-            "exits": {"south": "entrance", "west": "library", "east": "chamber", "north": "treasure_room"},
-            "items": [],
-            "enemy": "giant rat"
-        },
-        "chamber": {
-            "description": "A dark chamber filled with ancient relics. The air smells of decay.",
-            "exits": {"west": "hallway", "north": "armory_back", "east": "alchemy_lab"},
-            "items": ["rusty key"],
-            "enemy": None
-        },
-        "armory": {
-            "description": "An old armory with broken weapons racks.",
-            "exits": {"west": "entrance", "north": "guard_room"},
-            "items": ["dagger"],
-            "enemy": None
-        },
-        "guard_room": {
-            "description": "A room with rusted weapons and armor stands. A skeleton sits in the corner.",
-            "exits": {"south": "armory", "east": "secret_passage"},
-            "items": [],
-            "enemy": "skeletal warrior"
-        },
-        "secret_passage": {
-            "description": "A narrow, dark passageway with cobwebs covering the walls.",
-            "exits": {"west": "guard_room", "east": "hidden_vault"},
-            "items": ["health potion"],
-            "enemy": None
-        },
-        "hidden_vault": {
-            "description": "A small vault with an ancient chest in the center.",
-            "exits": {"west": "secret_passage"},
-            "items": ["gold coins"],
-            "enemy": None
-        },
-        "armory_back": {
-            "description": "The armory's back storage room. The air is thick with dust.",
-            "exits": {"south": "chamber"},
-            "items": ["armor plates"],
-            "enemy": None
-        },
-        "alchemy_lab": {
-            "description": "A room filled with bubbling potions and strange instruments.",
-            "exits": {"west": "chamber", "north": "garden"},
-            "items": ["mysterious vial"],
-            "enemy": "mad alchemist"
-        },
-        "garden": {
-            "description": "An underground garden with glowing mushrooms and strange plants.",
-            "exits": {"south": "alchemy_lab"},
-            "items": ["glowing mushroom"],
-            "enemy": "venomous vine"
-        },
-        "library": {
-            "description": "A ruined library with moldy books scattered everywhere.",
-            "exits": {"east": "hallway", "down": "catacombs"},
-            "items": ["scroll"],
-            "enemy": "cursed librarian"
-        },
-        "catacombs": {
-            "description": "Dark, damp catacombs with bones lining the walls.",
-            "exits": {"up": "library", "north": "ossuary"},
-            "items": ["bone charm"],
-            "enemy": "ghostly apparition"
-        },
-        "ossuary": {
-            "description": "A chamber filled with neatly stacked bones and skulls.",
-            "exits": {"south": "catacombs"},
-            "items": ["ancient skull"],
-            "enemy": None
-        },
-        "treasure_room": {
-            "description": "An artifact glows with an eerie light atop a stone pedestal!",
-            "exits": {"south": "hallway"},
-            "items": ["lost artifact"],
-            "enemy": None
-        }
-    }
+    """Create game world with rooms and connections, fresh from the standard dungeon file"""
+    return read_definition(STANDARD_DUNGEON)["rooms"]
+
+
+def enter_treasure_room(player: Dict, room: Dict, ctx: Context = DEFAULT_CONTEXT):
+    """Spring the dart trap or spawn the guardians when standing in the treasure room"""
+    if not is_treasure_room(room):
+        return
+
+    rules = ctx.rules
+    if rules.trap_protection is not None and rules.trap_protection not in player["inventory"]:
+        ctx.echo("\nAs you step toward the artifact, deadly darts shoot from the walls!")
+        if ctx.params.trap_damage is not None:
+            player["health"] -= ctx.params.trap_damage
+            ctx.hits += 1
+            ctx.echo("Poisoned projectiles graze you! ({} damage)", ctx.params.trap_damage)
+            if player["health"] > 0:
+                return
+        else:
+            ctx.echo("You're pierced by dozens of poisoned projectiles!")
+            player["health"] = 0
+            ctx.hits += 1
+        ctx.echo("\nYour vision fades as you collapse to the ground...")
+        ctx.echo("GAME OVER")
+        ctx.echo("\nTIP: Try finding {} before entering the treasure room!", rules.trap_protection)
+    elif not ctx.guardians_spawned and room["enemy"] is None and rules.guardians:
+        # Spawn all guardians when first entering with armor
+        ctx.guardians_spawned = True
+        if isinstance(room, SharedRoom):
+            # In a shared dungeon they rise only once, for whoever arrives first
+            if not room.spawn(rules.guardians):
+                return
+        else:
+            room["enemies"] = list(rules.guardians)
+            room["enemy"] = room["enemies"].pop(0)
+        ctx.echo("\nA {} emerges from the shadows to protect the artifact!", room["enemy"])
 
 
-def describe_room(room: Dict):
+def is_treasure_room(room: Dict) -> bool:
+    """Check whether a room holds the artifact pedestal"""
+    treasure = room.get("treasure")
+    if treasure is not None:
+        return treasure
+    # Layouts built in code mark it only by its description
+    return room["description"].startswith("An artifact glows")
+
+
+@functools.lru_cache(maxsize=None)
+def compiled_world() -> CompiledWorld:
+    """Shared read-only copy of the standard dungeon, mapped from its binary cache"""
+    return load_world(STANDARD_DUNGEON)
+
+
+def describe_room(room: Dict, ctx: Context = DEFAULT_CONTEXT):
     """Print room description and contents"""
-    if (not room["description"].startswith("An artifact glows") or
-            not getattr(describe_room, 'treasure_shown', False)):
-        print("\n" + room["description"])
+    if not is_treasure_room(room) or not ctx.treasure_shown:
+        ctx.echo("\n{}", room["description"])
 
-        if room["description"].startswith("An artifact glows"):
-            describe_room.treasure_shown = True
+        if is_treasure_room(room):
+            ctx.treasure_shown = True
 
     if room["items"]:
-        print("You see:", ", ".join(room["items"]))
+        ctx.echo("You see: {}", ", ".join(room["items"]))
 
     if room["enemy"]:
-        print(f"\nA {room['enemy']} blocks your path!")
+        ctx.echo("\nA {} blocks your path!", room["enemy"])
 
 
 def get_player_input() -> str:
@@ -183,79 +440,246 @@ def get_player_input() -> str:
     return input("\nWhat will you do? ").strip().lower()
 
 
-def display_tip():
-    """Display a short tip or full help on first invalid input"""
-    global shown_full_help_once
-    print("\nI don't understand that command.")
-    print("TIP: You can always check available commands by typing 'help' or '/h'.")
-
-    if not shown_full_help_once:
-        print("""
+HELP_TEXT = """
 Available commands:
     - go [direction] or just [direction]: Move in a direction (north, south, east, west, up, down).
+    - travel [room]: Walk the shortest route to a room, braving every enemy on the way.
     - take [item]: Pick up an item in the current room.
     - attack or attack [enemy]: Attack the enemy in the room.
     - inventory, inv, i: Show your current inventory.
     - health, h, status: Show your current health.
     - run: Attempt to flee or act silly.
+    - hint: Ask the dungeon for the wisest next move.
+    - stats: Show the chronicle of commands, battles and deaths, if one is kept.
+    - leaderboard, scores: Show the fastest, healthiest and least wounded victors.
     - help, help?, /h: Show this help menu.
     - quit or /q: Exit the game.
-        """)
-        shown_full_help_once = True
+        """
+
+# Dispatch table: "verb" for bare commands, "verb " for commands with an argument
+COMMANDS: Dict[str, Callable] = {}
+# Registered verbs a mistyped one may resolve to
+VERB_INDEX = FuzzyIndex()
+# Verbs that ask before running on a guess, since a wrong one can cost health or time
+CONFIRMED_VERBS = set()
+# Replies to a suggested command
+AGREEMENT = ("yes", "y")
+REFUSAL = ("no", "n")
+ARTICLES = ("the", "a", "an")
+
+
+def register_command(*verbs: str, argument: str = "none", typos: str = "forgive"):
+    """Add a handler to the dispatch table under each verb.
+
+    `argument` is "none", "optional" or "required". `typos` says what a
+    mistyped verb does: "forgive" runs the closest verb and says which,
+    "confirm" asks first and "exact" never guesses. Handlers are called as
+    handler(verb, argument, player, world, movement_history, ctx).
+    """
+    if argument not in ("none", "optional", "required"):
+        raise ValueError(f"Unknown argument mode: {argument}")
+    if typos not in ("forgive", "confirm", "exact"):
+        raise ValueError(f"Unknown typo mode: {typos}")
+
+    def decorator(handler: Callable) -> Callable:
+        for verb in verbs:
+            if typos != "exact" and verb not in VERB_INDEX.order:
+                VERB_INDEX.add(verb)
+            if typos == "confirm":
+                CONFIRMED_VERBS.add(verb)
+            if argument != "required":
+                COMMANDS[verb] = handler
+            if argument != "none":
+                COMMANDS[verb + " "] = handler
+        return handler
+    return decorator
+
+
+def unregister_command(*verbs: str):
+    """Take verbs back out of the dispatch table and the verb index"""
+    for verb in verbs:
+        COMMANDS.pop(verb, None)
+        COMMANDS.pop(verb + " ", None)
+        if verb in VERB_INDEX.order:
+            VERB_INDEX.remove(verb)
+        CONFIRMED_VERBS.discard(verb)
+
+
+def suggest(command: str, ctx: Context = DEFAULT_CONTEXT):
+    """Offer a guessed command, to be run if the next input agrees"""
+    ctx.suggestion = command
+    ctx.echo("Did you mean '{}'? (yes/no)", command)
+
+
+def display_tip(ctx: Context = DEFAULT_CONTEXT):
+    """Display a short tip or full help on first invalid input"""
+    ctx.echo("\nI don't understand that command.")
+    ctx.echo("TIP: You can always check available commands by typing 'help' or '/h'.")
+
+    if not ctx.shown_full_help:
+        ctx.echo(HELP_TEXT)
+        ctx.shown_full_help = True
 
 
-def process_command(command: str, player: Dict, world: Dict, movement_history: Dict):
+def process_command(command: str, player: Dict, world: Dict, movement_history: Dict,
+                    ctx: Context = DEFAULT_CONTEXT):
     """Process player commands and update game state"""
-    current_room = world[player["location"]]
+    suggestion, ctx.suggestion = ctx.suggestion, None
+    if suggestion is not None and command in AGREEMENT:
+        command = suggestion
+    elif suggestion is not None and command in REFUSAL:
+        ctx.echo("Then say what you mean.")
+        return
+    verb, space, argument = command.partition(" ")
+    handler = COMMANDS.get(verb + space)
+    if handler is None:
+        # A typo such as "attakc" or "tkae torch" still reaches the closest verb
+        corrected = VERB_INDEX.match(verb)
+        if corrected is not None and corrected + space in COMMANDS:
+            if corrected in CONFIRMED_VERBS:
+                suggest(corrected + space + argument, ctx)
+                return
+            verb = corrected
+            handler = COMMANDS[verb + space]
+            ctx.echo("({})", verb + space + argument)
+    metrics = ctx.metrics
+    if metrics is not None:
+        # Count blocks inside the timer; the one extra is the int holding the count
+        start = clock()
+        blocks = allocated_blocks()
+    if handler is None:
+        display_tip(ctx)
+    else:
+        handler(verb, argument, player, world, movement_history, ctx)
+    if metrics is not None:
+        blocks = allocated_blocks() - blocks - 1
+        metrics.record(verb if handler is not None else None, clock() - start, blocks)
+
+
+@register_command("north", "south", "east", "west", "up", "down", typos="confirm")
+def do_step(direction, argument, player, world, movement_history, ctx):
+    handle_movement(direction, player, world, movement_history, ctx)
+
+
+@register_command("go", argument="required", typos="confirm")
+def do_go(verb, direction, player, world, movement_history, ctx):
+    if direction not in DIRECTIONS:
+        guess = DIRECTION_INDEX.match(direction)
+        if guess is not None:
+            suggest(f"go {guess}", ctx)
+            return
+    handle_movement(direction, player, world, movement_history, ctx)
+
+
+@register_command("travel", argument="required", typos="confirm")
+def do_travel(verb, destination, player, world, movement_history, ctx):
+    travel(destination, player, world, movement_history, ctx)
 
-    if command in ["north", "south", "east", "west", "up", "down"]:
-        handle_movement(command, player, world, movement_history)
-    elif command.startswith("go "):
-        direction = command[3:]
-        handle_movement(direction, player, world, movement_history)
-    elif command.startswith("take "):
-        item = command[5:]
-        take_item(item, player, current_room)
-    elif command in ["inventory", "inv", "i"]:
-        show_inventory(player)
-    elif command in ["health", "h", "status"]:
-        show_health(player)
-    elif command == "attack" or command.startswith("attack "):
-        if current_room["enemy"]:
-            combat(player, current_room)
+
+@register_command("take", argument="required", typos="confirm")
+def do_take(verb, item, player, world, movement_history, ctx):
+    take_item(item, player, world[player["location"]], ctx)
+
+
+@register_command("inventory", "inv", "i")
+def do_inventory(verb, argument, player, world, movement_history, ctx):
+    show_inventory(player, ctx)
+
+
+@register_command("health", "h", "status")
+def do_health(verb, argument, player, world, movement_history, ctx):
+    show_health(player, ctx)
+
+
+@register_command("attack", argument="optional")
+def do_attack(verb, target, player, world, movement_history, ctx):
+    current_room = world[player["location"]]
+    other = current_room["enemy"] and target and named_enemy(target, current_room["enemy"],
+                                                             world, ctx)
+    if other:
+        ctx.echo("The {} is not here; the {} stands before you.", other, current_room["enemy"])
+    elif current_room["enemy"]:
+        if ctx.metrics is not None:
+            ctx.metrics.count("combats")
+        if ctx.engage is not None:
+            ctx.engage(player, current_room, ctx)
         else:
-            print("You swing at the air, hitting nothing but your own pride.")
-    elif command == "run":
-        print("Your instincts scream at you to flee, but courage must prevail!")
-    elif command in ["help", "help?", "/h"]:
-        print("""
-Available commands:
-    - go [direction] or just [direction]: Move in a direction (north, south, east, west, up, down).
-    - take [item]: Pick up an item in the current room.
-    - attack or attack [enemy]: Attack the enemy in the room.
-    - inventory, inv, i: Show your current inventory.
-    - health, h, status: Show your current health.
-    - run: Attempt to flee or act silly.
-    - help, help?, /h: Show this help menu.
-    - quit or /q: Exit the game.
-        """)
-    elif command in ["quit", "/q"]:
-        print("The dungeon's shadows seem to grow longer as you turn away...")
-        sys.exit()
+            combat(player, current_room, ctx)
     else:
-        display_tip()
+        ctx.echo("You swing at the air, hitting nothing but your own pride.")
+
+
+def named_enemy(target: str, enemy: str, world: Dict, ctx: Context = DEFAULT_CONTEXT
+                ) -> Optional[str]:
+    """The dungeon's other enemy that `target` names, if it clearly names one.
+
+    "the rat", "it" or "monster" name nobody else, so the attack goes ahead.
+    """
+    words = target.split()
+    if words and words[0] in ARTICLES:
+        target = " ".join(words[1:])
+    if not target or resembles(target, enemy):
+        return None
+    compiled = getattr(world, "compiled", None)
+    if compiled is not None:
+        enemies = compiled.enemies
+    else:
+        enemies = [room["enemy"] for room in world.values()]
+    others = sorted(({name for name in enemies if name} | set(ctx.rules.guardians)) - {enemy})
+    return closest(target, others)
+
+
+@register_command("run")
+def do_run(verb, argument, player, world, movement_history, ctx):
+    ctx.echo("Your instincts scream at you to flee, but courage must prevail!")
 
 
-def handle_movement(direction: str, player: Dict, world: Dict, movement_history: Dict):
+@register_command("hint", typos="confirm")
+def do_hint(verb, argument, player, world, movement_history, ctx):
+    show_hint(player, world, ctx)
+
+
+@register_command("stats")
+def do_stats(verb, argument, player, world, movement_history, ctx):
+    if ctx.metrics is None:
+        ctx.echo("No chronicler keeps count of your deeds in this dungeon.")
+        return
+    for line in ctx.metrics.summary():
+        ctx.echo(line)
+
+
+@register_command("leaderboard", "scores")
+def do_leaderboard(verb, argument, player, world, movement_history, ctx):
+    if ctx.results is None:
+        ctx.echo("No herald records the deeds of adventurers in this dungeon.")
+        return
+    for line in ctx.results.summary():
+        ctx.echo("{}", line)
+
+
+@register_command("help", "help?", "/h")
+def do_help(verb, argument, player, world, movement_history, ctx):
+    ctx.echo(HELP_TEXT)
+
+
+@register_command("quit", "/q", typos="exact")
+def do_quit(verb, argument, player, world, movement_history, ctx):
+    ctx.echo("The dungeon's shadows seem to grow longer as you turn away...")
+    ctx.quit = True
+
+
+def handle_movement(direction: str, player: Dict, world: Dict, movement_history: Dict,
+                    ctx: Context = DEFAULT_CONTEXT):
     """Handle movement with enemy attack consequences"""
     current_room = world[player["location"]]
     came_from = movement_history.get(player["location"])
 
-    # Special case - must defeat rat to go north from hallway
-    if (player["location"] == "hallway" and direction == "north" and
-            current_room["enemy"] is not None):
-        print("\nThe giant rat stands firm before the northern passage!")
-        print("Its beady eyes gleam with malice - you must defeat it to pass!")
+    # Special case - some exits stay shut until the room's enemy is defeated
+    gate = ctx.rules.gates.get((player["location"], direction))
+    if gate is not None and current_room["enemy"] is not None:
+        ctx.echo("\n{}", gate[0])
+        for line in gate[1:]:
+            ctx.echo("{}", line)
         return
 
     # Check if trying to retreat the way they came
@@ -263,20 +687,21 @@ def handle_movement(direction: str, player: Dict, world: Dict, movement_history:
 
     if current_room["enemy"]:
         # Calculate damage (reduced if player has armor)
-        damage = random.randint(8, 18)
-        if "armor plates" in player["inventory"]:
-            damage = max(3, damage // 2)
+        damage = ctx.rng.randint(*ctx.params.move_strike)
+        if armored(player):
+            damage = max(ctx.params.move_armor_floor, damage // 2)
 
         player["health"] -= damage
+        ctx.hits += 1
 
         if is_retreat:
-            print(f"\nAs you turn to flee, the {current_room['enemy']} strikes!")
-            print(f"Claws and fangs rake your back! ({damage} damage)")
-            print("Cowardice has its price - next time stand your ground!")
+            ctx.echo("\nAs you turn to flee, the {} strikes!", current_room["enemy"])
+            ctx.echo("Claws and fangs rake your back! ({} damage)", damage)
+            ctx.echo("Cowardice has its price - next time stand your ground!")
         else:
-            print(f"\nThe {current_room['enemy']} lashes out as you attempt to pass!")
-            print(f"You suffer {damage} damage from the vicious attack!")
-            print("TIP: Check your health with 'health' or 'h' if you feel weak.")
+            ctx.echo("\nThe {} lashes out as you attempt to pass!", current_room["enemy"])
+            ctx.echo("You suffer {} damage from the vicious attack!", damage)
+            ctx.echo("TIP: Check your health with 'health' or 'h' if you feel weak.")
 
         if player["health"] <= 0:
             return
@@ -286,7 +711,41 @@ def handle_movement(direction: str, player: Dict, world: Dict, movement_history:
         next_room = current_room["exits"][direction]
         movement_history[next_room] = opposite_direction(direction)
 
-    move_player(direction, player, world)
+    move_player(direction, player, world, ctx)
+
+
+def travel(destination: str, player: Dict, world: Dict, movement_history: Dict,
+           ctx: Context = DEFAULT_CONTEXT):
+    """Walk the shortest route to a room one move at a time"""
+    compiled = getattr(world, "compiled", None)
+    if compiled is None and isinstance(world, dict):
+        compiled = CompiledWorld(world)
+    if compiled is None:
+        ctx.echo("These shifting halls cannot be mapped.")
+        return
+
+    target = destination.replace(" ", "_")
+    if target not in compiled.ids:
+        target = room_index(compiled).match(destination)
+        if target is None:
+            ctx.echo("You know of no place called the {}.", destination)
+        else:
+            suggest(f"travel {normalize(target)}", ctx)
+        return
+
+    route = route_index(compiled).route(player["location"], target)
+    if route is None:
+        ctx.echo("No passage you know of leads to the {}.", destination)
+    elif not route:
+        ctx.echo("You are already in the {}.", destination)
+
+    for direction in route or ():
+        location = player["location"]
+        handle_movement(direction, player, world, movement_history, ctx)
+        # Stop when hurt too badly, blocked, or where the room's own events must run
+        if (player["health"] <= 0 or player["location"] == location or
+                is_treasure_room(world[player["location"]])):
+            break
 
 
 def opposite_direction(direction: str) -> str:
@@ -302,137 +761,183 @@ def opposite_direction(direction: str) -> str:
     return opposites.get(direction, direction)
 
 
-def move_player(direction: str, player: Dict, world: Dict):
+def move_player(direction: str, player: Dict, world: Dict, ctx: Context = DEFAULT_CONTEXT):
     """Move player to new location if possible"""
     current_room = world[player["location"]]
 
     # Handle direction synonyms
-    if direction == "up":
-        direction = "north"
-    elif direction == "down":
-        direction = "south"
+    direction = DIRECTION_SYNONYMS.get(direction, direction)
 
     if direction in current_room["exits"]:
         player["location"] = world[player["location"]]["exits"][direction]
-        print(f"You move {direction}.")
+        ctx.echo("You move {}.", direction)
     else:
         available_directions = list(current_room["exits"].keys())
         if len(available_directions) == 0:
-            print("The walls offer no escape from this chamber!")
+            ctx.echo("The walls offer no escape from this chamber!")
         elif len(available_directions) == 1:
-            print(f"The way is blocked! Only {available_directions[0]} remains open.")
+            ctx.echo("The way is blocked! Only {} remains open.", available_directions[0])
         else:
             directions_str = ", ".join(
                 available_directions[:-1]) + " or " + available_directions[-1]
-            print(f"Your path is barred! You can go {directions_str}.")
+            ctx.echo("Your path is barred! You can go {}.", directions_str)
+
+
+def armored(player: Dict) -> bool:
+    """Whether the player carries something that blunts incoming blows"""
+    inventory = player["inventory"]
+    if isinstance(inventory, Inventory):
+        return inventory.has(DAMAGE_REDUCTION)
+    return "armor plates" in inventory
 
 
-def take_item(item: str, player: Dict, room: Dict):
+def find_item(items, name: str) -> Optional[str]:
+    """First item in a room whose name contains `name`, else the one it most resembles"""
+    if isinstance(items, ItemContainer):
+        return items.find(name) or items.fuzzy.match(name)
+    for room_item in items:
+        if name in room_item:
+            return room_item
+    return closest(name, items)
+
+
+def take_item(item: str, player: Dict, room: Dict, ctx: Context = DEFAULT_CONTEXT):
     """Add item to player inventory if present"""
     if room.get("enemy"):
-        damage = random.randint(5, 12)
-        if "armor plates" in player["inventory"]:
-            damage = max(2, damage // 2)
+        damage = ctx.rng.randint(*ctx.params.take_strike)
+        if armored(player):
+            damage = max(ctx.params.take_armor_floor, damage // 2)
 
         player["health"] -= damage
-        print(f"\nThe {room['enemy']} strikes as you reach for the {item}!")
-        print(f"A sharp pain shoots through you! ({damage} damage)")
-        print("You must defeat all guardians first!")
+        ctx.hits += 1
+        ctx.echo("\nThe {} strikes as you reach for the {}!", room["enemy"], item)
+        ctx.echo("A sharp pain shoots through you! ({} damage)", damage)
+        ctx.echo("You must defeat all guardians first!")
 
         if player["health"] <= 0:
             return
 
         return
 
-    found_item = None
-    for room_item in room["items"]:
-        if item == room_item or item in room_item:
-            found_item = room_item
-            break
+    found_item = find_item(room["items"], item)
 
     if found_item:
+        if isinstance(room, SharedRoom):
+            if not room.take(found_item):
+                ctx.echo("Another adventurer's hand closes on the {} first!", found_item)
+                return
+        else:
+            items = room["items"]
+            if isinstance(items, tuple):
+                # The room still shares its starting items; give it its own first
+                items = room["items"] = room_items(items)
+            items.remove(found_item)
         player["inventory"].append(found_item)
-        room["items"].remove(found_item)
-        print(f"You carefully take the {found_item}.")
+        ctx.echo("You carefully take the {}.", found_item)
     else:
-        print(f"No {item} lies within your grasp.")
+        ctx.echo("No {} lies within your grasp.", item)
 
 
-def show_inventory(player: Dict):
+def show_inventory(player: Dict, ctx: Context = DEFAULT_CONTEXT):
     """Display player's inventory"""
     if player["inventory"]:
-        print("\nYour possessions:")
+        ctx.echo("\nYour possessions:")
         for item in player["inventory"]:
-            print(f"- {item.capitalize()}")
+            ctx.echo("- {}", item.capitalize())
     else:
-        print("\nYour pockets hang empty and forlorn.")
+        ctx.echo("\nYour pockets hang empty and forlorn.")
 
 
-def show_health(player: Dict):
+def show_health(player: Dict, ctx: Context = DEFAULT_CONTEXT):
     """Display player's health"""
     status = "Barely standing" if player["health"] < 25 else \
              "Wounded but steady" if player["health"] < 60 else \
              "Bruised but strong" if player["health"] < 90 else \
              "In fighting form"
 
-    print(f"\n{status} (Health: {player['health']})")
+    ctx.echo("\n{} (Health: {})", status, player["health"])
     if player["health"] < 30:
-        print("The light grows dim... find healing soon!")
+        ctx.echo("The light grows dim... find healing soon!")
+
+
+def show_hint(player: Dict, world: Dict, ctx: Context = DEFAULT_CONTEXT):
+    """Display the best next command from the precomputed solver table"""
+    from solver import hint
+
+    try:
+        chance, command = hint(player, world, ctx)
+    except (KeyError, ValueError):
+        # The solver only knows the standard dungeon's rooms and its lethal dart trap
+        ctx.echo("\nNo whisper reaches these unfamiliar halls.")
+        return
+    if chance <= 0:
+        ctx.echo("\nThe shadows whisper nothing. Whatever you do, fate is sealed.")
+    else:
+        ctx.echo("\nA whisper guides you: '{}' ({:.0%} chance of victory)", command, min(chance, 1))
 
 
-def combat(player: Dict, room: Dict):
+def combat(player: Dict, room: Dict, ctx: Context = DEFAULT_CONTEXT):
     """Handle combat with enemy"""
     enemy = room["enemy"]
-    enemy_health = random.randint(25, 45)
+    enemy_health = ctx.rng.randint(*ctx.params.enemy_health)
 
-    print(f"\nYou square off against the {enemy}!")
+    ctx.echo("\nYou square off against the {}!", enemy)
 
     while True:
         # Player attacks
-        damage = player["attack"] + random.randint(3, 12)
+        damage = player["attack"] + ctx.rng.randint(*ctx.params.player_bonus)
         enemy_health -= damage
-        print(f"Your strike lands true! The {enemy} reels from {damage} damage.")
+        ctx.echo("Your strike lands true! The {} reels from {} damage.", enemy, damage)
 
         if enemy_health <= 0:
-            print(f"\nWith a final blow, the {enemy} collapses!")
-            print("Victory is yours... for now.")
+            if ctx.log is not None:
+                ctx.log.round(enemy, 0)
+            ctx.echo("\nWith a final blow, the {} collapses!", enemy)
+            ctx.echo("Victory is yours... for now.")
 
             # Spawn next enemy if there are more
-            if "enemies" in room and room["enemies"]:
+            if isinstance(room, SharedRoom):
+                # Another adventurer may have landed the killing blow first
+                if room.defeat(enemy) and room["enemy"]:
+                    ctx.echo("\nFrom the shadows, a {} appears to challenge you!", room["enemy"])
+            elif "enemies" in room and room["enemies"]:
                 room["enemy"] = room["enemies"].pop(0)
-                print(f"\nFrom the shadows, a {room['enemy']} appears to challenge you!")
+                ctx.echo("\nFrom the shadows, a {} appears to challenge you!", room["enemy"])
             else:
                 room["enemy"] = None
             break
 
         # Enemy attacks
-        enemy_damage = random.randint(8, 16)
-        if "armor plates" in player["inventory"]:
-            enemy_damage = max(3, enemy_damage // 2)
+        enemy_damage = ctx.rng.randint(*ctx.params.enemy_damage)
+        if armored(player):
+            enemy_damage = max(ctx.params.combat_armor_floor, enemy_damage // 2)
         player["health"] -= enemy_damage
-        print(f"The {enemy} retaliates! You suffer {enemy_damage} damage.")
+        ctx.hits += 1
+        if ctx.log is not None:
+            ctx.log.round(enemy, enemy_damage)
+        ctx.echo("The {} retaliates! You suffer {} damage.", enemy, enemy_damage)
 
         if player["health"] <= 0:
             break
 
 
-def check_victory(player: Dict, room: Dict) -> bool:
+def check_victory(player: Dict, room: Dict, ctx: Context = DEFAULT_CONTEXT) -> bool:
     """Check if player has won the game"""
     if "lost artifact" in player["inventory"]:
-        print("\nThe artifact's power surges through you!")
-        print("Darkness flees before your triumph as you escape the dungeon!")
-        print("VICTORY IS YOURS!")
+        ctx.echo("\nThe artifact's power surges through you!")
+        ctx.echo("Darkness flees before your triumph as you escape the dungeon!")
+        ctx.echo("VICTORY IS YOURS!")
         return True
     return False
 
 
-def check_defeat(player: Dict) -> bool:
+def check_defeat(player: Dict, ctx: Context = DEFAULT_CONTEXT) -> bool:
     """Check if player has lost the game"""
     if player["health"] <= 0:
-        print("\nYour legs buckle as the world spins...")
-        print("The cold stone greets your falling body.")
-        print("As darkness takes you, one thought remains:")
-        print("You have joined the dungeon's countless victims...")
+        ctx.echo("\nYour legs buckle as the world spins...")
+        ctx.echo("The cold stone greets your falling body.")
+        ctx.echo("As darkness takes you, one thought remains:")
+        ctx.echo("You have joined the dungeon's countless victims...")
         return True
     return False
 
@@ -0,0 +1,102 @@
+"""Shortest-route index over a compiled world's exits.
+
+For each destination the index keeps one next-hop table: a byte per room
+saying which compass direction leads one step closer, or NO_ROUTE. A table
+is built with a single breadth-first search backwards from the destination
+the first time someone travels there, and only the most recently used
+destinations are kept. Memory therefore stays at O(rooms) per cached
+destination and never O(rooms ** 2), however large the dungeon.
+
+Indexes are built per CompiledWorld. A compiled world never changes, so
+changing the topology means compiling a new world, which gets a new index.
+"""
+import functools
+from array import array
+from collections import OrderedDict, deque
+from typing import List, Optional
+
+from world import DIRECTIONS, NO_EXIT, CompiledWorld
+
+# move_player remaps up/down onto north/south, so only compass exits are walkable
+COMPASS = ("north", "south", "east", "west")
+NO_ROUTE = -1
+
+
+class RouteIndex:
+    """Lazily built next-hop tables for one compiled world"""
+
+    def __init__(self, compiled: CompiledWorld, cached_destinations: int = 64):
+        self.compiled = compiled
+        self.cached_destinations = cached_destinations
+        self.tables: "OrderedDict[int, array]" = OrderedDict()
+
+        # Reverse adjacency in compressed rows: the rooms with an exit into
+        # room r are sources[starts[r]:starts[r + 1]], via directions[...]
+        size = len(compiled)
+        width = len(DIRECTIONS)
+        columns = [DIRECTIONS.index(direction) for direction in COMPASS]
+        counts = [0] * (size + 1)
+        for room_id in range(size):
+            for column in columns:
+                target = compiled.exit_table[room_id * width + column]
+                if target != NO_EXIT:
+                    counts[target + 1] += 1
+        for room_id in range(size):
+            counts[room_id + 1] += counts[room_id]
+        self.starts = array("i", counts)
+        self.sources = array("i", bytes(4 * counts[-1]))
+        self.directions = array("b", bytes(counts[-1]))
+        fill = list(counts[:-1])
+        for room_id in range(size):
+            for index, column in enumerate(columns):
+                target = compiled.exit_table[room_id * width + column]
+                if target != NO_EXIT:
+                    self.sources[fill[target]] = room_id
+                    self.directions[fill[target]] = index
+                    fill[target] += 1
+
+    def next_hops(self, destination: int) -> array:
+        """Next-hop table toward one destination, from cache or a fresh search"""
+        table = self.tables.get(destination)
+        if table is not None:
+            self.tables.move_to_end(destination)
+            return table
+
+        table = array("b", [NO_ROUTE]) * len(self.compiled)
+        starts, sources, directions = self.starts, self.sources, self.directions
+        reached = bytearray(len(self.compiled))
+        reached[destination] = 1
+        queue = deque([destination])
+        while queue:
+            room_id = queue.popleft()
+            for edge in range(starts[room_id], starts[room_id + 1]):
+                source = sources[edge]
+                if not reached[source]:
+                    reached[source] = 1
+                    table[source] = directions[edge]
+                    queue.append(source)
+
+        self.tables[destination] = table
+        if len(self.tables) > self.cached_destinations:
+            self.tables.popitem(last=False)
+        return table
+
+    def route(self, start: str, destination: str) -> Optional[List[str]]:
+        """Directions to walk from start to destination, or None if unreachable"""
+        ids = self.compiled.ids
+        here, goal = ids[start], ids[destination]
+        table = self.next_hops(goal)
+        steps = []
+        while here != goal:
+            hop = table[here]
+            if hop == NO_ROUTE:
+                return None
+            steps.append(COMPASS[hop])
+            here = self.compiled.neighbor(here, COMPASS[hop])
+        return steps
+
+
+@functools.lru_cache(maxsize=8)
+def route_index(compiled: CompiledWorld) -> RouteIndex:
+    """Shared route index for a compiled world"""
+    return RouteIndex(compiled)
@@ -0,0 +1,157 @@
+"""Tick-driven real-time combat shared by every session on a server.
+
+combat() settles a whole fight inside one command. In real-time play an
+`attack` instead engages a Fight that a CombatScheduler advances on a clock.
+The player and every enemy in the room act on their own intervals, so the
+treasure-room guardians fight together rather than queueing up. Each actor's
+next action sits in a timer wheel: a ring of buckets, one per tick. A tick
+empties a single bucket, so its cost follows the actions due now, not the
+number of fights or sessions. Output is buffered in each session's sink and
+flushed once per tick.
+
+Dice, damage and armor follow the game's Params, as in combat().
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+
+from project import Context, armored
+from shared import SharedRoom
+
+PLAYER = -1
+
+
+class Fight:
+    """The player against every enemy in one room until one side falls"""
+
+    __slots__ = ("player", "room", "ctx", "location", "names", "health", "intervals",
+                 "target", "entries", "over", "on_end")
+
+    def __init__(self, player: Dict, room: Dict, ctx: Context,
+                 on_end: Optional[Callable[["Fight"], None]] = None):
+        self.player = player
+        self.room = room
+        self.ctx = ctx
+        self.location = player["location"]
+        self.names: List[str] = [room["enemy"]] + list(room.get("enemies") or ())
+        self.health = [ctx.rng.randint(*ctx.params.enemy_health) for _ in self.names]
+        self.intervals = [ctx.rng.randint(*ctx.params.enemy_interval) for _ in self.names]
+        # Enemies fall in order, so the player's target only ever moves forward
+        self.target = 0
+        # One reusable wheel entry per actor, so rescheduling allocates nothing
+        self.entries = [(self, PLAYER)] + [(self, actor) for actor in range(len(self.names))]
+        self.over = False
+        self.on_end = on_end
+
+    @property
+    def alive(self) -> List[int]:
+        return [index for index, health in enumerate(self.health) if health > 0]
+
+    def act(self, actor: int) -> Optional[int]:
+        """Play one actor's action and return its delay until the next, if any"""
+        player, ctx = self.player, self.ctx
+        if player["location"] != self.location or ctx.quit or player["health"] <= 0:
+            # The player fled, left the game or fell to something else
+            self.end()
+            return None
+
+        if actor == PLAYER:
+            target = self.target
+            enemy = self.names[target]
+            damage = player["attack"] + ctx.rng.randint(*ctx.params.player_bonus)
+            self.health[target] -= damage
+            ctx.echo("Your strike lands true! The {} reels from {} damage.", enemy, damage)
+            if self.health[target] <= 0:
+                ctx.echo("\nWith a final blow, the {} collapses!", enemy)
+                self.target += 1
+                if self.target == len(self.names):
+                    ctx.echo("Victory is yours... for now.")
+                    self.end()
+                    return None
+            return ctx.params.player_interval
+
+        if self.health[actor] <= 0:
+            return None
+        enemy = self.names[actor]
+        damage = ctx.rng.randint(*ctx.params.enemy_damage)
+        if armored(player):
+            damage = max(ctx.params.combat_armor_floor, damage // 2)
+        player["health"] -= damage
+        ctx.hits += 1
+        ctx.echo("The {} retaliates! You suffer {} damage.", enemy, damage)
+        if player["health"] <= 0:
+            self.end()
+            return None
+        return self.intervals[actor]
+
+    def end(self):
+        """Leave the room holding only the enemies still standing"""
+        self.over = True
+        if isinstance(self.room, SharedRoom):
+            # Kills only count while nobody else has already made them
+            for enemy in self.names[:self.target]:
+                self.room.defeat(enemy)
+        else:
+            standing = [self.names[index] for index in self.alive]
+            self.room["enemy"] = standing[0] if standing else None
+            if "enemies" in self.room or len(standing) > 1:
+                self.room["enemies"] = standing[1:]
+        if self.on_end is not None:
+            self.on_end(self)
+
+
+class CombatScheduler:
+    """Timer wheel advancing every active fight one tick at a time"""
+
+    def __init__(self, slots: int = 64):
+        self.slots = slots
+        self.wheel: List[List] = [[] for _ in range(slots)]
+        self.now = 0
+        # The fight each session's Context is in, so it cannot start two at once. Keyed
+        # on the Context itself, which stays alive while listed, so a fresh one after a
+        # reset can never be mistaken for it
+        self.active: Dict[Context, Fight] = {}
+
+    def schedule(self, delay: int, entry: Tuple[Fight, int]):
+        if not 0 < delay < self.slots:
+            raise ValueError(f"delay must be between 1 and {self.slots - 1} ticks")
+        self.wheel[(self.now + delay) % self.slots].append(entry)
+
+    def engage(self, player: Dict, room: Dict, ctx: Context,
+               on_end: Optional[Callable[[Fight], None]] = None) -> Fight:
+        """Start a fight against everything in the room; the player swings first"""
+        fight = self.active.get(ctx)
+        if fight is not None and fight.location != player["location"]:
+            # Walked away from an earlier fight whose next action is not yet due
+            fight.end()
+            del self.active[ctx]
+        elif fight is not None:
+            ctx.echo("You are already locked in battle with the {}!",
+                     " and the ".join(fight.names[index] for index in fight.alive))
+            return fight
+        fight = self.active[ctx] = Fight(player, room, ctx, on_end)
+        ctx.echo("\nYou square off against the {}!", " and the ".join(fight.names))
+        self.schedule(1, fight.entries[0])
+        for interval, entry in zip(fight.intervals, fight.entries[1:]):
+            self.schedule(interval, entry)
+        return fight
+
+    def tick(self) -> int:
+        """Advance one tick and return how many actions it ran"""
+        self.now += 1
+        slot = self.now % self.slots
+        due, self.wheel[slot] = self.wheel[slot], []
+        touched = {}
+        for entry in due:
+            fight, actor = entry
+            if fight.over:
+                continue
+            delay = fight.act(actor)
+            if fight.over:
+                del self.active[fight.ctx]
+            elif delay is not None:
+                self.schedule(delay, entry)
+            touched[fight.ctx] = fight.ctx.echo
+        for echo in touched.values():
+            flush = getattr(echo, "flush", None)
+            if flush is not None:
+                flush()
+        return len(due)
@@ -0,0 +1,340 @@
+"""Line-protocol game server hosting many concurrent sessions in one process.
+
+Connect with any telnet-style client, e.g. `telnet localhost 4000`, and
+type commands exactly as in the terminal game. With --shared every player
+explores the same dungeon, and --workers spreads the sessions over several
+processes listening on one port, all sharing that dungeon. With --db each
+player gives a name and their game is kept in SQLite, to be picked up
+again after a disconnect or a server restart. With --leaderboard every
+finished game is ranked, and `leaderboard` shows the node's best; with
+several workers, the others' games appear as of their last compaction.
+"""
+import argparse
+import asyncio
+import io
+import multiprocessing
+import tracemalloc
+from typing import Dict, Optional, Set
+
+from eventlog import EventLog
+from leaderboard import Leaderboard
+from metrics import Metrics
+from output import StreamSink
+from project import INTRO, STANDARD_RULES, Game, compiled_world, describe_room, discard
+from scheduler import CombatScheduler
+from shared import SharedWorld
+from solver import warm_tables
+from storage import Store
+from worldfile import load_world
+
+PROMPT = "\nWhat will you do? "
+MAX_NAME = 32
+
+
+class Session:
+    """One connected player: a private game writing each turn to its stream"""
+
+    __slots__ = ("game",)
+
+    def __init__(self, stream, metrics: Optional[Metrics] = None, log: Optional[EventLog] = None,
+                 scheduler: Optional[CombatScheduler] = None, world=None,
+                 game: Optional[Game] = None, results: Optional[Leaderboard] = None):
+        """`game` resumes a saved game, which then writes to this stream"""
+        echo = StreamSink(stream, "utf-8")
+        if game is None:
+            game = Game(echo=echo, world=world, metrics=metrics, log=log, scheduler=scheduler,
+                        results=results)
+        else:
+            game.echo = game.ctx.echo = echo
+        self.game = game
+
+
+class GameServer:
+    """asyncio TCP server running one Session per connection"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 4000, idle_timeout: float = 300,
+                 max_sessions: int = 10000, max_line: int = 1024, write_limit: int = 64 * 1024,
+                 metrics: Optional[Metrics] = None, log: Optional[EventLog] = None,
+                 tick: Optional[float] = None, world=None,
+                 reuse_port: bool = False, store: Optional[Store] = None,
+                 flush_every: float = 0.2, results: Optional[Leaderboard] = None,
+                 compact_every: float = 60):
+        self.host = host
+        self.port = port
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.max_line = max_line
+        self.write_limit = write_limit
+        # Shared by every session, so `stats` and the dump describe the whole node
+        self.metrics = metrics
+        self.log = log
+        # Real-time fights for every session, advanced every `tick` seconds
+        self.tick = tick
+        self.scheduler = CombatScheduler() if tick else None
+        self._ticker: Optional[asyncio.Task] = None
+        # The layout every session plays; a SharedWorld makes it one dungeon for all
+        self.world = world
+        # Lets several worker processes accept on the same port
+        self.reuse_port = reuse_port
+        # Named, persistent sessions: games restored at startup and not yet resumed,
+        # and the names in play
+        self.store = store
+        self.flush_every = flush_every
+        self.saved: Dict[str, Game] = {}
+        self.playing: Set[str] = set()
+        self._flusher: Optional[asyncio.Task] = None
+        # Rankings of every game finished here, written to disk every `compact_every` seconds
+        self.results = results
+        self.compact_every = compact_every
+        self._compactor: Optional[asyncio.Task] = None
+        self.sessions = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(
+            self.handle, self.host, self.port, limit=self.max_line,
+            reuse_port=self.reuse_port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self.scheduler is not None:
+            self._ticker = asyncio.create_task(self.run_ticks())
+        if self.store is not None:
+            self.saved = self.store.load_all(self.new_game)
+            self._flusher = asyncio.create_task(self.run_flushes())
+        if self.results is not None and self.results.peer_paths:
+            self.results.load_peers()
+        if self.results is not None and self.results.path is not None:
+            self._compactor = asyncio.create_task(self.run_compactions())
+
+    def new_game(self) -> Game:
+        """Game wired to this server's hooks; Session gives it the player's stream"""
+        return Game(discard, world=self.world, metrics=self.metrics, log=self.log,
+                    scheduler=self.scheduler, results=self.results)
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def run_ticks(self):
+        """Advance all fights on a fixed clock, catching up rather than drifting"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        while True:
+            deadline += self.tick
+            await asyncio.sleep(max(0.0, deadline - loop.time()))
+            self.scheduler.tick()
+
+    async def run_flushes(self):
+        """Commit the turns of quiet sessions that would not fill a batch"""
+        while True:
+            await asyncio.sleep(self.flush_every)
+            self.store.flush()
+
+    async def run_compactions(self):
+        while True:
+            await asyncio.sleep(self.compact_every)
+            self.results.compact()
+            if self.results.peer_paths:
+                self.results.load_peers()
+
+    async def close(self):
+        if self._ticker is not None:
+            self._ticker.cancel()
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self.store.flush()
+        if self._compactor is not None:
+            self._compactor.cancel()
+            self.results.compact()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Run one connection until the game ends, the peer leaves or it idles out"""
+        if len(self.sessions) >= self.max_sessions:
+            writer.write(b"The dungeon is full. Try again later.\n")
+            await self._close(writer)
+            return
+
+        # drain() blocks once this much output is queued for a slow reader
+        writer.transport.set_write_buffer_limits(high=self.write_limit)
+        writer.write(INTRO.encode())
+        name = None
+        if self.store is not None:
+            name = await self.login(reader, writer)
+            if name is None:
+                await self._close(writer)
+                return
+        saved = self.resume(name) if name is not None else None
+        session = Session(writer, self.metrics, self.log, self.scheduler, self.world, saved,
+                          self.results)
+        session.game.name = name
+        if saved is not None:
+            writer.write(b"\nThe dungeon remembers you. You are back where you left off.\n")
+            describe_room(saved.world[saved.player["location"]], saved.ctx)
+            saved.echo.flush()
+        self.sessions.add(session)
+        try:
+            await writer.drain()
+            while not session.game.done:
+                await self.send(writer, PROMPT.encode())
+                try:
+                    line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    await self.send(writer, b"\nThe torchlight gutters out. You wait too long...\n")
+                    break
+                except (asyncio.LimitOverrunError, ValueError):
+                    await self.send(writer, b"\nThat command is far too long.\n")
+                    break
+                if not line:
+                    break
+
+                session.game.step(line.decode(errors="replace").strip().lower())
+                if name is not None:
+                    self.store.record(name, session.game)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions.discard(session)
+            if name is not None:
+                self.playing.discard(name)
+            await self._close(writer)
+
+    def resume(self, name: str) -> Optional[Game]:
+        """The player's unfinished game, from the uncommitted batch, startup or the database"""
+        saved = self.saved.pop(name, None)
+        game = self.store.pending.get(name) or saved or self.store.load(name, self.new_game)
+        return None if game is None or game.done else game
+
+    async def login(self, reader: asyncio.StreamReader,
+                    writer: asyncio.StreamWriter) -> Optional[str]:
+        """Ask for the player's name, or None if they leave or it is taken"""
+        await self.send(writer, b"\nBy what name are you known? ")
+        try:
+            line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+        except (asyncio.TimeoutError, asyncio.LimitOverrunError, ValueError):
+            return None
+        name = line.decode(errors="replace").strip().lower()[:MAX_NAME]
+        if not name:
+            return None
+        if name in self.playing:
+            await self.send(writer, b"Someone by that name already walks these halls.\n")
+            return None
+        self.playing.add(name)
+        return name
+
+    @staticmethod
+    async def send(writer: asyncio.StreamWriter, data: bytes):
+        writer.write(data)
+        await writer.drain()
+
+    @staticmethod
+    async def _close(writer: asyncio.StreamWriter):
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+def session_footprint(samples: int = 1000) -> int:
+    """Average bytes allocated per idle session, for sizing server nodes"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        sessions = [Session(io.BytesIO()) for _ in range(samples)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return (after - before) // samples
+
+
+def serve(args: argparse.Namespace, world=None, worker: int = 0):
+    """Run one server process until interrupted, writing its metrics and events"""
+    # Each worker keeps its own metrics dump and event log
+    suffix = f".{worker}" if args.workers > 1 else ""
+    metrics = Metrics() if args.metrics else None
+    log = EventLog(args.events + suffix) if args.events else None
+    store = Store(args.db) if args.db else None
+    results = None
+    if args.leaderboard:
+        # Each worker also merges the boards the others compact, to rank the whole node
+        peers = [f"{args.leaderboard}.{other}" for other in range(args.workers) if other != worker]
+        results = Leaderboard.load(args.leaderboard + suffix, peers=peers)
+    server = GameServer(args.host, args.port, args.idle_timeout, args.max_sessions,
+                        metrics=metrics, log=log, tick=args.tick, world=world,
+                        reuse_port=args.workers > 1, store=store, results=results)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if store is not None:
+            store.close()
+        if results is not None:
+            results.compact()
+        if metrics is not None:
+            metrics.dump(args.metrics + suffix)
+        if log is not None:
+            log.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host Dungeon of the Lost Artifact over TCP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument("--idle-timeout", type=float, default=300, help="seconds")
+    parser.add_argument("--max-sessions", type=int, default=10000, help="per worker")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="instrument all sessions and write the metrics as JSON on shutdown")
+    parser.add_argument("--events", metavar="PATH", help="append every session's turns to an event log")
+    parser.add_argument("--tick", type=float, default=None, metavar="SECONDS",
+                        help="fight in real time, advancing all fights every SECONDS")
+    parser.add_argument("--shared", action="store_true",
+                        help="every player explores one dungeon; items and kills are first come")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes accepting on the same port (Linux, BSD)")
+    parser.add_argument("--world", metavar="PATH", help="host a dungeon definition file")
+    parser.add_argument("--db", metavar="PATH",
+                        help="keep named players' games in this SQLite database")
+    parser.add_argument("--leaderboard", metavar="PATH",
+                        help="rank every finished game, compacting the boards to this file")
+    args = parser.parse_args()
+    if args.db and (args.shared or args.workers > 1):
+        parser.error("--db keeps private games of a single process; "
+                     "it cannot be combined with --shared or --workers")
+
+    layout = load_world(args.world) if args.world else compiled_world()
+    rules = layout.rules or STANDARD_RULES
+    world = SharedWorld(layout, rules.guardians) if args.shared else layout
+    print(f"Memory per session: ~{session_footprint()} bytes")
+    # Solved before serving, and before forking so every worker inherits them,
+    # so that no player's first `hint` stalls the event loop
+    print("Solving hint tables...")
+    warm_tables()
+    print(f"Serving on {args.host}:{args.port}")
+    try:
+        if args.workers == 1:
+            serve(args, world)
+            return
+        workers = [multiprocessing.Process(target=serve, args=(args, world, worker))
+                   for worker in range(args.workers)]
+        for worker in workers:
+            worker.start()
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            # The workers received the same interrupt and shut down on their own
+            for worker in workers:
+                worker.join()
+    finally:
+        if isinstance(world, SharedWorld):
+            world.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""One dungeon shared by every player on a host, across worker processes.
+
+A SharedWorld keeps the only room state players can change, the items on
+the floor and the enemies still standing, in one block of shared memory
+laid out from a CompiledWorld. Text and exits stay in the CompiledWorld that
+each process already has. Reads take no lock: a room is described from
+whatever the memory holds at that moment. Every change goes through one
+method that re-checks its precondition under the room's lock and reports
+whether it won:
+
+- take(item) succeeds only while a copy is still on the floor, so two
+  players can never both pick up the same `lost artifact`
+- defeat(enemy) succeeds only while that enemy is the room's current one,
+  so two players finishing the same rat kill it once
+- spawn(enemies) fills an empty room only once in the world's lifetime
+
+Rooms hash onto a fixed set of lock stripes rather than sharing one global
+lock, so players in different rooms never wait on each other.
+
+Create the world in the parent process, then hand it to workers as a
+Process or pool-initializer argument; the locks cannot be pickled later,
+and must come from the same multiprocessing context as the workers.
+"""
+import multiprocessing
+from array import array
+from multiprocessing import shared_memory
+from types import MappingProxyType
+from typing import Dict, List, Optional, Sequence
+
+from world import CompiledWorld
+
+NO_ENEMY = -1
+# Per-room header: spawned flag, index of the current enemy, enemies in the queue
+SPAWNED, HEAD, COUNT = range(3)
+HEADER = 3
+
+
+class SharedWorld:
+    """Mutable room state for every session of one dungeon, in shared memory"""
+
+    def __init__(self, compiled: CompiledWorld, spawns: Sequence[str] = (), stripes: int = 64,
+                 context=None, name: Optional[str] = None):
+        """`spawns` names every enemy spawn() may bring in later, e.g. the treasure guardians.
+
+        `context` is the multiprocessing context the workers will be started
+        from, when it is not the default one.
+        """
+        self.compiled = compiled
+        self.spawns = tuple(spawns)
+        self.stripes = stripes
+        self.enemy_names = tuple(dict.fromkeys(
+            [enemy for enemy in compiled.enemies if enemy] + list(self.spawns)))
+        self.enemy_codes = {enemy: code for code, enemy in enumerate(self.enemy_names)}
+        self.queue = max(1, len(self.spawns))
+
+        # Each room only ever holds some of its starting items, so it counts just those
+        self.room_items = tuple(tuple(dict.fromkeys(items)) for items in compiled.items)
+        self.offsets = array("q")
+        size = 0
+        for items in self.room_items:
+            self.offsets.append(size)
+            size += HEADER + self.queue + len(items)
+
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=max(4, size * 4))
+            self.owner = True
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.cells = self.memory.buf.cast("i")
+        # Workers attaching by name receive the creator's locks through __setstate__
+        self.locks = []
+        if self.owner:
+            context = context or multiprocessing
+            self.locks = [context.Lock() for _ in range(min(stripes, len(compiled)))]
+            self.reset()
+
+    def __getstate__(self) -> Dict:
+        return {"compiled": self.compiled, "spawns": self.spawns, "stripes": self.stripes,
+                "name": self.memory.name, "locks": self.locks}
+
+    def __setstate__(self, state: Dict):
+        locks = state.pop("locks")
+        self.__init__(**state)
+        self.locks = locks
+
+    @property
+    def rules(self):
+        return self.compiled.rules
+
+    def lock(self, room_id: int):
+        return self.locks[room_id % len(self.locks)]
+
+    def reset(self):
+        """Put every starting item and enemy back, as when the world was created"""
+        for lock in self.locks:
+            lock.acquire()
+        try:
+            for room_id, base in enumerate(self.offsets):
+                enemy = self.compiled.enemies[room_id]
+                self.cells[base + SPAWNED] = 0
+                self.cells[base + HEAD] = 0
+                self.cells[base + COUNT] = 1 if enemy else 0
+                self.cells[base + HEADER] = self.enemy_codes[enemy] if enemy else NO_ENEMY
+                counts = base + HEADER + self.queue
+                for index, item in enumerate(self.room_items[room_id]):
+                    self.cells[counts + index] = self.compiled.items[room_id].count(item)
+        finally:
+            for lock in self.locks:
+                lock.release()
+
+    def new_session(self) -> "SharedSession":
+        """Per-game view onto the shared rooms"""
+        return SharedSession(self)
+
+    def close(self):
+        """Detach from the memory, freeing it when this process created it"""
+        self.cells.release()
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+    def __del__(self):
+        # The memory cannot be unmapped while this view of it is alive
+        cells = getattr(self, "cells", None)
+        if cells is not None:
+            cells.release()
+
+
+class SharedRoom:
+    """Dict-style view of one shared room; change it only through its methods"""
+
+    __slots__ = ("shared", "room_id", "base", "description", "exits", "treasure")
+
+    __getitem__ = object.__getattribute__
+
+    def __init__(self, shared: SharedWorld, room_id: int):
+        self.shared = shared
+        self.room_id = room_id
+        self.base = shared.offsets[room_id]
+        self.description = shared.compiled.descriptions[room_id]
+        self.exits: MappingProxyType = shared.compiled.exits[room_id]
+        self.treasure = shared.compiled.treasure[room_id]
+
+    def __contains__(self, key: str) -> bool:
+        return hasattr(self, key)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
+
+    @property
+    def items(self) -> List[str]:
+        cells, counts = self.shared.cells, self.base + HEADER + self.shared.queue
+        return [item for index, item in enumerate(self.shared.room_items[self.room_id])
+                for _ in range(cells[counts + index])]
+
+    @property
+    def enemy(self) -> Optional[str]:
+        cells, base = self.shared.cells, self.base
+        head = cells[base + HEAD]
+        if head >= cells[base + COUNT]:
+            return None
+        return self.shared.enemy_names[cells[base + HEADER + head]]
+
+    @property
+    def enemies(self) -> List[str]:
+        """Enemies waiting behind the current one"""
+        cells, base = self.shared.cells, self.base
+        codes = cells[base + HEADER + cells[base + HEAD] + 1:base + HEADER + cells[base + COUNT]]
+        return [self.shared.enemy_names[code] for code in codes]
+
+    def take(self, item: str) -> bool:
+        """Remove one copy of `item`, unless another player got the last one first"""
+        try:
+            cell = self.base + HEADER + self.shared.queue + \
+                self.shared.room_items[self.room_id].index(item)
+        except ValueError:
+            return False
+        cells = self.shared.cells
+        with self.shared.lock(self.room_id):
+            if cells[cell] <= 0:
+                return False
+            cells[cell] -= 1
+        return True
+
+    def defeat(self, enemy: str) -> bool:
+        """Fell the current enemy, unless another player already did"""
+        code = self.shared.enemy_codes[enemy]
+        cells, base = self.shared.cells, self.base
+        with self.shared.lock(self.room_id):
+            head = cells[base + HEAD]
+            if head >= cells[base + COUNT] or cells[base + HEADER + head] != code:
+                return False
+            cells[base + HEAD] = head + 1
+        return True
+
+    def spawn(self, enemies: Sequence[str]) -> bool:
+        """Bring in enemies, once per world and only while the room stands empty"""
+        if len(enemies) > self.shared.queue:
+            raise ValueError(f"At most {self.shared.queue} enemies can share a room")
+        codes = [self.shared.enemy_codes[enemy] for enemy in enemies]
+        cells, base = self.shared.cells, self.base
+        with self.shared.lock(self.room_id):
+            if cells[base + SPAWNED] or cells[base + HEAD] < cells[base + COUNT]:
+                return False
+            for index, code in enumerate(codes):
+                cells[base + HEADER + index] = code
+            cells[base + HEAD] = 0
+            cells[base + COUNT] = len(codes)
+            cells[base + SPAWNED] = 1
+        return True
+
+
+class SharedSession(dict):
+    """Per-session room map over a SharedWorld, caching only the room views"""
+
+    __slots__ = ("shared", "compiled")
+
+    def __init__(self, shared: SharedWorld):
+        super().__init__()
+        self.shared = shared
+        self.compiled = shared.compiled
+
+    def __missing__(self, name: str) -> SharedRoom:
+        room = SharedRoom(self.shared, self.compiled.ids[name])
+        self[name] = room
+        return room
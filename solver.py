@@ -0,0 +1,254 @@
+"""Exact win probabilities and best moves via memoized dynamic programming.
+
+Only a few facts about a game decide whether it can still be won: where the
+player stands, whether they carry the armor plates, their health, which
+room enemies are still alive and how far the treasure-room guardian chain
+has progressed. Every other item is decoration, so a solver state is the
+tuple (location, armor, health, alive_mask, stage) where stage is 0 before
+the guardians spawn, 1-3 while guardian N blocks the pedestal and 4 once
+they are all dead.
+"""
+import functools
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from balance import DEFAULT_PARAMS, Params
+from project import (DIRECTION_SYNONYMS, RAT_GATE, TREASURE_GUARDIANS, Context,
+                     initialize_world, is_treasure_room)
+
+ARMOR = "armor plates"
+ARTIFACT = "lost artifact"
+COMPASS = ("north", "south", "east", "west")
+FINAL_STAGE = len(TREASURE_GUARDIANS) + 1
+
+State = Tuple[str, bool, int, int, int]
+
+
+def uniform(low: int, high: int) -> Dict[int, float]:
+    """Distribution of random.randint(low, high)"""
+    share = 1 / (high - low + 1)
+    return {value: share for value in range(low, high + 1)}
+
+
+def strike_damage(low: int, high: int, floor: int, armor: bool) -> Dict[int, float]:
+    """Distribution of a single enemy hit, halved with a floor under armor"""
+    if not armor:
+        return uniform(low, high)
+    dist = {}
+    for damage, p in uniform(low, high).items():
+        damage = max(floor, damage // 2)
+        dist[damage] = dist.get(damage, 0) + p
+    return dist
+
+
+@functools.lru_cache(maxsize=None)
+def fight_damage(attack: int, armor: bool, params: Params = DEFAULT_PARAMS) -> Dict[int, float]:
+    """Distribution of total damage taken while winning one combat() fight.
+
+    Damage only ever accumulates, so a player with health h dies exactly when
+    this total reaches h; the fight outcome for any health follows from the
+    one distribution.
+    """
+    swing = {attack + bonus: p for bonus, p in uniform(*params.player_bonus).items()}
+    hit = strike_damage(*params.enemy_damage, params.combat_armor_floor, armor)
+
+    @functools.lru_cache(maxsize=None)
+    def taken(enemy_health: int) -> Dict[int, float]:
+        dist = {}
+        for damage, p in swing.items():
+            remaining = enemy_health - damage
+            if remaining <= 0:
+                dist[0] = dist.get(0, 0) + p
+                continue
+            for suffered, q in hit.items():
+                for total, r in taken(remaining).items():
+                    key = suffered + total
+                    dist[key] = dist.get(key, 0) + p * q * r
+        return dist
+
+    total = {}
+    for enemy_health, p in uniform(*params.enemy_health).items():
+        for damage, q in taken(enemy_health).items():
+            total[damage] = total.get(damage, 0) + p * q
+    return total
+
+
+class Solver:
+    """Optimal play for one attack value over a fixed dungeon layout"""
+
+    def __init__(self, attack: int, world: Optional[Dict] = None,
+                 params: Params = DEFAULT_PARAMS):
+        if params.trap_damage is not None:
+            raise ValueError("the solver only models a lethal dart trap")
+        world = world or initialize_world()
+        self.attack = attack
+        self.params = params
+        self.rooms = list(world)
+        self.exits = {name: {d: room["exits"][DIRECTION_SYNONYMS.get(d, d)]
+                             for d in COMPASS
+                             if DIRECTION_SYNONYMS.get(d, d) in room["exits"]}
+                      for name, room in world.items()}
+        guarded = [name for name, room in world.items() if room["enemy"]]
+        self.enemy_bit = {name: 1 << index for index, name in enumerate(guarded)}
+        self.full_mask = (1 << len(guarded)) - 1
+        self.treasure = next(name for name, room in world.items() if is_treasure_room(room))
+        self.armory = next((name for name, room in world.items() if ARMOR in room["items"]), None)
+        self.table = {}
+
+    def start_state(self) -> State:
+        return "entrance", False, self.params.health, self.full_mask, 0
+
+    def state_of(self, player: Dict, world: Dict, ctx: Context) -> State:
+        """Project a live game onto the solver's state space"""
+        mask = 0
+        for name, bit in self.enemy_bit.items():
+            if world[name]["enemy"]:
+                mask |= bit
+        room = world[self.treasure]
+        if not ctx.guardians_spawned:
+            stage = 0
+        elif room["enemy"] is None:
+            stage = FINAL_STAGE
+        else:
+            stage = FINAL_STAGE - 1 - len(room.get("enemies", ()))
+        return (player["location"], ARMOR in player["inventory"],
+                player["health"], mask, stage)
+
+    def lookup(self, state: State) -> Tuple[float, str]:
+        """Win probability and best command, solving the state if it is new"""
+        if state not in self.table:
+            self.solve(state)
+        return self.table[state]
+
+    def solve(self, state: State) -> float:
+        if state in self.table:
+            return self.table[state][0]
+
+        location, armor, health, mask, stage = state
+        if health <= 0:
+            result = (0.0, "")
+        elif self.has_enemy(location, mask, stage):
+            result = self.solve_fight(state)
+        else:
+            result = self.solve_free(state)
+        self.table[state] = result
+        return result[0]
+
+    def has_enemy(self, location: str, mask: int, stage: int) -> bool:
+        if location == self.treasure:
+            return 0 < stage < FINAL_STAGE
+        return bool(mask & self.enemy_bit.get(location, 0))
+
+    def arrive(self, location: str, armor: bool, health: int, mask: int, stage: int) -> float:
+        """Value of stepping into a room, including the treasure-room trap"""
+        if location == self.treasure:
+            if not armor:
+                return 0.0
+            if stage == 0:
+                stage = 1
+        return self.solve((location, armor, health, mask, stage))
+
+    def solve_fight(self, state: State) -> Tuple[float, str]:
+        location, armor, health, mask, stage = state
+        if location == self.treasure:
+            won = (location, armor, 0, mask, stage + 1)
+        else:
+            won = (location, armor, 0, mask & ~self.enemy_bit[location], stage)
+
+        best = 0.0
+        for damage, p in fight_damage(self.attack, armor, self.params).items():
+            if damage < health:
+                best += p * self.solve(won[:2] + (health - damage,) + won[3:])
+        command = "attack"
+
+        strike = strike_damage(*self.params.move_strike, self.params.move_armor_floor, armor)
+        for direction, target in self.exits[location].items():
+            if (location, direction) == RAT_GATE:
+                continue
+            value = sum(p * self.arrive(target, armor, health - damage, mask, stage)
+                        for damage, p in strike.items() if damage < health)
+            if value > best:
+                best, command = value, f"go {direction}"
+        return best, command
+
+    def solve_free(self, state: State) -> Tuple[float, str]:
+        """Search the enemy-free rooms around the player for the best goal.
+
+        Walking between empty rooms costs nothing, so the value of standing
+        anywhere in that region is the best goal reachable from it.
+        """
+        location, armor, health, mask, stage = state
+        best, command = 0.0, "wait"
+        first_step = {location: None}
+        queue = deque([location])
+        while queue:
+            room = queue.popleft()
+            step = first_step[room]
+
+            if room == self.treasure and stage == FINAL_STAGE:
+                return 1.0, step or f"take {ARTIFACT}"
+            if room == self.armory and not armor:
+                value = self.solve((room, True, health, mask, stage))
+                if value > best:
+                    best, command = value, step or f"take {ARMOR}"
+
+            for direction, target in self.exits[room].items():
+                if target in first_step:
+                    continue
+                hop = step or f"go {direction}"
+                if target == self.treasure and not armor:
+                    continue
+                if target == self.treasure and stage == 0 or self.has_enemy(target, mask, stage):
+                    value = self.arrive(target, armor, health, mask, stage)
+                    if value > best:
+                        best, command = value, hop
+                    continue
+                first_step[target] = hop
+                queue.append(target)
+        return best, command
+
+
+# Solved tables by (attack, params), filled on first use or by warm_tables()
+TABLES: Dict[Tuple[int, Params], Solver] = {}
+
+
+def hint_table(attack: int, params: Params = DEFAULT_PARAMS) -> Solver:
+    """Solver for one attack value with every state reachable from the start solved"""
+    solver = TABLES.get((attack, params))
+    if solver is None:
+        solver = TABLES[attack, params] = solve_table(attack, params)
+    return solver
+
+
+def solve_table(attack: int, params: Params = DEFAULT_PARAMS) -> Solver:
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(limit, 10000))
+    try:
+        solver = Solver(attack, params=params)
+        solver.solve(solver.start_state())
+    finally:
+        sys.setrecursionlimit(limit)
+    return solver
+
+
+def warm_tables(params: Params = DEFAULT_PARAMS, workers: Optional[int] = None):
+    """Solve the table of every attack value a player can roll, in parallel.
+
+    A table takes over a second to solve, far too long for a server's event
+    loop to wait on a player's first `hint`. Processes forked afterwards
+    inherit the tables.
+    """
+    attacks = [attack for attack in range(params.attack[0], params.attack[1] + 1)
+               if (attack, params) not in TABLES]
+    with ProcessPoolExecutor(workers) as pool:
+        for attack, solver in zip(attacks, pool.map(solve_table, attacks,
+                                                     [params] * len(attacks))):
+            TABLES[attack, params] = solver
+
+
+def hint(player: Dict, world: Dict, ctx: Context) -> Tuple[float, str]:
+    """Win probability and best command for the current game state"""
+    solver = hint_table(player["attack"], ctx.params)
+    return solver.lookup(solver.state_of(player, world, ctx))
@@ -0,0 +1,153 @@
+"""SQLite persistence for long-running servers, written in group commits.
+
+Each named session is one row: its turn count, outcome and the journal's
+binary snapshot, which holds the player, only the rooms that changed, the
+movement history and the RNG state. record() after a turn only marks the
+session dirty. flush() then writes every dirty session in one transaction,
+running a single prepared upsert for all of them. A session that took many
+turns since the last commit is serialized once, not once per turn.
+
+A Store flushes itself once `batch_turns` turns are pending, or at the
+first turn recorded after the oldest pending one is `batch_ms` old. A
+server also calls flush() on a timer, so quiet periods still commit.
+
+Data-loss window: a crashed process loses the turns recorded since the last
+commit. That is at most `batch_turns` turns, and no older than `batch_ms`
+plus one timer period. The database runs in WAL mode. With the default
+synchronous=NORMAL, committed turns survive a process crash, but a power
+loss may also drop the commits since the last checkpoint; use "FULL" to
+sync every commit.
+"""
+import contextlib
+import queue
+import sqlite3
+from typing import Callable, Dict, Iterator, Optional
+
+from journal import load_snapshot, snapshot
+from metrics import clock
+from project import Game, discard
+
+SCHEMA = """CREATE TABLE IF NOT EXISTS sessions (
+    name TEXT PRIMARY KEY,
+    turns INTEGER NOT NULL,
+    outcome TEXT,
+    state BLOB NOT NULL
+)"""
+UPSERT = ("INSERT INTO sessions (name, turns, outcome, state) VALUES (?, ?, ?, ?) "
+          "ON CONFLICT (name) DO UPDATE SET "
+          "turns = excluded.turns, outcome = excluded.outcome, state = excluded.state")
+SELECT_ONE = "SELECT state FROM sessions WHERE name = ? AND outcome IS NULL"
+SELECT_ACTIVE = "SELECT name, state FROM sessions WHERE outcome IS NULL"
+SYNCHRONOUS = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+
+class ConnectionPool:
+    """A fixed set of connections to one database, lent out one at a time"""
+
+    def __init__(self, path: str, size: int = 4, synchronous: str = "NORMAL"):
+        if synchronous not in SYNCHRONOUS:
+            raise ValueError(f"synchronous must be one of {', '.join(SYNCHRONOUS)}")
+        self.idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self.connections = [self.connect(path, synchronous) for _ in range(size)]
+        for connection in self.connections:
+            self.idle.put(connection)
+        with self.connection() as db:
+            db.execute(SCHEMA)
+
+    @staticmethod
+    def connect(path: str, synchronous: str) -> sqlite3.Connection:
+        # Transactions are opened explicitly, so one commit covers a whole batch
+        db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(f"PRAGMA synchronous={synchronous}")
+        return db
+
+    @contextlib.contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        db = self.idle.get()
+        try:
+            yield db
+        finally:
+            self.idle.put(db)
+
+    def close(self):
+        for db in self.connections:
+            db.close()
+
+
+class Store:
+    """Named game sessions in SQLite, buffered between group commits"""
+
+    def __init__(self, path: str, batch_turns: int = 256, batch_ms: float = 200,
+                 pool_size: int = 4, synchronous: str = "NORMAL"):
+        self.pool = ConnectionPool(path, pool_size, synchronous)
+        self.batch_turns = batch_turns
+        self.batch_ns = int(batch_ms * 1e6)
+        # Latest state to write for each session touched since the last commit
+        self.pending: Dict[str, Game] = {}
+        self.pending_turns = 0
+        self.oldest: Optional[int] = None
+        self.commits = 0
+
+    def record(self, name: str, game: Game):
+        """Note that a session took a turn, committing if the batch is full or old"""
+        self.pending[name] = game
+        self.pending_turns += 1
+        now = clock()
+        if self.oldest is None:
+            self.oldest = now
+        if self.pending_turns >= self.batch_turns or now - self.oldest >= self.batch_ns:
+            self.flush()
+
+    def flush(self):
+        """Write every pending session in one transaction"""
+        if not self.pending:
+            return
+        rows = [(name, game.turns, game.outcome, snapshot(game))
+                for name, game in self.pending.items()]
+        with self.pool.connection() as db:
+            db.execute("BEGIN")
+            try:
+                db.executemany(UPSERT, rows)
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+        self.pending.clear()
+        self.pending_turns = 0
+        self.oldest = None
+        self.commits += 1
+
+    def load(self, name: str, factory: Optional[Callable[[], Game]] = None) -> Optional[Game]:
+        """A session still in progress, or None"""
+        with self.pool.connection() as db:
+            row = db.execute(SELECT_ONE, (name,)).fetchone()
+        return None if row is None else revive(row[0], factory)
+
+    def load_all(self, factory: Optional[Callable[[], Game]] = None) -> Dict[str, Game]:
+        """Every session still in progress, read in one pass for startup"""
+        games = {}
+        with self.pool.connection() as db:
+            cursor = db.execute(SELECT_ACTIVE)
+            cursor.arraysize = 1024
+            for rows in iter(cursor.fetchmany, []):
+                for name, state in rows:
+                    games[name] = revive(state, factory)
+        return games
+
+    def close(self):
+        self.flush()
+        self.pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def revive(state: bytes, factory: Optional[Callable[[], Game]] = None) -> Game:
+    """Game from a stored snapshot; `factory` supplies its sink, world and hooks"""
+    game = factory() if factory is not None else Game(discard, seed=0)
+    load_snapshot(game, state)
+    return game
@@ -0,0 +1,204 @@
+"""Balance sweeps: whole games simulated over a grid of parameter sets.
+
+Every point of the grid is a Params value. For each point a batch of seeded
+headless games is played by a simple scripted player that walks the
+standard route (rat, armory, treasure room) and attacks whatever blocks
+it. The games are split into chunks fanned out over a process pool, so all
+cores are busy even for a single point. Finished points are cached on disk,
+keyed by their params, game count, seed and a hash of the rules' source, so
+rerunning a sweep only simulates points that are new or whose code changed.
+
+Run from the repository root, giving ranges as low:high and alternatives
+separated by commas:
+    python sweep.py enemy_damage=8:16,10:18 attack=5:15,8:18 --games 4000
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import balance
+import fuzzy
+import items
+import project
+import world
+import worldfile
+from balance import DEFAULT_PARAMS, Params
+from project import STANDARD_DUNGEON, Game, derive_seed, discard
+
+CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".sweep_cache")
+# Where the scripted player goes when nothing blocks it
+PLAN = ("north", "east", "north", "take armor", "south", "west", "north", "take lost artifact")
+MAX_TURNS = 200
+
+
+def code_version() -> str:
+    """Hash of the modules and dungeon whose content decides a game's outcome"""
+    digest = hashlib.sha256()
+    modules = (balance, fuzzy, items, project, world, worldfile, sys.modules[__name__])
+    for path in [module.__file__ for module in modules] + [STANDARD_DUNGEON]:
+        with open(path, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()[:16]
+
+
+def play(params: Params, seed: int) -> Dict:
+    """One scripted game: attack whatever blocks the way, otherwise follow PLAN"""
+    game = Game(discard, seed=seed, params=params)
+    plan = iter(PLAN)
+    observation = game.observe([])
+    while not game.done and game.turns < MAX_TURNS:
+        command = "attack" if observation["enemy"] else next(plan, None)
+        if command is None:
+            break
+        observation = game.step(command)
+    return observation
+
+
+def simulate(params: Params, seed: int, first: int, count: int) -> Dict:
+    """Totals over games first .. first + count - 1 of a point"""
+    totals = {"games": count, "victories": 0, "defeats": 0, "stalled": 0, "turns": 0,
+              "winner_health": 0, "deaths": Counter()}
+    for index in range(first, first + count):
+        observation = play(params, derive_seed(seed, index))
+        totals["turns"] += observation["turns"]
+        if observation["outcome"] == "victory":
+            totals["victories"] += 1
+            totals["winner_health"] += observation["health"]
+        elif observation["outcome"] == "defeat":
+            totals["defeats"] += 1
+            totals["deaths"][observation["room"]] += 1
+        else:
+            totals["stalled"] += 1
+    return totals
+
+
+def merge(parts: Sequence[Dict]) -> Dict:
+    total = {"games": 0, "victories": 0, "defeats": 0, "stalled": 0, "turns": 0,
+             "winner_health": 0, "deaths": Counter()}
+    for part in parts:
+        for key, value in part.items():
+            total[key] += value
+    games, victories = total["games"], total["victories"]
+    return {"games": games,
+            "win_rate": victories / games,
+            "survival": 1 - total["defeats"] / games,
+            "stalled": total["stalled"] / games,
+            "mean_turns": total["turns"] / games,
+            "winner_health": total["winner_health"] / victories if victories else 0.0,
+            "deaths": dict(total["deaths"].most_common())}
+
+
+class SweepCache:
+    """One JSON file per finished point"""
+
+    def __init__(self, directory: str = CACHE):
+        self.directory = directory
+        self.version = code_version()
+
+    def path(self, params: Params, games: int, seed: int) -> str:
+        key = json.dumps([self.version, params._asdict(), games, seed], sort_keys=True)
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest() + ".json")
+
+    def get(self, params: Params, games: int, seed: int) -> Optional[Dict]:
+        try:
+            with open(self.path(params, games, seed)) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def put(self, params: Params, games: int, seed: int, result: Dict):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(params, games, seed)
+        with open(path + ".tmp", "w") as file:
+            json.dump(result, file)
+        os.replace(path + ".tmp", path)
+
+
+def sweep(points: Sequence[Params], games: int = 2000, seed: int = 0,
+          cache: Optional[SweepCache] = None, workers: Optional[int] = None,
+          chunk: int = 250) -> List[Dict]:
+    """Result per point, simulating only the points missing from the cache"""
+    results: List[Optional[Dict]] = [None] * len(points)
+    missing = []
+    for index, params in enumerate(points):
+        cached = cache.get(params, games, seed) if cache is not None else None
+        if cached is None:
+            missing.append(index)
+        else:
+            results[index] = cached
+
+    if missing:
+        tasks = [(index, first, min(chunk, games - first))
+                 for index in missing for first in range(0, games, chunk)]
+        parts: Dict[int, List[Dict]] = {index: [] for index in missing}
+        with ProcessPoolExecutor(workers) as pool:
+            futures = [(index, pool.submit(simulate, points[index], seed, first, count))
+                       for index, first, count in tasks]
+            for index, future in futures:
+                parts[index].append(future.result())
+        for index in missing:
+            results[index] = merge(parts[index])
+            if cache is not None:
+                cache.put(points[index], games, seed, results[index])
+    return results
+
+
+def parse_value(text: str):
+    if ":" in text:
+        low, high = text.split(":")
+        return int(low), int(high)
+    return None if text == "lethal" else int(text)
+
+
+def grid(axes: Sequence[str]) -> List[Params]:
+    """Params for every combination of name=value,value,... axes"""
+    choices = []
+    for axis in axes:
+        name, _, values = axis.partition("=")
+        if name not in Params._fields:
+            raise ValueError(f"Unknown parameter: {name}")
+        choices.append([(name, parse_value(value)) for value in values.split(",")])
+    return [DEFAULT_PARAMS._replace(**dict(combination))
+            for combination in itertools.product(*choices)]
+
+
+def table(points: Sequence[Params], results: Sequence[Dict]) -> List[str]:
+    varied = [name for name in Params._fields
+              if len({getattr(params, name) for params in points}) > 1]
+    header = "".join(f"{name:>18}" for name in varied)
+    lines = [f"{header}{'win':>8}{'survive':>9}{'stalled':>9}{'turns':>7}{'hp left':>9}"
+             f"  deadliest room"]
+    for params, result in zip(points, results):
+        deadliest = next(iter(result["deaths"].items()), None)
+        lines.append("".join(f"{str(getattr(params, name)):>18}" for name in varied) +
+                     f"{result['win_rate']:>8.1%}{result['survival']:>9.1%}"
+                     f"{result['stalled']:>9.1%}{result['mean_turns']:>7.1f}"
+                     f"{result['winner_health']:>9.1f}  " +
+                     (f"{deadliest[0]} ({deadliest[1] / result['games']:.1%})"
+                      if deadliest else "-"))
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("axes", nargs="*", help="name=value,value,... e.g. enemy_damage=8:16,10:18")
+    parser.add_argument("--games", type=int, default=2000, help="games per point")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="default: every core")
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    points = grid(args.axes)
+    cache = None if args.no_cache else SweepCache()
+    results = sweep(points, args.games, args.seed, cache, args.workers)
+    print("\n".join(table(points, results)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import random
+import pytest
+import combat_sim
+from combat_sim import resolve_fights, resolve_treasure_room
+from project import Context, combat
+
+
+def sample_combat(attack, armor, fights):
+    """Run project.combat() directly and collect its rounds and damage"""
+    random.seed(7)
+    swings = []
+    ctx = Context(lambda line, *_: swings.append(line) if line.startswith("Your strike") else None)
+    damage = wins = 0
+    for _ in range(fights):
+        player = {"attack": attack, "health": 100,
+                  "inventory": ["armor plates"] if armor else []}
+        room = {"enemy": "test enemy"}
+        combat(player, room, ctx)
+        damage += 100 - player["health"]
+        wins += player["health"] > 0
+    return len(swings) / fights, damage / fights, wins / fights
+
+
+@pytest.mark.parametrize("resolver", ["python", "numpy"])
+def test_resolve_fights_matches_combat(resolver, monkeypatch):
+    if resolver == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(combat_sim, "np", None)
+
+    fights = 4000
+    expected = sample_combat(6, False, fights)
+    result = resolve_fights([6] * fights, False, 1, seed=11)
+    rounds = sum(result["rounds"]) / fights
+    damage = sum(result["damage"]) / fights
+    wins = sum(result["won"]) / fights
+
+    assert rounds == pytest.approx(expected[0], rel=0.05)
+    assert damage == pytest.approx(expected[1], rel=0.05)
+    assert wins == pytest.approx(expected[2], abs=0.02)
+
+
+@pytest.mark.parametrize("resolver", ["python", "numpy"])
+def test_resolve_treasure_room_chain(resolver, monkeypatch):
+    if resolver == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(combat_sim, "np", None)
+
+    result = resolve_treasure_room([100, 100], health=[50, 0], seed=1)
+    assert list(result["won"]) == [True, False]
+    assert list(result["rounds"]) == [3, 0]
+    assert list(result["defeated"]) == [3, 0]
+    assert list(result["damage"]) == [0, 0]
+
+    result = resolve_fights(0, True, 1, health=1, seed=1)
+    assert list(result["won"]) == [False]
+    assert 4 <= result["damage"][0] <= 8
@@ -0,0 +1,81 @@
+import pytest
+
+import eventlog
+from eventlog import DEATH, MOVE, ROUND, START, EventLog, analyze, read_events, read_names
+from project import Game, discard
+
+ROUTE = ["north", "attack", "dance", "east", "west", "north"]
+
+
+def play(path, seeds, commands=ROUTE):
+    with EventLog(str(path)) as log:
+        for seed in seeds:
+            game = Game(discard, seed=seed, log=log)
+            for command in commands:
+                game.step(command)
+
+
+def test_log_records_turns_and_rounds(tmp_path):
+    path = tmp_path / "play.events"
+    play(path, [3])
+    names = read_names(str(path))
+    records = list(read_events(str(path)))
+    assert records[0][:3] == (0, 0, START) and names[records[0][4]] == "entrance"
+    moves = [(names[room], names[arg]) for _, _, kind, _, room, arg in records if kind == MOVE]
+    assert moves[0] == ("entrance", "hallway")
+    rounds = [record for record in records if record[2] == ROUND]
+    assert rounds and all(names[record[5]] == "giant rat" for record in rounds)
+    # Walking into the treasure room unarmored ends in a dart-trap death
+    death = [record for record in records if record[2] == DEATH]
+    assert [names[record[5]] for record in death] == ["dart trap"]
+
+
+def test_appending_continues_session_numbers(tmp_path):
+    path = tmp_path / "play.events"
+    play(path, [1, 2])
+    play(path, [3])
+    sessions = [record[0] for record in read_events(str(path)) if record[2] == START]
+    assert sessions == [0, 1, 2]
+
+
+def test_appending_after_a_crash_cuts_the_torn_tail(tmp_path):
+    path = tmp_path / "play.events"
+    play(path, [1])
+    with open(path, "ab") as file:
+        file.write(b"torn")
+    with open(str(path) + ".names", "a", encoding="utf-8") as file:
+        file.write("half a na")
+    play(path, [2])
+
+    assert read_names(str(path)).count("half a na") == 0
+    records = list(read_events(str(path)))
+    assert [record[0] for record in records if record[2] == START] == [0, 1]
+    report = analyze(str(path))
+    assert report["sessions"] == 2 and report["exits"]["entrance -> hallway"] == 2
+
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_analyze_reports(tmp_path, use_numpy):
+    if use_numpy:
+        pytest.importorskip("numpy")
+    path = tmp_path / "play.events"
+    play(path, range(20))
+    with open(path, "ab") as file:
+        file.write(b"torn")
+    report = analyze(str(path), use_numpy=use_numpy)
+
+    assert report["sessions"] == 20
+    assert report["funnel"][0] == {"stage": "started", "sessions": 20, "share": 1.0}
+    assert report["heatmap"]["entrance"] >= 20
+    assert report["exits"]["entrance -> hallway"] == 20
+    assert sum(report["deaths_by_room"].values()) == sum(report["death_causes"].values())
+    assert report["combat"]["giant rat"]["rounds"] > 0
+
+
+def test_numpy_and_python_agree(tmp_path, monkeypatch):
+    pytest.importorskip("numpy")
+    path = tmp_path / "play.events"
+    play(path, range(30), ROUTE + ["east", "north", "take armor", "south", "west", "north"])
+    chunked = analyze(str(path))
+    monkeypatch.setattr(eventlog, "np", None)
+    assert analyze(str(path)) == chunked
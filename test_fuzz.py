@@ -0,0 +1,56 @@
+import sys
+
+import pytest
+
+from fuzz import fuzz, run_case, shrink, vocabulary
+from project import Game, discard, register_command, unregister_command
+from world import CompiledWorld
+
+CELLS = CompiledWorld({
+    "entrance": {"description": "A damp cell.", "exits": {"east": "vault"},
+                 "items": ["torch"], "enemy": None},
+    "vault": {"description": "A vault.", "exits": {"west": "entrance"},
+              "items": ["lost artifact"], "enemy": "giant rat"},
+})
+
+
+@pytest.fixture
+def planted():
+    """Commands with a deliberate bug each, removed again after the test"""
+    @register_command("copy")
+    def do_copy(verb, argument, player, world, movement_history, ctx):
+        player["inventory"].extend(list(player["inventory"]))
+
+    @register_command("boom")
+    def do_boom(verb, argument, player, world, movement_history, ctx):
+        raise KeyError(player["location"])
+
+    @register_command("leave")
+    def do_leave(verb, argument, player, world, movement_history, ctx):
+        sys.exit("bye")
+
+    yield
+    unregister_command("copy", "boom", "leave")
+
+
+def test_failures_are_caught_and_shrunk(planted):
+    game = Game(discard, CELLS)
+    assert run_case(game, 1, ["east", "west", "take torch", "inventory"]) is None
+
+    duplicated = run_case(game, 1, ["health", "take torch", "east", "run", "copy", "west", "i"])
+    assert duplicated.signature == ("invariant", "items not conserved")
+    assert duplicated.commands[-1] == "copy"
+    assert shrink(game, duplicated).commands == ("take torch", "copy")
+
+    crash = shrink(game, run_case(game, 1, ["east", "boom", "west"]))
+    assert crash.signature == ("crash", "KeyError", "do_boom") and crash.commands == ("boom",)
+    assert run_case(game, 1, ["leave"]).signature == ("SystemExit",)
+
+
+def test_fuzzing_grows_coverage_without_failures():
+    assert "take lost artifact" in vocabulary(CELLS) and "attack giant rat" in vocabulary(CELLS)
+    report = fuzz(rounds=3, workers=1, batch=100, world=CELLS)
+    assert report["failures"] == []
+    assert report["sequences"] == 300 and report["per_core"] > 0
+    # Beyond the start: the vault, its rat, the torch, and victory or defeat
+    assert report["states"] >= 5 and report["corpus"] > 1
@@ -0,0 +1,104 @@
+import random
+
+from fuzzy import FuzzyIndex, closest, edit_distance
+from items import INDEX_THRESHOLD, room_items
+from output import ListSink
+from project import Game, discard
+
+
+def alignment_distance(first, second):
+    table = [[i + j if not i * j else 0 for j in range(len(second) + 1)]
+             for i in range(len(first) + 1)]
+    for i in range(1, len(first) + 1):
+        for j in range(1, len(second) + 1):
+            table[i][j] = min(table[i - 1][j] + 1, table[i][j - 1] + 1,
+                              table[i - 1][j - 1] + (first[i - 1] != second[j - 1]))
+            if i > 1 and j > 1 and first[i - 1] == second[j - 2] and first[i - 2] == second[j - 1]:
+                table[i][j] = min(table[i][j], table[i - 2][j - 2] + 1)
+    return table[-1][-1]
+
+
+def test_banded_distance_matches_the_full_table():
+    rng = random.Random(2)
+    for _ in range(3000):
+        first, second = ("".join(rng.choice("abcd") for _ in range(rng.randint(0, 7)))
+                         for _ in range(2))
+        for limit in (1, 2, 3):
+            assert edit_distance(first, second, limit) == min(alignment_distance(first, second),
+                                                              limit + 1)
+
+
+def test_index_finds_typos_and_follows_changes():
+    names = ["armor plates", "torch", "rusty key", "key", "lost artifact", "torch"]
+    index = FuzzyIndex(names)
+    expected = {"armr": "armor plates", "armor plats": "armor plates", "trch": "torch",
+                "kye": "key", "rusty kye": "rusty key", "lsot artifact": "lost artifact",
+                "plates": "armor plates", "tor": None, "xyzzy": None, "ke": None}
+    for query, name in expected.items():
+        assert index.match(query) == name == closest(query, names)
+
+    index.remove("torch")
+    assert index.match("trch") == "torch"
+    index.remove("torch")
+    assert index.match("trch") is None and len(index) == 4
+    index.add("torch")
+    assert index.match("trch") == "torch"
+
+
+def test_commands_forgive_typos():
+    sink = ListSink()
+    game = Game(sink, seed=1)
+    game.step("tkae trch")
+    assert "Did you mean 'take trch'? (yes/no)" in sink.messages and not game.player["inventory"]
+    game.step("yes")
+    assert game.player["inventory"] == ["torch"]
+    game.step("esat")
+    game.step("y")
+    game.step("go nroth")
+    game.step("yes")
+    assert game.player["location"] == "guard_room"
+    game.step("attakc the rat")
+    assert "(attack the rat)" in sink.messages
+    assert "The giant rat is not here; the skeletal warrior stands before you." in sink.messages
+    assert game.player["health"] == 100
+
+    fighter = Game(discard, seed=1)
+    fighter.step("north")
+    fighter.step("attack the beast")
+    assert fighter.player["health"] < 100
+
+    traveller = Game(discard, seed=1)
+    traveller.world["hallway"]["enemy"] = None
+    traveller.step("travel chamer")
+    traveller.step("yes")
+    assert traveller.player["location"] == "chamber"
+
+
+def test_guessed_moves_wait_for_a_yes():
+    sink = ListSink()
+    game = Game(sink, seed=1)
+    game.step("north")
+    game.step("eat")
+    assert "Did you mean 'east'? (yes/no)" in sink.messages
+    assert game.player["location"] == "hallway" and game.player["health"] == 100
+    game.step("no")
+    game.step("yes")
+    assert game.player["location"] == "hallway"
+
+    game.step("hit")
+    assert "Did you mean 'hint'? (yes/no)" in sink.messages
+    assert not any("whisper" in message for message in sink.messages)
+    game.step("no")
+
+    for command in ("quiet", "quiz", "/qu"):
+        game.step(command)
+    assert game.outcome is None and not game.ctx.quit
+
+
+def test_crowded_rooms_refresh_their_index():
+    items = room_items(["pebble"] * INDEX_THRESHOLD + ["old torch", "armor plates"])
+    assert items.fuzzy.match("armr") == "armor plates"
+    items.remove("armor plates")
+    assert items.fuzzy.match("armr") is None
+    items.append("armor plates")
+    assert items.fuzzy.match("plaets") == "armor plates"
@@ -0,0 +1,56 @@
+from items import DAMAGE_REDUCTION, INDEX_THRESHOLD, Inventory, ItemContainer, room_items
+from project import Game, discard, take_item
+
+
+def test_inventory_counts_and_capabilities():
+    inventory = Inventory(["torch", "torch"])
+    assert inventory == ["torch", "torch"] and "torch" in inventory
+    assert not inventory.has(DAMAGE_REDUCTION)
+    inventory.append("armor plates")
+    assert inventory.has(DAMAGE_REDUCTION)
+    inventory.remove("torch")
+    assert inventory.counts == {"torch": 1, "armor plates": 1}
+    del inventory[-1:]
+    assert "armor plates" not in inventory and not inventory.has(DAMAGE_REDUCTION)
+
+
+def test_find_matches_the_linear_scan():
+    names = ["rusty key", "torch", "key ring", "bone charm", "torch", "k"]
+    items = ItemContainer(names)
+    for query in ("key", "torch", "ch", "k", "", "ring", "charm", "lamp", "rusty key"):
+        expected = next((name for name in names if query in name), None)
+        assert items.find(query) == expected
+    items.remove("rusty key")
+    assert items.find("key") == "key ring"
+    assert items.find("rus") is None
+    items.remove("torch")
+    items.insert(0, "torch")
+    assert items.find("o") == "torch"
+
+
+def test_find_follows_reordering():
+    items = ItemContainer(["x torch", "y torch", "x torch"])
+    items.pop()
+    assert items == ["x torch", "y torch"] and items.find("torch") == "x torch"
+    items.sort(reverse=True)
+    assert items.find("torch") == "y torch"
+    items.reverse()
+    assert items.find("torch") == "x torch"
+    items *= 2
+    assert items.counts == {"x torch": 2, "y torch": 2}
+    items.pop(0)
+    assert items.find("torch") == "y torch"
+
+
+def test_take_copies_shared_items_once():
+    game = Game(discard, seed=1)
+    game.reset()
+    room = game.world["entrance"]
+    assert room["items"] is game.compiled.items[0] == ("torch",)
+    take_item("tor", game.player, room, game.ctx)
+    assert game.player["inventory"] == ["torch"] and "torch" in game.player["inventory"]
+    assert room["items"] == [] and game.compiled.items[0] == ("torch",)
+
+    crowded = room_items(["pebble"] * INDEX_THRESHOLD + ["old torch"])
+    assert isinstance(crowded, ItemContainer) and crowded.find("torch") == "old torch"
+    assert type(room_items(["torch"])) is list
@@ -0,0 +1,48 @@
+from journal import COMMAND, HEADER, SNAPSHOT, Journal, read_records, restore, snapshot
+from project import Game, discard
+
+SCRIPT = ["north", "attack", "attack", "east", "take key", "north", "take armor",
+          "south", "west", "inventory", "north", "attack", "attack", "attack"]
+
+
+def play(path, snapshot_every):
+    game = Game(discard, seed=42)
+    with Journal(path, game, snapshot_every) as journal:
+        for command in SCRIPT:
+            journal.step(command)
+    return game
+
+
+def test_restore_matches_live_game(tmp_path):
+    path = tmp_path / "game.journal"
+    live = play(path, snapshot_every=4)
+
+    restored = restore(path)
+    assert restored.observe([]) == live.observe([])
+    assert restored.movement_history == live.movement_history
+    assert restored.rng.getstate() == live.rng.getstate()
+    assert snapshot(restored) == snapshot(live)
+
+
+def test_restore_earlier_turn(tmp_path):
+    path = tmp_path / "game.journal"
+    play(path, snapshot_every=4)
+
+    kinds = [kind for kind, _ in read_records(path.read_bytes())]
+    assert kinds[0] == SNAPSHOT
+    assert kinds.count(SNAPSHOT) == 1 + kinds.count(COMMAND) // 4
+
+    partial = Game(discard, seed=42)
+    for command in SCRIPT[:6]:
+        partial.step(command)
+    assert restore(path, turn=6).observe([]) == partial.observe([])
+
+
+def test_truncated_record_is_ignored(tmp_path):
+    path = tmp_path / "game.journal"
+    play(path, snapshot_every=100)
+    expected = restore(path).observe([])
+
+    with open(path, "ab") as file:
+        file.write(HEADER.pack(COMMAND, 50) + b"nor")
+    assert restore(path).observe([]) == expected
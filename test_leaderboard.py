@@ -0,0 +1,87 @@
+import random
+
+from benchmarks.regression import ROUTES
+from journal import load_snapshot, snapshot
+from leaderboard import Leaderboard
+from output import ListSink
+from project import Game, discard
+
+
+def test_boards_keep_the_best_k_of_every_result():
+    board = Leaderboard(k=5)
+    rng = random.Random(3)
+    results = [(rng.choice(["victory", "defeat", "quit"]), rng.randint(5, 60),
+                rng.randint(1, 100), rng.randint(0, 20), f"player {index}")
+               for index in range(5000)]
+    for outcome, turns, health, hits, name in results:
+        board.add(outcome, turns, health, hits, name)
+
+    victories = [(name, turns, health, hits) for outcome, turns, health, hits, name in results
+                 if outcome == "victory"]
+    # Ties go to whoever finished first, which a stable sort keeps in front
+    assert board.top("fastest") == sorted(victories, key=lambda entry: entry[1])[:5]
+    assert board.top("healthiest") == sorted(victories, key=lambda entry: -entry[2])[:5]
+    assert board.top("unscathed") == sorted(victories, key=lambda entry: entry[3])[:5]
+    assert all(len(heap) == 5 for heap in board.heaps.values())
+    assert board.games == 5000 and board.totals["victory"] == len(victories)
+    assert board.totals["hits"] == sum(result[3] for result in results)
+
+
+def test_games_report_when_they_end():
+    board = Leaderboard()
+    sink = ListSink()
+    game = Game(sink, seed=0, results=board)
+    game.name = "ada"
+    for command in ROUTES["victory"]:
+        game.step(command)
+    assert game.outcome == "victory" and game.ctx.hits > 0
+    assert board.top("fastest") == [("ada", 18, game.player["health"], game.ctx.hits)]
+
+    # Blows taken survive a snapshot, so resumed games rank fairly
+    restored = Game(discard, seed=0)
+    load_snapshot(restored, snapshot(game))
+    assert restored.ctx.hits == game.ctx.hits
+
+    game.reset()
+    game.step("quit")
+    game.step("leaderboard")
+    assert board.games == 2 and board.totals["quit"] == 1
+    Game(sink, results=board).step("leaderboard")
+    assert "2 adventures ended: 1 victories, 0 deaths, 1 retreats" in sink.messages
+    Game(sink).step("scores")
+    assert any(message.startswith("No herald") for message in sink.messages)
+
+
+def test_compacted_boards_load_again(tmp_path):
+    path = str(tmp_path / "board.json")
+    board = Leaderboard(k=3, path=path)
+    for turns in (30, 10, 20, 40):
+        board.add("victory", turns, 50, 2, f"took {turns}")
+    board.add("defeat", 7, 0, 9)
+    board.compact()
+
+    loaded = Leaderboard.load(path, k=3)
+    assert (loaded.games, loaded.totals) == (board.games, board.totals)
+    assert all(loaded.top(name) == board.top(name) for name in board.heaps)
+    smaller = Leaderboard.load(path, k=2)
+    assert [entry[1] for entry in smaller.top("fastest")] == [10, 20]
+    assert Leaderboard.load(str(tmp_path / "missing.json")).games == 0
+
+
+def test_workers_see_each_others_games(tmp_path):
+    paths = [str(tmp_path / f"board.json.{worker}") for worker in range(2)]
+    boards = [Leaderboard.load(path, k=3, peers=[other for other in paths if other != path])
+              for path in paths]
+    boards[0].add("victory", 30, 50, 2, "ada")
+    boards[1].add("victory", 10, 80, 0, "bo")
+    boards[1].add("defeat", 7, 0, 9)
+    for board in boards:
+        board.compact()
+    for board in boards:
+        board.load_peers()
+
+    for board in boards:
+        assert board.summary()[0] == "3 adventures ended: 2 victories, 1 deaths, 0 retreats"
+        assert "  1. bo" in "\n".join(board.summary())
+    # Each worker still compacts only its own games
+    assert Leaderboard.load(paths[0]).games == 1
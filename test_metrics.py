@@ -0,0 +1,64 @@
+import json
+
+from metrics import Histogram, Metrics
+from output import ListSink
+from project import Game, discard, register_command, unregister_command
+
+
+def test_histogram_percentiles():
+    histogram = Histogram()
+    for nanoseconds in [100] * 90 + [5000] * 9 + [70000]:
+        histogram.add(nanoseconds, blocks=2)
+    assert histogram.count == 100 and histogram.max == 70000
+    assert histogram.percentile(0.5) == 128
+    assert histogram.percentile(0.95) == 8192
+    assert histogram.percentile(1.0) == 70000
+    assert histogram.to_dict()["blocks_per_call"] == 2
+
+
+def test_metrics_count_commands_and_deaths():
+    metrics = Metrics()
+    game = Game(discard, seed=3, metrics=metrics)
+    for command in ["north", "attack", "dance", "west", "east"]:
+        game.step(command)
+    game.player["health"] = 1
+    game.step("north")
+
+    assert metrics.latency["north"].count == 2
+    assert metrics.latency["west"].count == metrics.latency["east"].count == 1
+    assert metrics.latency["attack"].count == metrics.latency["unknown"].count == 1
+    assert metrics.latency["turn"].count == 6
+    assert metrics.counters["combats"] == 1 and metrics.counters["moves"] >= 2
+    assert metrics.deaths == {game.player["location"]: 1}
+
+
+def test_stats_command_and_json_dump(tmp_path):
+    sink = ListSink()
+    game = Game(sink, seed=1, metrics=Metrics())
+    game.step("east")
+    game.step("stats")
+    assert any(line.startswith("east ") for line in sink.messages)
+
+    game.ctx.metrics.dump(tmp_path / "metrics.json")
+    dumped = json.loads((tmp_path / "metrics.json").read_text())
+    assert dumped["counters"]["moves"] == 1
+    assert dumped["latency"]["east"]["count"] == 1
+
+    plain = ListSink()
+    Game(plain, seed=1).step("stats")
+    assert any(line.startswith("No chronicler") for line in plain.messages)
+
+
+def test_commands_are_named_after_their_verb():
+    @register_command("wave", "salute")
+    def greet(verb, argument, player, world, movement_history, ctx):
+        ctx.echo("You {}.", verb)
+
+    metrics = Metrics()
+    game = Game(discard, seed=3, metrics=metrics)
+    try:
+        game.step("wave")
+        game.step("salute")
+    finally:
+        unregister_command("wave", "salute")
+    assert metrics.latency["wave"].count == metrics.latency["salute"].count == 1
@@ -0,0 +1,48 @@
+import io
+import socket
+from output import ListSink, NullSink, StreamSink, TerminalSink
+from project import Context, Game, show_health
+
+
+class Unformattable:
+    def __format__(self, spec):
+        raise AssertionError("NullSink must not format arguments")
+
+
+def test_null_sink_skips_formatting():
+    sink = NullSink()
+    sink("You suffer {} damage", Unformattable())
+    sink.flush()
+    assert sink.pending == []
+
+
+def test_list_sink_keeps_messages():
+    sink = ListSink()
+    show_health({"health": 20}, Context(sink))
+    assert sink.messages == ["\nBarely standing (Health: 20)",
+                             "The light grows dim... find healing soon!"]
+
+
+def test_terminal_sink_flushes_once_per_turn(capsys):
+    game = Game(TerminalSink())
+    capsys.readouterr()
+    game.ctx.echo("not yet {}", "written")
+    assert capsys.readouterr().out == ""
+    game.step("health")
+    assert capsys.readouterr().out.startswith("not yet written\n\nIn fighting form")
+
+
+def test_stream_sink_targets():
+    stream = io.StringIO()
+    sink = StreamSink(stream)
+    sink("You move {}.", "north")
+    sink("{} braces stay literal in arguments", "{x}")
+    sink.flush()
+    assert stream.getvalue() == "You move north.\n{x} braces stay literal in arguments\n"
+
+    left, right = socket.socketpair()
+    with left, right:
+        sink = StreamSink(left)
+        sink("hello {}", "socket")
+        sink.flush()
+        assert right.recv(64) == b"hello socket\n"
@@ -0,0 +1,65 @@
+import sqlite3
+
+import pytest
+from procgen import ProceduralDungeon, ProceduralGame, RecentHistory, room_name
+from project import discard, take_item
+from world import Player
+
+OPPOSITE = {"north": "south", "south": "north", "east": "west", "west": "east"}
+
+
+def test_generation_is_deterministic_and_symmetric():
+    first, second = ProceduralDungeon(11), ProceduralDungeon(11)
+    assert first.treasure == second.treasure
+    for x in range(-10, 10):
+        for y in range(-10, 10):
+            room = first.generate(room_name(x, y))
+            assert room == second.generate(room_name(x, y))
+            for direction, target in room["exits"].items():
+                assert first.generate(target)["exits"][OPPOSITE[direction]] == room_name(x, y)
+
+    treasure = first.generate(room_name(*first.treasure))
+    assert treasure["items"] == ["lost artifact"]
+    assert "armor plates" in first.generate(room_name(*first.armory))["items"]
+
+
+def test_evicted_changes_survive(tmp_path):
+    dungeon = ProceduralDungeon(11, active_rooms=4)
+    world = dungeon.new_session(str(tmp_path / "rooms.db"))
+    name = room_name(*dungeon.armory)
+    player = Player(name, [], 100, 10)
+    room = world[name]
+    room["enemy"] = None
+    take_item("armor", player, room)
+
+    for x in range(100, 110):
+        world[room_name(x, 0)]
+    assert len(world) == 4
+    assert name not in world.rooms
+
+    assert "armor plates" not in world[name]["items"]
+    world.close()
+
+    reopened = dungeon.new_session(str(tmp_path / "rooms.db"))
+    assert "armor plates" not in reopened[name]["items"]
+    assert "armor plates" in ProceduralDungeon(11).generate(name)["items"]
+
+    with pytest.raises(KeyError):
+        reopened["hallway"]
+
+
+def test_procedural_game_memory_is_bounded():
+    game = ProceduralGame(5, discard, seed=2, active_rooms=8)
+    assert isinstance(game.movement_history, RecentHistory)
+    game.player["health"] = 10 ** 6
+    for _ in range(60):
+        game.step("east")
+        game.step("north")
+    assert len(game.world) <= 8
+    assert len(game.movement_history) <= 8
+    assert game.step("hint")["room"] == game.player["location"]
+
+    finished = game.world
+    game.reset()
+    with pytest.raises(sqlite3.ProgrammingError):
+        finished.store.execute("SELECT 1")
@@ -2,7 +2,11 @@ import pytest
 import random
 from project import (initialize_player, initialize_world, describe_room,
                      take_item, move_player, combat, show_inventory,
-                     show_health, handle_movement)
+                     show_health, handle_movement, discard, Game, GameBatch,
+                     COMMANDS, VERB_INDEX, Context, process_command, register_command,
+                     unregister_command, derive_seed, read_scripts, run_scripts, play_batch)
+from balance import DEFAULT_PARAMS
+from benchmarks import regression, suite
 
 
 def test_initialize_player():
@@ -163,3 +167,146 @@ def test_show_health(capsys):
     show_health(player)
     captured = capsys.readouterr()
     assert "dim" in captured.out
+
+
+def test_game_step_is_headless(capsys):
+    game = Game(echo=discard)
+    obs = game.step("north")
+    assert capsys.readouterr().out == ""
+    assert obs["room"] == "hallway"
+    assert obs["enemy"] == "giant rat"
+    assert ("move", "entrance", "hallway") in obs["events"]
+    assert not obs["done"]
+
+    obs = game.step("quit")
+    assert obs["done"]
+    assert obs["outcome"] == "quit"
+
+
+def test_game_treasure_room_trap():
+    game = Game(echo=discard)
+    game.world["hallway"]["enemy"] = None
+    game.step("north")
+    obs = game.step("north")
+    assert obs["room"] == "treasure_room"
+    assert obs["health"] == 0
+    assert obs["outcome"] == "defeat"
+    assert ("trap",) in obs["events"]
+
+
+def test_game_batch_steps_independently():
+    batch = GameBatch(3)
+    batch.reset()
+    obs = batch.step(["east", None, "inventory"])
+    assert [o["room"] for o in obs] == ["armory", "entrance", "entrance"]
+
+    with pytest.raises(ValueError):
+        batch.step(["north"])
+
+
+def test_process_command_argument_forms(capsys):
+    ctx = Context()
+    player = initialize_player()
+    world = initialize_world()
+
+    process_command("go", player, world, {}, ctx)
+    assert "don't understand" in capsys.readouterr().out
+    process_command("inventory please", player, world, {}, ctx)
+    assert "don't understand" in capsys.readouterr().out
+
+    process_command("attack rat", player, world, {}, ctx)
+    assert "hitting nothing" in capsys.readouterr().out
+    process_command("go east", player, world, {}, ctx)
+    assert player["location"] == "armory"
+    process_command("take dag", player, world, {}, ctx)
+    assert player["inventory"] == ["dagger"]
+
+
+def test_register_command(capsys):
+    @register_command("dance", argument="optional")
+    def do_dance(verb, argument, player, world, movement_history, ctx):
+        ctx.echo(f"You {verb} {argument or 'alone'}.")
+
+    try:
+        process_command("dance wildly", {"location": "entrance"}, initialize_world(), {})
+        process_command("dance", {"location": "entrance"}, initialize_world(), {})
+        assert capsys.readouterr().out == "You dance wildly.\nYou dance alone.\n"
+        assert VERB_INDEX.match("dnace") == "dance"
+    finally:
+        unregister_command("dance")
+    assert "dance" not in COMMANDS and "dance " not in COMMANDS
+    assert VERB_INDEX.match("dnace") is None
+
+    with pytest.raises(ValueError):
+        register_command("sing", argument="sometimes")
+
+
+def test_seeded_games_are_reproducible():
+    commands = ["north", "attack", "attack", "east", "attack", "west"]
+    first, second = GameBatch(2, seed=5), GameBatch(2, seed=5)
+    for command in commands:
+        assert first.step([command] * 2) == second.step([command] * 2)
+
+    assert derive_seed(5, 0) != derive_seed(5, 1)
+    assert first.games[0].player["attack"] == Game(discard, seed=derive_seed(5, 0)).player["attack"]
+
+    # Games never touch the module-level random stream
+    state = random.getstate()
+    Game(discard, seed=1).step("attack")
+    assert random.getstate() == state
+
+
+def test_recorded_playthroughs_replay_identically():
+    assert regression.verify() == []
+
+
+def test_benchmark_suite_flags_regressions():
+    results = suite.run(["combat", "take_item"], samples=3, batch=5)
+    assert set(results["cases"]) == {"combat", "take_item"}
+    stats = results["cases"]["combat"]
+    assert stats["p10_us"] <= stats["median_us"] <= stats["p99_us"]
+    assert stats["alloc_peak_bytes"] >= stats["alloc_held_bytes"]
+
+    assert suite.compare(results, results) == []
+    faster = {"cases": {name: dict(case, median_us=case["median_us"] / 2)
+                        for name, case in results["cases"].items()}}
+    flagged = suite.compare(results, faster)
+    assert len(flagged) == 2 and flagged[0].startswith("combat: median_us")
+
+
+def test_balance_params_reach_the_rules():
+    params = DEFAULT_PARAMS._replace(attack=(30, 30), health=40, trap_damage=15)
+    game = Game(discard, seed=2, params=params)
+    assert game.player["attack"] == 30 and game.player["health"] == 40
+
+    # A non-lethal dart trap only wounds, leaving the unguarded artifact
+    game.player["location"] = "hallway"
+    game.world["hallway"]["enemy"] = None
+    observation = game.step("north")
+    assert observation["health"] == 25 and not observation["done"]
+    assert game.step("take lost artifact")["outcome"] == "victory"
+
+
+def test_batch_plays_every_script_in_one_process(tmp_path, monkeypatch):
+    stream = ["# a comment\n", "North\n", "attack\n", "\n", "\n", "quit\n", "east\n", "\n",
+              "east\n", "take Dagger"]
+    scripts = list(read_scripts(stream))
+    assert scripts == [["north", "attack"], ["quit", "east"], ["east", "take dagger"]]
+
+    results = list(run_scripts(scripts, seed=7))
+    # Quitting ends only its own script, and every script starts from a fresh game
+    assert [r["outcome"] for r in results] == ["unfinished", "quit", "unfinished"]
+    assert results[1]["turns"] == 1 and results[2]["inventory"] == ["dagger"]
+    fresh = Game(discard, seed=derive_seed(7, 0))
+    fresh.step("north")
+    fresh.step("attack")
+    assert results[0]["health"] == fresh.player["health"]
+
+    source = tmp_path / "scripts.txt"
+    source.write_text("".join(stream))
+    monkeypatch.setattr("sys.stdin", iter(["west\n"]))
+    out = tmp_path / "results.jsonl"
+    with open(out, "w") as file:
+        play_batch([str(source), "-"], seed=7, out=file)
+    lines = out.read_text().splitlines()
+    assert len(lines) == 4 and lines[3].startswith('{"script":3,"outcome":"unfinished"')
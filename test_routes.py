@@ -0,0 +1,59 @@
+from project import Game, compiled_world, discard
+from routes import RouteIndex, route_index
+from world import CompiledWorld
+
+
+def grid(width, height):
+    """Rooms on a width x height grid, each linked to its compass neighbours"""
+    rooms = {}
+    for x in range(width):
+        for y in range(height):
+            exits = {}
+            if y + 1 < height:
+                exits["north"] = f"{x},{y + 1}"
+            if y > 0:
+                exits["south"] = f"{x},{y - 1}"
+            if x + 1 < width:
+                exits["east"] = f"{x + 1},{y}"
+            if x > 0:
+                exits["west"] = f"{x - 1},{y}"
+            rooms[f"{x},{y}"] = {"description": "A bare cell.", "exits": exits,
+                                 "items": [], "enemy": None}
+    return rooms
+
+
+def test_routes_in_the_dungeon():
+    index = route_index(compiled_world())
+    assert index is route_index(compiled_world())
+    assert index.route("entrance", "entrance") == []
+    assert index.route("entrance", "armory_back") == ["north", "east", "north"]
+    assert index.route("guard_room", "garden") == ["south", "west", "north", "east", "east", "north"]
+    # The library's "down" exit is unusable because move_player turns it into south
+    assert index.route("entrance", "catacombs") is None
+
+
+def test_route_cache_is_bounded():
+    index = RouteIndex(CompiledWorld(grid(30, 30)), cached_destinations=3)
+    for y in range(5):
+        route = index.route("0,0", f"29,{y}")
+        assert len(route) == 29 + y
+    assert len(index.tables) == 3
+
+
+def test_travel_command(capsys):
+    game = Game(discard, seed=3)
+    game.step("travel treasure room")
+    # The rat guards the hallway's north exit
+    assert game.player["location"] == "hallway"
+    assert game.player["health"] == 100
+
+    game.world["hallway"]["enemy"] = None
+    obs = game.step("travel armory back")
+    assert obs["room"] == "armory_back"
+    obs = game.step("travel atlantis")
+    assert obs["room"] == "armory_back"
+
+    game.step("take armor")
+    obs = game.step("travel treasure_room")
+    assert obs["room"] == "treasure_room"
+    assert obs["enemy"] == "poisonous serpent"
@@ -0,0 +1,89 @@
+import pytest
+
+from balance import DEFAULT_PARAMS
+from output import ListSink
+from project import Game, discard
+from scheduler import CombatScheduler
+
+TOUGH = DEFAULT_PARAMS._replace(enemy_health=(10 ** 6, 10 ** 6))
+
+
+def fight_to_the_end(scheduler, ticks=1000):
+    for _ in range(ticks):
+        if not scheduler.active:
+            return
+        scheduler.tick()
+    raise AssertionError("fight never ended")
+
+
+def test_guardians_fight_together_until_the_room_is_clear():
+    scheduler = CombatScheduler()
+    sink = ListSink()
+    game = Game(sink, seed=2, params=DEFAULT_PARAMS._replace(health=10 ** 6), scheduler=scheduler)
+    room = game.world["treasure_room"]
+    room["enemy"], room["enemies"] = "poisonous serpent", ["cursed guardian"]
+    game.player["location"] = "treasure_room"
+    game.player["inventory"].append("armor plates")
+    game.ctx.guardians_spawned = True
+    game.step("attack")
+    assert game.player["health"] == 10 ** 6  # nothing is settled within the command
+
+    fight_to_the_end(scheduler)
+    assert room["enemy"] is None and room["enemies"] == []
+    struck_by = {line.split("The ")[1].split(" retaliates")[0]
+                 for line in sink.messages if "retaliates" in line}
+    assert struck_by == {"poisonous serpent", "cursed guardian"}
+    assert "Victory is yours... for now." in sink.messages
+
+
+def test_a_session_fights_once_and_flees_by_moving():
+    scheduler = CombatScheduler()
+    sink = ListSink()
+    game = Game(sink, seed=4, params=TOUGH, scheduler=scheduler)
+    game.step("north")
+    game.step("attack")
+    game.step("attack")
+    assert len(scheduler.active) == 1
+    assert any("already locked in battle" in line for line in sink.messages)
+
+    scheduler.tick()
+    game.step("south")
+    fight_to_the_end(scheduler)
+    assert game.world["hallway"]["enemy"] == "giant rat"
+    assert not game.done
+
+
+def test_a_scheduled_death_ends_the_game():
+    scheduler = CombatScheduler()
+    game = Game(discard, seed=1, params=TOUGH, scheduler=scheduler)
+    game.step("north")
+    game.step("attack")
+    fight_to_the_end(scheduler)
+    assert game.done and game.outcome == "defeat"
+
+
+def test_ticks_only_run_due_actions():
+    scheduler = CombatScheduler(slots=8)
+    games = [Game(discard, seed=index, params=TOUGH, scheduler=scheduler) for index in range(50)]
+    for game in games[:10]:
+        game.step("north")
+        game.step("attack")
+    # Every player swings on the first tick; the rats' first blows come later
+    assert scheduler.tick() == 10
+    assert scheduler.tick() == 0
+    with pytest.raises(ValueError):
+        scheduler.schedule(8, next(iter(scheduler.active.values())).entries[0])
+
+
+def test_fights_are_keyed_on_the_session_context():
+    scheduler = CombatScheduler()
+    sink = ListSink()
+    game = Game(sink, seed=4, params=TOUGH, scheduler=scheduler)
+    game.step("north")
+    game.step("attack")
+    stale = game.ctx
+    game.reset()
+    game.step("north")
+    game.step("attack")
+    assert set(scheduler.active) == {stale, game.ctx}
+    assert not any("already locked in battle" in line for line in sink.messages)
@@ -0,0 +1,118 @@
+import asyncio
+import io
+from leaderboard import Leaderboard
+from project import TREASURE_GUARDIANS, compiled_world
+from server import GameServer, Session, session_footprint
+from shared import SharedWorld
+from storage import Store
+
+
+async def play(server, commands):
+    reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+    for command in commands:
+        writer.write(command.encode() + b"\n")
+    await writer.drain()
+    data = await reader.read()
+    writer.close()
+    return data.decode()
+
+
+def test_sessions_are_independent():
+    async def scenario():
+        server = GameServer(port=0)
+        await server.start()
+        try:
+            return await asyncio.gather(play(server, ["north", "quit"]),
+                                        play(server, ["east", "quit"]))
+        finally:
+            await server.close()
+
+    first, second = asyncio.run(scenario())
+    assert "DUNGEON OF THE LOST ARTIFACT" in first
+    assert "long hallway" in first
+    assert "old armory" in second
+    assert "long hallway" not in second
+    assert "shadows seem to grow longer" in second
+
+
+def test_shared_world_sessions_see_each_other():
+    world = SharedWorld(compiled_world(), TREASURE_GUARDIANS)
+
+    async def scenario():
+        server = GameServer(port=0, world=world)
+        await server.start()
+        try:
+            first = await play(server, ["take torch", "quit"])
+            second = await play(server, ["take torch", "quit"])
+            return first, second
+        finally:
+            await server.close()
+
+    try:
+        first, second = asyncio.run(scenario())
+    finally:
+        world.close()
+    assert "You carefully take the torch." in first
+    assert "No torch lies within your grasp." in second
+
+
+def test_named_games_survive_a_restart(tmp_path):
+    async def scenario(commands):
+        store = Store(tmp_path / "games.db")
+        server = GameServer(port=0, idle_timeout=0.2, store=store)
+        await server.start()
+        try:
+            return await play(server, commands)
+        finally:
+            await server.close()
+            store.close()
+
+    asyncio.run(scenario(["ada", "north"]))
+    resumed = asyncio.run(scenario(["ada", "health", "quit"]))
+    fresh = asyncio.run(scenario(["bo", "quit"]))
+    assert "The dungeon remembers you" in resumed
+    assert "long hallway" in resumed
+    assert "remembers you" not in fresh
+
+
+def test_finished_games_reach_the_leaderboard(tmp_path):
+    async def scenario():
+        store = Store(tmp_path / "games.db")
+        results = Leaderboard.load(str(tmp_path / "board.json"))
+        server = GameServer(port=0, idle_timeout=0.2, store=store, results=results)
+        await server.start()
+        try:
+            await play(server, ["ada", "quit"])
+            return await play(server, ["bo", "leaderboard", "quit"])
+        finally:
+            await server.close()
+            store.close()
+
+    assert "1 adventures ended: 0 victories, 0 deaths, 1 retreats" in asyncio.run(scenario())
+    # Closing the server compacts the boards, both games included
+    assert Leaderboard.load(str(tmp_path / "board.json")).totals["quit"] == 2
+
+
+def test_idle_timeout_closes_session():
+    async def scenario():
+        server = GameServer(port=0, idle_timeout=0.05)
+        await server.start()
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            data = await asyncio.wait_for(reader.read(), 2)
+            writer.close()
+            return data.decode(), len(server.sessions)
+        finally:
+            await server.close()
+
+    output, active = asyncio.run(scenario())
+    assert "wait too long" in output
+    assert active == 0
+
+
+def test_session_footprint():
+    stream = io.BytesIO()
+    session = Session(stream)
+    session.game.step("north")
+    assert b"hallway" in stream.getvalue()
+    assert session_footprint(50) > 0
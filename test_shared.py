@@ -0,0 +1,66 @@
+import multiprocessing
+
+import pytest
+
+from output import ListSink
+from project import TREASURE_GUARDIANS, Game, compiled_world, discard
+from shared import SharedWorld
+
+
+@pytest.fixture
+def world():
+    shared = SharedWorld(compiled_world(), TREASURE_GUARDIANS)
+    yield shared
+    shared.close()
+
+
+def grab_artifact(world, results):
+    room = world.new_session()["treasure_room"]
+    results.put(sum(room.take("lost artifact") for _ in range(500)))
+
+
+def test_the_artifact_is_taken_once_across_processes(world):
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=grab_artifact, args=(world, results))
+               for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    taken = sum(results.get(timeout=30) for _ in workers)
+    for worker in workers:
+        worker.join()
+    assert taken == 1
+    assert world.new_session()["treasure_room"]["items"] == []
+
+
+def test_players_share_pickups_and_kills(world):
+    first, second = Game(discard, world=world, seed=1), Game(ListSink(), world=world, seed=2)
+    first.step("take torch")
+    first.step("north")
+    first.step("attack")
+    assert first.world["hallway"]["enemy"] is None
+
+    second.step("take torch")
+    assert "No torch lies within your grasp." in second.echo.messages
+    second.step("north")
+    assert second.observe([])["enemy"] is None
+    # A second killing blow on the same rat does not count
+    assert not second.world["hallway"].defeat("giant rat")
+
+    world.reset()
+    assert second.world["hallway"]["enemy"] == "giant rat"
+    assert second.world["entrance"]["items"] == ["torch"]
+
+
+def test_guardians_rise_once_per_world(world):
+    games = [Game(discard, world=world, seed=seed) for seed in (3, 4)]
+    for game in games:
+        game.player["inventory"].append("armor plates")
+        game.player["location"] = "hallway"
+        game.world["hallway"].defeat("giant rat")
+        game.step("north")
+    room = games[1].world["treasure_room"]
+    assert room["enemy"] == TREASURE_GUARDIANS[0]
+    assert room["enemies"] == list(TREASURE_GUARDIANS[1:])
+    assert room.defeat(TREASURE_GUARDIANS[0])
+    assert not room.spawn(TREASURE_GUARDIANS)
+    assert games[0].world["treasure_room"]["enemy"] == TREASURE_GUARDIANS[1]
@@ -0,0 +1,58 @@
+import pytest
+import solver as solver_module
+from balance import DEFAULT_PARAMS
+from project import Context, initialize_player, initialize_world, process_command
+from solver import Solver, fight_damage, hint_table, strike_damage, warm_tables
+
+
+def test_fight_damage_is_a_distribution():
+    for armor in (False, True):
+        dist = fight_damage(15, armor)
+        assert sum(dist.values()) == pytest.approx(1.0)
+        assert min(dist) == 0
+
+    # Armor halves every hit, so the worst case shrinks
+    assert max(fight_damage(5, True)) < max(fight_damage(5, False))
+
+
+def test_strike_damage_armor_floor():
+    assert strike_damage(8, 18, 3, False) == pytest.approx({d: 1 / 11 for d in range(8, 19)})
+    assert set(strike_damage(5, 12, 2, True)) == {2, 3, 4, 5, 6}
+
+
+def test_solver_trap_and_pedestal():
+    solver = Solver(10)
+    mask = solver.full_mask
+
+    # Walking into the treasure room unarmored is certain death
+    hallway = ("hallway", False, 100, mask & ~solver.enemy_bit["hallway"], 0)
+    assert solver.lookup(hallway)[1] != "go north"
+
+    # With every guardian dead the artifact is a free win
+    done = ("treasure_room", True, 10, 0, 4)
+    assert solver.lookup(done) == (1.0, "take lost artifact")
+    assert solver.lookup(("chamber", True, 10, 0, 4)) == (1.0, "go west")
+
+
+def test_hint_table_start_and_command(capsys):
+    solver = hint_table(15)
+    chance, command = solver.lookup(solver.start_state())
+    assert 0.9 < chance <= 1.0 + 1e-9
+    assert command == "go north"
+
+    player = initialize_player()
+    player["attack"] = 15
+    process_command("hint", player, initialize_world(), {}, Context())
+    assert "go north" in capsys.readouterr().out
+
+
+def test_warmed_tables_answer_without_solving(monkeypatch):
+    params = DEFAULT_PARAMS._replace(attack=(15, 15))
+    warm_tables(params, workers=1)
+
+    def solve_table(attack, params):
+        raise AssertionError("solved on demand")
+
+    monkeypatch.setattr(solver_module, "solve_table", solve_table)
+    solver = hint_table(15, params)
+    assert solver.lookup(solver.start_state())[1] == "go north"
@@ -0,0 +1,46 @@
+import pytest
+
+from journal import snapshot
+from project import Game, discard
+from storage import Store
+
+SCRIPT = ["north", "attack", "attack", "east", "take key", "north", "take armor"]
+
+
+def test_turns_are_committed_in_batches(tmp_path):
+    store = Store(tmp_path / "games.db", batch_turns=5, batch_ms=60_000)
+    games = {"ada": Game(discard, seed=1), "bo": Game(discard, seed=2)}
+    for command in SCRIPT[:6]:
+        for name, game in games.items():
+            game.step(command)
+            store.record(name, game)
+    assert store.commits == 2 and store.pending_turns == 2
+    store.close()
+
+    with Store(tmp_path / "games.db") as reopened:
+        restored = reopened.load_all()
+    assert set(restored) == {"ada", "bo"}
+    for name, game in games.items():
+        assert snapshot(restored[name]) == snapshot(game)
+        assert restored[name].observe([]) == game.observe([])
+
+
+def test_only_unfinished_games_are_restored(tmp_path):
+    with Store(tmp_path / "games.db", batch_ms=0) as store:
+        playing, quitter = Game(discard, seed=3), Game(discard, seed=4)
+        playing.step("east")
+        quitter.step("quit")
+        store.record("playing", playing)
+        store.record("quitter", quitter)
+        # Every turn is its own commit once the batch may be no older than 0 ms
+        assert store.commits == 2
+
+    with Store(tmp_path / "games.db") as store:
+        assert set(store.load_all()) == {"playing"}
+        assert store.load("quitter") is None
+        assert store.load("playing").player["location"] == "armory"
+
+
+def test_rejects_unknown_sync_mode(tmp_path):
+    with pytest.raises(ValueError):
+        Store(tmp_path / "games.db", synchronous="SOMETIMES")
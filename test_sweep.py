@@ -0,0 +1,34 @@
+import pytest
+
+import sweep
+from balance import DEFAULT_PARAMS
+from sweep import SweepCache, grid, merge, simulate
+
+
+def test_grid_parses_ranges_and_scalars():
+    points = grid(["enemy_damage=8:16,10:18", "trap_damage=lethal,20"])
+    assert len(points) == 4
+    assert points[0] == DEFAULT_PARAMS
+    assert points[-1].enemy_damage == (10, 18) and points[-1].trap_damage == 20
+    with pytest.raises(ValueError):
+        grid(["dragons=3"])
+
+
+def test_chunks_merge_to_the_whole_batch():
+    whole = merge([simulate(DEFAULT_PARAMS, 4, 0, 40)])
+    split = merge([simulate(DEFAULT_PARAMS, 4, 0, 15), simulate(DEFAULT_PARAMS, 4, 15, 25)])
+    assert whole == split
+    assert whole["games"] == 40
+    assert whole["win_rate"] + whole["stalled"] + (1 - whole["survival"]) == pytest.approx(1)
+
+
+def test_sweep_only_simulates_uncached_points(tmp_path, monkeypatch):
+    cache = SweepCache(str(tmp_path))
+    points = grid(["enemy_damage=8:16,30:40"])
+    first = sweep.sweep(points, games=20, cache=cache, workers=1, chunk=8)
+    assert first[1]["survival"] < first[0]["survival"]
+
+    def no_pool(*args):
+        raise AssertionError("cached points were simulated again")
+    monkeypatch.setattr(sweep, "ProcessPoolExecutor", no_pool)
+    assert sweep.sweep(points, games=20, cache=cache) == first
@@ -0,0 +1,34 @@
+from project import Game, compiled_world, discard, initialize_world, take_item
+from world import NO_EXIT, CompiledWorld, Player, SessionWorld
+
+
+def test_compiled_world_exit_table():
+    world = CompiledWorld(initialize_world())
+    entrance = world.ids["entrance"]
+    assert world.names[entrance] == "entrance"
+    assert world.neighbor(entrance, "north") == world.ids["hallway"]
+    assert world.neighbor(entrance, "south") == NO_EXIT
+    assert world.neighbor(entrance, "sideways") == NO_EXIT
+    assert world.exits[entrance]["east"] == "armory"
+
+
+def test_session_rooms_copy_on_write():
+    first = SessionWorld(compiled_world())
+    second = SessionWorld(compiled_world())
+    assert len(first) == 0
+    assert first["entrance"]["description"] is second["entrance"]["description"]
+
+    player = Player("entrance", [], 100, 10)
+    take_item("torch", player, first["entrance"])
+    assert player["inventory"] == ["torch"]
+    assert first["entrance"]["items"] == []
+    assert second["entrance"]["items"] == ("torch",)
+    assert compiled_world().items[0] == ("torch",)
+
+
+def test_games_share_compiled_world():
+    first, second = Game(discard), Game(discard)
+    assert first.compiled is second.compiled
+    first.world["hallway"]["enemy"] = None
+    assert second.world["hallway"]["enemy"] == "giant rat"
+    assert "enemies" not in first.world["treasure_room"]
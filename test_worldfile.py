@@ -0,0 +1,86 @@
+import json
+import os
+import pickle
+
+import pytest
+
+from output import ListSink
+from project import STANDARD_RULES, Game, compiled_world, initialize_world
+from world import CompiledWorld
+from worldfile import MappedWorld, cache_path, load_world, validate
+
+CRYPT = """
+[rooms.entrance]
+description = "A cold crypt."
+exits = { east = "tomb" }
+enemy = "bone hound"
+
+[rooms.tomb]
+description = "An artifact glints in a sealed tomb."
+exits = { west = "entrance" }
+items = ["lost artifact"]
+treasure = true
+
+[rules]
+gates = [{ room = "entrance", direction = "east", text = ["The hound bars the way!", "It growls."] }]
+guardians = ["crypt lord"]
+"""
+
+
+def test_standard_dungeon_is_mapped_from_its_cache():
+    mapped, literal = compiled_world(), CompiledWorld(initialize_world())
+    assert isinstance(mapped, MappedWorld)
+    assert list(mapped.names) == list(literal.names)
+    assert [mapped.ids[name] for name in literal.names] == list(range(len(literal)))
+    assert list(mapped.exits) == list(literal.exits)
+    assert list(mapped.items) == list(literal.items)
+    assert list(mapped.enemies) == list(literal.enemies)
+    assert list(mapped.exit_table) == list(literal.exit_table)
+    assert mapped.treasure[mapped.ids["treasure_room"]] and not mapped.treasure[0]
+    assert mapped.rules == STANDARD_RULES
+    assert "nowhere" not in mapped.ids
+    assert list(pickle.loads(pickle.dumps(mapped)).names) == list(mapped.names)
+
+
+def test_cache_is_rebuilt_only_when_stale(tmp_path):
+    source = tmp_path / "tiny.json"
+    rooms = {"entrance": {"description": "Dust.", "exits": {}}}
+    source.write_text(json.dumps({"rooms": rooms}))
+    assert load_world(source).descriptions[0] == "Dust."
+    built = os.stat(cache_path(source)).st_mtime_ns
+    assert load_world(source).descriptions[0] == "Dust."
+    assert os.stat(cache_path(source)).st_mtime_ns == built
+
+    rooms["entrance"]["description"] = "Fresh dust."
+    source.write_text(json.dumps({"rooms": rooms}))
+    assert load_world(source).descriptions[0] == "Fresh dust."
+
+    with open(cache_path(source), "r+b") as file:
+        file.truncate(40)
+    assert load_world(source).descriptions[0] == "Fresh dust."
+
+
+def test_toml_dungeon_rules_drive_the_game(tmp_path):
+    source = tmp_path / "crypt.toml"
+    source.write_text(CRYPT)
+    sink = ListSink()
+    game = Game(sink, world=load_world(source), seed=1)
+    game.step("east")
+    assert "\nThe hound bars the way!" in sink.messages and "It growls." in sink.messages
+    assert game.player["location"] == "entrance"
+
+    game.world["entrance"]["enemy"] = None
+    game.step("east")
+    # No trap is defined, so the guardians rise at once
+    assert game.world["tomb"]["enemy"] == "crypt lord"
+    assert game.player["health"] > 0
+
+
+def test_validation_reports_every_problem():
+    with pytest.raises(ValueError) as error:
+        validate({"rooms": {"hall": {"description": "Hall.",
+                                     "exits": {"sideways": "hall", "north": "void"}}},
+                  "rules": {"gates": [{"room": "hall", "direction": "south", "text": []}]}})
+    message = str(error.value)
+    for problem in ("'entrance'", "'sideways'", "'void'", "gate 'hall' 'south'"):
+        assert problem in message
@@ -0,0 +1,144 @@
+"""Compiled, shared world data with small per-session room and player state.
+
+A CompiledWorld holds everything about a dungeon that never changes during
+play: room names and their integer IDs, descriptions, exits, the starting
+items and enemies, and the dungeon's special Rules. Every session shares one
+instance. A SessionWorld only
+materializes a Room when the player first looks at it, and a Room keeps
+pointing at the shared starting items until the player changes them.
+"""
+from array import array
+from types import MappingProxyType
+from typing import Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+DIRECTIONS = ("north", "south", "east", "west", "up", "down")
+NO_EXIT = -1
+
+
+class Rules(NamedTuple):
+    """A dungeon's special rules, as its definition file states them"""
+
+    # Exits that stay shut while their room's enemy stands: (room, direction) -> refusal
+    gates: Mapping[Tuple[str, str], Tuple[str, ...]] = MappingProxyType({})
+    # Who rises in a treasure room once the player survives its dart trap
+    guardians: Tuple[str, ...] = ()
+    # The item that turns the darts aside; None means the room has no trap
+    trap_protection: Optional[str] = None
+
+
+class CompiledWorld:
+    """Immutable topology and text for one dungeon layout"""
+
+    __slots__ = ("names", "ids", "descriptions", "exits", "exit_table", "items", "enemies",
+                 "treasure", "rules")
+
+    def __init__(self, rooms: Dict, rules: Optional[Rules] = None):
+        """Without `rules` the world plays by the standard dungeon's"""
+        self.names: Tuple[str, ...] = tuple(rooms)
+        self.ids: Dict[str, int] = {name: index for index, name in enumerate(self.names)}
+        self.descriptions = tuple(room["description"] for room in rooms.values())
+        self.exits = tuple(MappingProxyType(dict(room["exits"])) for room in rooms.values())
+        self.items = tuple(tuple(room["items"]) for room in rooms.values())
+        self.enemies = tuple(room["enemy"] for room in rooms.values())
+        # None where the layout does not say, leaving it to the rules to recognize
+        self.treasure = tuple(room.get("treasure") for room in rooms.values())
+        self.rules = rules
+
+        # Row per room, column per direction, -1 where there is no exit
+        self.exit_table = array("i", [NO_EXIT]) * (len(self.names) * len(DIRECTIONS))
+        for room_id, exits in enumerate(self.exits):
+            for direction, target in exits.items():
+                self.exit_table[room_id * len(DIRECTIONS) + DIRECTIONS.index(direction)] = \
+                    self.ids[target]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __reduce__(self):
+        # Rebuilt from plain room data, for worker processes that are not forked
+        return CompiledWorld, ({name: {"description": description, "exits": dict(exits),
+                                       "items": list(items), "enemy": enemy, "treasure": treasure}
+                                for name, description, exits, items, enemy, treasure in
+                                zip(self.names, self.descriptions, self.exits, self.items,
+                                    self.enemies, self.treasure)}, self.rules)
+
+    def neighbor(self, room_id: int, direction: str) -> int:
+        """Room ID through an exit, or NO_EXIT"""
+        if direction not in DIRECTIONS:
+            return NO_EXIT
+        return self.exit_table[room_id * len(DIRECTIONS) + DIRECTIONS.index(direction)]
+
+    def new_session(self) -> "SessionWorld":
+        """Fresh per-game view of this world"""
+        return SessionWorld(self)
+
+    def room(self, room_id: int) -> "Room":
+        return Room(self.descriptions[room_id], self.exits[room_id],
+                    self.items[room_id], self.enemies[room_id], self.treasure[room_id])
+
+
+class Room:
+    """Dict-style room whose text and exits are shared with every session.
+
+    `items` starts as the shared tuple; the rules replace it with a private
+    list when something is taken, so untouched rooms cost no copies.
+    """
+
+    __slots__ = ("description", "exits", "items", "enemy", "enemies", "treasure")
+
+    __getitem__ = object.__getattribute__
+    __setitem__ = object.__setattr__
+
+    def __init__(self, description: str, exits: MappingProxyType, items: Tuple,
+                 enemy: Optional[str], treasure: Optional[bool] = None):
+        self.description = description
+        self.exits = exits
+        self.items = items
+        self.enemy = enemy
+        self.treasure = treasure
+
+    def __contains__(self, key: str) -> bool:
+        return hasattr(self, key)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
+
+
+class SessionWorld(dict):
+    """Per-session room map that builds rooms from the shared world on first use.
+
+    Only rooms the player has reached are stored, so iterating it yields the
+    visited rooms; use `compiled.names` for the full layout.
+    """
+
+    __slots__ = ("compiled",)
+
+    def __init__(self, compiled: CompiledWorld):
+        super().__init__()
+        self.compiled = compiled
+
+    def __missing__(self, name: str) -> Room:
+        room = self.compiled.room(self.compiled.ids[name])
+        self[name] = room
+        return room
+
+
+class Player:
+    """Dict-style player record with fixed fields"""
+
+    __slots__ = ("location", "inventory", "health", "attack")
+
+    __getitem__ = object.__getattribute__
+    __setitem__ = object.__setattr__
+
+    def __init__(self, location: str, inventory: List[str], health: int, attack: int):
+        self.location = location
+        self.inventory = inventory
+        self.health = health
+        self.attack = attack
+
+    def __contains__(self, key: str) -> bool:
+        return hasattr(self, key)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
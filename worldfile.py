@@ -0,0 +1,346 @@
+"""Dungeon definition files and their memory-mapped binary cache.
+
+A definition is a JSON or TOML file with a `rooms` table and optional
+`rules`:
+
+    [rooms.entrance]
+    description = "You stand in the crumbling entrance hall."
+    exits = { north = "hallway" }
+    items = ["torch"]
+    enemy = "giant rat"          # optional
+    treasure = true              # optional: the artifact's room, with its dart trap
+
+    [rules]
+    gates = [{ room = "hallway", direction = "north", text = ["The rat stands firm!"] }]
+    guardians = ["poisonous serpent", "cursed guardian"]
+    trap_protection = "armor plates"
+
+Every game starts in the room called "entrance". load_world() validates a
+definition once and compiles it into a binary cache kept beside it in
+__pycache__, like bytecode. Later loads map the cache into memory and
+decode a room only when a session first enters it, so a load costs the
+same for fourteen rooms as for fifty thousand. A cache is rebuilt when its
+source's size or modification time no longer match the stamp in its header,
+or when the header or section sizes do not add up.
+
+The cache is native-endian and meant for the machine that wrote it; a cache
+written elsewhere fails the header check and is rebuilt.
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from collections.abc import Mapping, Sequence
+from types import MappingProxyType
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from world import DIRECTIONS, NO_EXIT, CompiledWorld, Rules
+
+MAGIC = b"DOLW"
+FORMAT_VERSION = 1
+BYTE_ORDER = 0x01020304
+START = "entrance"
+# magic, version, byte-order mark, source size and mtime, file length, then counts:
+# rooms, strings, item refs, exit pairs, hash slots, gates, gate lines, guardians,
+# and the trap protection's string (-1 for no trap)
+HEADER = struct.Struct("=4sHxxIqqQIIIIIIIIi")
+# Per room: name, description, enemy (-1 for none), treasure flag,
+# then first index and count of its items and of its exits
+ROOM_FIELDS = 8
+NAME, DESCRIPTION, ENEMY, TREASURE, ITEMS, ITEM_COUNT, EXITS, EXIT_COUNT = range(ROOM_FIELDS)
+EMPTY = -1
+
+
+def cache_path(path: str) -> str:
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, "__pycache__", name + ".world")
+
+
+def read_definition(path: str) -> Dict:
+    """Parse a JSON or TOML definition and return it validated and filled in"""
+    if str(path).endswith(".toml"):
+        try:
+            import tomllib
+        except ImportError:
+            raise ValueError("TOML definitions need Python 3.11 or newer") from None
+        with open(path, "rb") as file:
+            definition = tomllib.load(file)
+    else:
+        with open(path, encoding="utf-8") as file:
+            definition = json.load(file)
+    return validate(definition)
+
+
+def validate(definition: Dict) -> Dict:
+    """Check a parsed definition, returning {"rooms": ..., "rules": Rules}.
+
+    Every problem found is reported in one ValueError.
+    """
+    problems: List[str] = []
+    rooms = definition.get("rooms") if isinstance(definition, dict) else None
+    if not isinstance(rooms, dict) or not rooms:
+        raise ValueError("A dungeon needs a non-empty `rooms` table")
+    if START not in rooms:
+        problems.append(f"there is no {START!r} room to start in")
+
+    def strings(value, where: str) -> List[str]:
+        if not isinstance(value, list) or not all(isinstance(text, str) for text in value):
+            problems.append(f"{where} must be a list of strings")
+            return []
+        return value
+
+    checked = {}
+    for name, room in rooms.items():
+        if not isinstance(room, dict):
+            problems.append(f"room {name!r} must be a table")
+            continue
+        description, exits = room.get("description"), room.get("exits", {})
+        enemy, treasure = room.get("enemy"), room.get("treasure", False)
+        if not isinstance(description, str):
+            problems.append(f"room {name!r} needs a description")
+        if not isinstance(exits, dict):
+            problems.append(f"room {name!r}: exits must be a table")
+            exits = {}
+        for direction, target in exits.items():
+            if direction not in DIRECTIONS:
+                problems.append(f"room {name!r}: unknown direction {direction!r}")
+            if target not in rooms:
+                problems.append(f"room {name!r}: exit {direction} leads to unknown room {target!r}")
+        if enemy is not None and not isinstance(enemy, str):
+            problems.append(f"room {name!r}: enemy must be a name")
+        if not isinstance(treasure, bool):
+            problems.append(f"room {name!r}: treasure must be true or false")
+        checked[name] = {"description": description, "exits": dict(exits),
+                         "items": list(strings(room.get("items", []), f"room {name!r}: items")),
+                         "enemy": enemy, "treasure": treasure}
+
+    rules = definition.get("rules", {})
+    if not isinstance(rules, dict):
+        raise ValueError("Invalid dungeon: rules must be a table")
+    gates = {}
+    for gate in rules.get("gates", []):
+        if not isinstance(gate, dict):
+            problems.append("each gate must be a table")
+            continue
+        room, direction = gate.get("room"), gate.get("direction")
+        if room not in checked or direction not in checked[room]["exits"]:
+            problems.append(f"gate {room!r} {direction!r} is not an exit of a known room")
+        gates[room, direction] = tuple(strings(gate.get("text"), f"gate {room!r} {direction!r}"))
+    guardians = tuple(strings(rules.get("guardians", []), "guardians"))
+    protection = rules.get("trap_protection")
+    if protection is not None and not isinstance(protection, str):
+        problems.append("trap_protection must be an item name")
+
+    if problems:
+        raise ValueError("Invalid dungeon: " + "; ".join(problems))
+    return {"rooms": checked, "rules": Rules(MappingProxyType(gates), guardians, protection)}
+
+
+def encode(definition: Dict, stamp: Tuple[int, int] = (0, 0)) -> bytes:
+    """Binary cache for a validated definition; `stamp` is its source's size and mtime"""
+    rooms, rules = definition["rooms"], definition["rules"]
+    ids = {name: index for index, name in enumerate(rooms)}
+    strings: Dict[str, int] = {}
+
+    def intern(text: Optional[str]) -> int:
+        return EMPTY if text is None else strings.setdefault(text, len(strings))
+
+    records, exit_table = array("i"), array("i", [NO_EXIT]) * (len(rooms) * len(DIRECTIONS))
+    item_refs, exit_pairs = array("i"), array("i")
+    for room_id, (name, room) in enumerate(rooms.items()):
+        records.extend((intern(name), intern(room["description"]), intern(room["enemy"]),
+                        int(room["treasure"]), len(item_refs), len(room["items"]),
+                        len(exit_pairs) // 2, len(room["exits"])))
+        item_refs.extend(intern(item) for item in room["items"])
+        for direction, target in room["exits"].items():
+            exit_pairs.extend((DIRECTIONS.index(direction), ids[target]))
+            exit_table[room_id * len(DIRECTIONS) + DIRECTIONS.index(direction)] = ids[target]
+
+    # Open addressing on the UTF-8 name's CRC, at most half full
+    capacity = 1 << max(1, (2 * len(rooms) - 1).bit_length())
+    slots = array("i", [EMPTY]) * capacity
+    for room_id, name in enumerate(rooms):
+        slot = zlib.crc32(name.encode()) & (capacity - 1)
+        while slots[slot] != EMPTY:
+            slot = (slot + 1) & (capacity - 1)
+        slots[slot] = room_id
+
+    gates, lines = array("i"), array("i")
+    for (room, direction), text in rules.gates.items():
+        gates.extend((ids[room], DIRECTIONS.index(direction), len(lines), len(text)))
+        lines.extend(intern(line) for line in text)
+    guardians = array("i", (intern(guardian) for guardian in rules.guardians))
+    protection = intern(rules.trap_protection)
+
+    encoded = [text.encode() for text in strings]
+    offsets = array("i", [0])
+    for text in encoded:
+        offsets.append(offsets[-1] + len(text))
+    body = b"".join(section.tobytes() for section in (
+        offsets, records, exit_table, item_refs, exit_pairs, slots, gates, lines, guardians))
+    blob = b"".join(encoded)
+    length = HEADER.size + len(body) + len(blob)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, BYTE_ORDER, stamp[0], stamp[1], length,
+                         len(rooms), len(strings), len(item_refs), len(exit_pairs) // 2,
+                         capacity, len(gates) // 4, len(lines), len(guardians), protection)
+    return header + body + blob
+
+
+class Column(Sequence):
+    """Per-room values decoded from the cache on first use, then kept"""
+
+    __slots__ = ("size", "decode", "cache")
+
+    def __init__(self, size: int, decode: Callable[[int], object]):
+        self.size = size
+        self.decode = decode
+        self.cache: Dict[int, object] = {}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(self.size))]
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        try:
+            return self.cache[index]
+        except KeyError:
+            value = self.cache[index] = self.decode(index)
+            return value
+
+
+class NameIndex(Mapping):
+    """Room name to ID through the cache's hash table"""
+
+    __slots__ = ("names", "slots")
+
+    def __init__(self, names: Column, slots: memoryview):
+        self.names = names
+        self.slots = slots
+
+    def __getitem__(self, name: str) -> int:
+        if not isinstance(name, str):
+            raise KeyError(name)
+        mask = len(self.slots) - 1
+        slot = zlib.crc32(name.encode()) & mask
+        while True:
+            room_id = self.slots[slot]
+            if room_id == EMPTY:
+                raise KeyError(name)
+            if self.names[room_id] == name:
+                return room_id
+            slot = (slot + 1) & mask
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+class MappedWorld(CompiledWorld):
+    """CompiledWorld read straight out of a memory-mapped cache file"""
+
+    __slots__ = ("path", "map", "records", "item_refs", "exit_pairs", "strings")
+
+    def __init__(self, path: str, stamp: Optional[Tuple[int, int]] = None):
+        """Map a cache, raising ValueError unless it is intact and, given a stamp, current"""
+        self.path = path
+        with open(path, "rb") as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.map) < HEADER.size:
+            raise ValueError(f"{path} is truncated or damaged")
+        (magic, version, order, size, mtime, length, rooms, strings, item_refs, exit_pairs,
+         capacity, gates, lines, guardians, protection) = HEADER.unpack_from(self.map)
+        if (magic, version, order) != (MAGIC, FORMAT_VERSION, BYTE_ORDER):
+            raise ValueError(f"{self.path} is not a current world cache")
+        if stamp is not None and (size, mtime) != stamp:
+            raise ValueError(f"{self.path} was built from another version of its source")
+        widths = (strings + 1, rooms * ROOM_FIELDS, rooms * len(DIRECTIONS), item_refs,
+                  exit_pairs * 2, capacity, gates * 4, lines, guardians)
+        cells_end = HEADER.size + 4 * sum(widths)
+        if length != len(self.map) or cells_end > length or capacity & (capacity - 1):
+            raise ValueError(f"{self.path} is truncated or damaged")
+
+        cells = memoryview(self.map)[HEADER.size:cells_end].cast("i")
+        sections = []
+        for width in widths:
+            sections.append(cells[:width])
+            cells = cells[width:]
+        (offsets, self.records, exit_table, self.item_refs, self.exit_pairs, slots,
+         gate_rows, gate_lines, guardian_ids) = sections
+        if offsets[strings] != length - cells_end:
+            raise ValueError(f"{self.path} is truncated or damaged")
+        blob = memoryview(self.map)[cells_end:]
+        # Interned, as a world's literals in code are, so equal names share one object
+        self.strings = Column(strings, lambda index: sys.intern(
+            str(blob[offsets[index]:offsets[index + 1]], "utf-8")))
+
+        self.names = Column(rooms, lambda room_id: self.field(room_id, NAME))
+        self.ids = NameIndex(self.names, slots)
+        self.descriptions = Column(rooms, lambda room_id: self.field(room_id, DESCRIPTION))
+        self.enemies = Column(rooms, lambda room_id: self.field(room_id, ENEMY))
+        self.treasure = Column(rooms, lambda room_id: bool(self.record(room_id)[TREASURE]))
+        self.items = Column(rooms, self._items)
+        self.exits = Column(rooms, self._exits)
+        self.exit_table = exit_table
+        self.rules = Rules(
+            MappingProxyType({
+                (self.names[gate_rows[row]], DIRECTIONS[gate_rows[row + 1]]):
+                    tuple(self.strings[line] for line in
+                          gate_lines[gate_rows[row + 2]:gate_rows[row + 2] + gate_rows[row + 3]])
+                for row in range(0, len(gate_rows), 4)}),
+            tuple(self.strings[guardian] for guardian in guardian_ids),
+            None if protection == EMPTY else self.strings[protection])
+
+    def record(self, room_id: int) -> memoryview:
+        return self.records[room_id * ROOM_FIELDS:(room_id + 1) * ROOM_FIELDS]
+
+    def field(self, room_id: int, column: int) -> Optional[str]:
+        index = self.records[room_id * ROOM_FIELDS + column]
+        return None if index == EMPTY else self.strings[index]
+
+    def _items(self, room_id: int) -> Tuple[str, ...]:
+        record = self.record(room_id)
+        refs = self.item_refs[record[ITEMS]:record[ITEMS] + record[ITEM_COUNT]]
+        return tuple(self.strings[ref] for ref in refs)
+
+    def _exits(self, room_id: int) -> MappingProxyType:
+        record = self.record(room_id)
+        pairs = self.exit_pairs[2 * record[EXITS]:2 * (record[EXITS] + record[EXIT_COUNT])]
+        return MappingProxyType({DIRECTIONS[pairs[index]]: self.names[pairs[index + 1]]
+                                 for index in range(0, len(pairs), 2)})
+
+    def __reduce__(self):
+        return MappedWorld, (self.path,)
+
+
+def load_world(path: str) -> CompiledWorld:
+    """World from a definition file, compiling its cache first if it is missing or stale"""
+    status = os.stat(path)
+    stamp = (status.st_size, status.st_mtime_ns)
+    cache = cache_path(path)
+    try:
+        return MappedWorld(cache, stamp)
+    except (OSError, ValueError):
+        pass
+
+    definition = read_definition(path)
+    data = encode(definition, stamp)
+    try:
+        os.makedirs(os.path.dirname(cache), exist_ok=True)
+        temporary = f"{cache}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(data)
+        os.replace(temporary, cache)
+        return MappedWorld(cache, stamp)
+    except OSError:
+        # Nowhere to keep a cache: fall back to an in-memory world
+        return CompiledWorld(definition["rooms"], definition["rules"])